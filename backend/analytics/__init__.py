@@ -0,0 +1,9 @@
+"""
+Analytics module.
+Task completion history collection and pre-aggregated reporting.
+"""
+
+from analytics.collectors import record_completion
+from analytics.processors import get_completion_rollups
+
+__all__ = ["record_completion", "get_completion_rollups"]
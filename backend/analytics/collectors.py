@@ -0,0 +1,95 @@
+"""
+Analytics collectors.
+Record task completions into task_history and update the completion rollups incrementally.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from models.task import Task
+from models.task_history import TaskHistory
+from models.completion_rollup import CompletionRollup
+
+GRANULARITIES = ("hour", "day", "week")
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """
+    Get the start of the bucket a moment falls into.
+    
+    Args:
+        moment: Point in time
+        granularity: "hour", "day" or "week" (weeks start on Monday)
+        
+    Returns:
+        Start of the containing bucket
+    """
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown granularity '{granularity}'")
+
+def record_completion(db: Session, task: Task, completed_at: Optional[datetime] = None) -> TaskHistory:
+    """
+    Record a task completion.
+    
+    Appends a task_history row and bumps the hour, day and week rollups in the
+    caller's transaction; the caller commits.
+    
+    Args:
+        db: Database session
+        task: Task that was completed
+        completed_at: Completion time (defaults to now)
+        
+    Returns:
+        The new history entry
+    """
+    completed_at = completed_at or datetime.utcnow()
+    entry = TaskHistory(task_id=task.id, completed_at=completed_at)
+    db.add(entry)
+    
+    add_to_rollups(db, [(task.created_at, completed_at)])
+    return entry
+
+def add_to_rollups(db: Session, completions: Iterable[Tuple[Optional[datetime], datetime]]) -> None:
+    """
+    Add completions to the hour, day and week rollups without history rows.
+    
+    Completions are summed per bucket first, so a bulk load upserts each
+    bucket once; runs in the caller's transaction and the caller commits.
+    
+    Args:
+        db: Database session
+        completions: (created_at, completed_at) pairs; a missing creation time counts no lag
+    """
+    buckets = defaultdict(lambda: [0, 0.0])
+    for created_at, completed_at in completions:
+        lag_seconds = max((completed_at - created_at).total_seconds(), 0.0) if created_at else 0.0
+        for granularity in GRANULARITIES:
+            bucket = buckets[(granularity, bucket_start(completed_at, granularity))]
+            bucket[0] += 1
+            bucket[1] += lag_seconds
+    
+    now = datetime.utcnow()
+    for (granularity, start), (count, lag_seconds) in buckets.items():
+        statement = insert(CompletionRollup).values(
+            granularity=granularity,
+            bucket_start=start,
+            completed_count=count,
+            total_lag_seconds=lag_seconds,
+            created_at=now,
+            updated_at=now,
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start"],
+            set_={
+                "completed_count": CompletionRollup.completed_count + count,
+                "total_lag_seconds": CompletionRollup.total_lag_seconds + lag_seconds,
+                "updated_at": now,
+            },
+        ))
@@ -0,0 +1,321 @@
+"""
+Algorithm evaluation.
+Replays a task stream against priority algorithms offline and compares ranking quality and cost.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from models.task import Task
+from models.task_history import TaskHistory
+from priority_queue.algorithms import ALGORITHMS, PriorityAlgorithm
+from priority_queue.engine import PriorityQueueEngine
+
+EVENT_CREATE = "create"
+EVENT_EDIT = "edit"
+EVENT_COMPLETE = "complete"
+
+class ReplayEvent(NamedTuple):
+    """
+    One event of a task stream.
+    A complete event is a unit of work capacity: the replay completes whichever
+    task the algorithm ranks first at that moment, not the task that was recorded.
+    """
+    at: datetime
+    kind: str
+    task_id: Optional[int] = None
+    fields: Optional[dict] = None
+
+class ReplayTask:
+    """Lightweight task carrying only what the algorithms and engine read."""
+    
+    __slots__ = ("id", "urgency", "difficulty", "due_date", "created_at", "completed", "priority_score")
+    
+    def __init__(self, task_id: int, urgency: int = 3, difficulty: int = 3,
+                 due_date: Optional[datetime] = None, created_at: Optional[datetime] = None):
+        self.id = task_id
+        self.urgency = urgency
+        self.difficulty = difficulty
+        self.due_date = due_date
+        self.created_at = created_at
+        self.completed = False
+        self.priority_score = None
+
+def history_stream(db: Session) -> List[ReplayEvent]:
+    """
+    Build a replay stream from the tasks table and task_history.
+    
+    Tasks are created at their created_at with their current fields (edits are not
+    recorded, so the stream has none); every history row becomes a completion slot.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Events in time order
+    """
+    events = [
+        ReplayEvent(created_at, EVENT_CREATE, task_id,
+                    {"urgency": urgency, "difficulty": difficulty, "due_date": due_date})
+        for task_id, urgency, difficulty, due_date, created_at in db.query(
+            Task.id, Task.urgency, Task.difficulty, Task.due_date, Task.created_at
+        ).filter(Task.created_at.isnot(None))
+    ]
+    events.extend(ReplayEvent(completed_at, EVENT_COMPLETE) for (completed_at,) in db.query(TaskHistory.completed_at))
+    return sorted(events, key=lambda event: (event.at, event.kind != EVENT_CREATE))
+
+def sample_task_fields(rng: random.Random, created: datetime, due_date_rate: float = 0.6) -> dict:
+    """
+    Draw urgency, difficulty and due date for a synthetic task.
+    
+    Urgency centres on 3 with a longer high tail; difficulty skews easy. A due_date_rate
+    share of tasks are due one to fourteen days after creation.
+    
+    Args:
+        rng: Random number generator
+        created: Creation time of the task
+        due_date_rate: Probability that the task has a due date
+    
+    Returns:
+        Dictionary with urgency, difficulty and due_date
+    """
+    due_date = None
+    if rng.random() < due_date_rate:
+        due_date = created + timedelta(days=rng.choice([1, 2, 3, 5, 7, 14]), hours=rng.randrange(24))
+    return {
+        "urgency": rng.choices([1, 2, 3, 4, 5], weights=[10, 20, 35, 25, 10])[0],
+        "difficulty": rng.choices([1, 2, 3, 4, 5], weights=[15, 30, 30, 15, 10])[0],
+        "due_date": due_date,
+    }
+
+def synthetic_stream(
+    n_tasks: int = 5000,
+    start: Optional[datetime] = None,
+    arrivals_per_day: float = 20.0,
+    capacity: float = 0.9,
+    edit_rate: float = 0.1,
+    due_date_rate: float = 0.6,
+    seed: int = 0,
+) -> List[ReplayEvent]:
+    """
+    Generate a synthetic replay stream.
+    
+    Tasks arrive as a Poisson process during working hours with fields drawn by
+    sample_task_fields(). Completion slots arrive
+    at capacity times the arrival rate, so a backlog builds when capacity < 1.
+    
+    Args:
+        n_tasks: Number of tasks created
+        start: Time of the first event (defaults to 2025-01-06)
+        arrivals_per_day: Mean task arrivals per day
+        capacity: Completion slots per arrival
+        edit_rate: Probability that a task is edited after creation
+        due_date_rate: Probability that a task has a due date
+        seed: Random seed
+    
+    Returns:
+        Events in time order
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2025, 1, 6)
+    events = []
+    at = start
+    for task_id in range(1, n_tasks + 1):
+        at += timedelta(days=rng.expovariate(arrivals_per_day))
+        created = at.replace(hour=9 + rng.randrange(9))
+        events.append(ReplayEvent(created, EVENT_CREATE, task_id, sample_task_fields(rng, created, due_date_rate)))
+        if rng.random() < edit_rate:
+            events.append(ReplayEvent(created + timedelta(hours=rng.uniform(1, 72)), EVENT_EDIT, task_id,
+                                      {"urgency": rng.randint(1, 5)}))
+    
+    slots = int(n_tasks * capacity)
+    span = (at - start).total_seconds()
+    events.extend(
+        ReplayEvent(start + timedelta(seconds=rng.uniform(0, span) + 3600), EVENT_COMPLETE)
+        for _ in range(slots)
+    )
+    return sorted(events, key=lambda event: (event.at, event.kind != EVENT_CREATE))
+
+def replay(
+    algorithm: PriorityAlgorithm,
+    events: Iterable[ReplayEvent],
+    name: str = "default",
+    rescore_interval: timedelta = timedelta(days=1),
+) -> dict:
+    """
+    Replay a stream through PriorityQueueEngine with one algorithm.
+    
+    Tasks are scored as of each event's time, so results do not depend on when
+    the replay runs.
+    
+    Args:
+        algorithm: Algorithm class scoring the tasks
+        events: Events in time order
+        name: Algorithm name reported and passed to the engine
+        rescore_interval: Simulated time between full rescores of open tasks
+    
+    Returns:
+        Dictionary with completed, overdue, open, mean_lag_hours, ops and seconds
+    """
+    engine = PriorityQueueEngine(algorithm=name)
+    open_tasks: Dict[int, ReplayTask] = {}
+    lags = []
+    overdue = ops = 0
+    elapsed = 0.0
+    last_rescore = None
+    now = None
+    
+    for event in events:
+        now = event.at
+        if event.kind == EVENT_CREATE:
+            task = ReplayTask(event.task_id, created_at=event.at, **event.fields)
+            open_tasks[task.id] = task
+            started = time.perf_counter()
+            algorithm.apply_to_tasks([task], now)
+            engine.add_task(task)
+            elapsed += time.perf_counter() - started
+            ops += 1
+        elif event.kind == EVENT_EDIT:
+            task = open_tasks.get(event.task_id)
+            if task is None:
+                continue
+            for field, value in event.fields.items():
+                setattr(task, field, value)
+            started = time.perf_counter()
+            engine.remove_task(task.id)
+            algorithm.apply_to_tasks([task], now)
+            engine.add_task(task)
+            elapsed += time.perf_counter() - started
+            ops += 2
+        elif event.kind == EVENT_COMPLETE:
+            started = time.perf_counter()
+            if last_rescore is None or event.at - last_rescore >= rescore_interval:
+                tasks = list(open_tasks.values())
+                algorithm.apply_to_tasks(tasks, now)
+                engine.reprioritize_all(tasks)
+                last_rescore = event.at
+                ops += 1
+            entry = engine.pop_next_task()
+            elapsed += time.perf_counter() - started
+            ops += 1
+            if entry is None:
+                continue
+            task = open_tasks.pop(entry.task_id)
+            lags.append((event.at - task.created_at).total_seconds() / 3600)
+            if task.due_date and event.at > task.due_date:
+                overdue += 1
+    
+    overdue += sum(1 for task in open_tasks.values() if task.due_date and now and task.due_date < now)
+    return {
+        "algorithm": name,
+        "completed": len(lags),
+        "open": len(open_tasks),
+        "overdue": overdue,
+        "mean_lag_hours": round(sum(lags) / len(lags), 2) if lags else None,
+        "ops": ops,
+        "seconds": elapsed,
+    }
+
+def evaluate(
+    events: List[ReplayEvent],
+    algorithms: Optional[List[str]] = None,
+    rescore_interval: timedelta = timedelta(days=1),
+    measure_memory: bool = True,
+) -> List[dict]:
+    """
+    Replay the same stream against several algorithms.
+    
+    Timing comes from a plain replay; peak memory from a second replay under
+    tracemalloc, which would otherwise slow the timed run down. An algorithm that
+    raises is reported with its error instead of metrics.
+    
+    Args:
+        events: Events in time order
+        algorithms: Names from ALGORITHMS (defaults to all of them)
+        rescore_interval: Simulated time between full rescores of open tasks
+        measure_memory: Whether to run the extra replay measuring peak memory
+    
+    Returns:
+        One result dictionary per algorithm
+    """
+    results = []
+    for name in algorithms or list(ALGORITHMS):
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{name}'")
+        try:
+            result = replay(ALGORITHMS[name], events, name, rescore_interval)
+        except Exception as e:
+            results.append({"algorithm": name, "error": f"{type(e).__name__}: {e}"})
+            continue
+        result["ops_per_sec"] = round(result["ops"] / result["seconds"]) if result["seconds"] else None
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                replay(ALGORITHMS[name], events, name, rescore_interval)
+                result["peak_memory_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            finally:
+                tracemalloc.stop()
+        results.append(result)
+    return results
+
+def format_table(results: List[dict]) -> str:
+    """
+    Format evaluation results as a plain-text comparison table.
+    
+    Args:
+        results: Results from evaluate()
+    
+    Returns:
+        The table
+    """
+    columns = ["algorithm", "completed", "open", "overdue", "mean_lag_hours", "ops_per_sec", "peak_memory_kb"]
+    rows = [
+        ["-" if result.get(column) is None else str(result[column]) for column in columns]
+        for result in results if "error" not in result
+    ]
+    widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(columns)]
+    widths[0] = max([widths[0]] + [len(result["algorithm"]) for result in results])
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+    lines.extend(
+        f"{result['algorithm'].ljust(widths[0])}  failed: {result['error']}"
+        for result in results if "error" in result
+    )
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare priority algorithms on a replayed task stream")
+    parser.add_argument("--source", choices=["synthetic", "history"], default="synthetic",
+                        help="Replay a generated stream or the local task history")
+    parser.add_argument("--tasks", type=int, default=5000, help="Tasks in the synthetic stream")
+    parser.add_argument("--capacity", type=float, default=0.9, help="Completion slots per synthetic arrival")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic stream seed")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS),
+                        help="Comma-separated algorithm names")
+    parser.add_argument("--rescore-hours", type=float, default=24.0,
+                        help="Simulated hours between full rescores")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory replay")
+    args = parser.parse_args()
+    
+    if args.source == "history":
+        from database.session import SessionLocal
+        db = SessionLocal()
+        try:
+            stream = history_stream(db)
+        finally:
+            db.close()
+    else:
+        stream = synthetic_stream(args.tasks, capacity=args.capacity, seed=args.seed)
+    
+    print(f"Replaying {len(stream)} events")
+    print(format_table(evaluate(
+        stream,
+        args.algorithms.split(","),
+        timedelta(hours=args.rescore_hours),
+        measure_memory=not args.no_memory,
+    )))
@@ -0,0 +1,51 @@
+"""
+Analytics processors.
+Read pre-aggregated completion rollups for dashboards.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from models.completion_rollup import CompletionRollup
+from analytics.collectors import GRANULARITIES
+
+def get_completion_rollups(
+    db: Session,
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Get completion totals per bucket.
+    
+    Reads only the rollup table, so the cost depends on the number of buckets
+    requested rather than on the size of the completion history.
+    
+    Args:
+        db: Database session
+        granularity: "hour", "day" or "week"
+        start: Only include buckets starting at or after this time
+        end: Only include buckets starting before this time
+        
+    Returns:
+        List of buckets with completion count and mean completion lag
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'")
+    
+    query = db.query(CompletionRollup).filter(CompletionRollup.granularity == granularity)
+    if start:
+        query = query.filter(CompletionRollup.bucket_start >= start)
+    if end:
+        query = query.filter(CompletionRollup.bucket_start < end)
+    
+    return [
+        {
+            "bucket_start": rollup.bucket_start,
+            "completed_count": rollup.completed_count,
+            "mean_completion_hours": (
+                rollup.total_lag_seconds / rollup.completed_count / 3600 if rollup.completed_count else 0.0
+            ),
+        }
+        for rollup in query.order_by(CompletionRollup.bucket_start).all()
+    ]
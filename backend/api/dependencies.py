@@ -3,8 +3,30 @@ API dependencies.
 Shared dependencies for dependency injection (database sessions, auth, etc.).
 """
 
+import hmac
+import os
+from typing import Optional, Union
+from fastapi import Header, HTTPException
+from cache import LRUCache, TieredCache, cache_from_url
+from database.session import SessionLocal
+from jobs import JobRunner
+from jobs.handlers import SCHEDULED_RESCORE_PRIORITY
+from notifications import ChangeFeedSink, LogSink, ReminderScheduler, WebhookSink, reminder_offsets
+from services.write_behind import WriteBehindBuffer
 from database.session import get_db
 from sqlalchemy.orm import Session
+from priority_queue.deadlines import DeadlineIndex
+from priority_queue.priority_queue import PriorityQueue
+from priority_queue.service import QueueClient, parse_address
+from priority_queue.shared_snapshot import SharedQueueSnapshot
+
+_priority_queue: Optional[Union[PriorityQueue, QueueClient]] = None
+_queue_snapshot: Optional[SharedQueueSnapshot] = None
+_deadline_index: Optional[DeadlineIndex] = None
+_cache: Optional[TieredCache] = None
+_write_buffer: Optional[WriteBehindBuffer] = None
+_job_runner: Optional[JobRunner] = None
+_reminder_scheduler: Optional[ReminderScheduler] = None
 
 def get_database_session():
     """Dependency for database session injection."""
@@ -14,3 +36,144 @@ def get_database_session():
     finally:
         db.close()
 
+def get_priority_queue() -> Union[PriorityQueue, QueueClient]:
+    """
+    Dependency for the priority queue.
+    
+    When QUEUE_SERVICE_ADDRESS is set, every worker shares the queue hosted by
+    the queue service process; otherwise each process keeps its own queue.
+    """
+    global _priority_queue
+    if _priority_queue is None:
+        address = os.getenv("QUEUE_SERVICE_ADDRESS")
+        if address:
+            authkey = os.getenv("QUEUE_SERVICE_AUTHKEY")
+            _priority_queue = QueueClient(parse_address(address), authkey.encode() if authkey else None)
+        else:
+            _priority_queue = PriorityQueue()
+    return _priority_queue
+
+def get_queue_snapshot() -> Optional[SharedQueueSnapshot]:
+    """
+    Dependency for the shared-memory queue snapshot.
+    
+    Returns the snapshot published by the queue service under QUEUE_SNAPSHOT_NAME,
+    or None when no snapshot is configured.
+    """
+    global _queue_snapshot
+    if _queue_snapshot is None:
+        name = os.getenv("QUEUE_SNAPSHOT_NAME")
+        if name:
+            _queue_snapshot = SharedQueueSnapshot.attach(name)
+    return _queue_snapshot
+
+def get_deadline_index() -> DeadlineIndex:
+    """
+    Dependency for the deadline index of open tasks.
+    
+    Each process keeps its own, filled at startup and updated by the task
+    writes it serves; the database stays authoritative for deadline queries.
+    """
+    global _deadline_index
+    if _deadline_index is None:
+        _deadline_index = DeadlineIndex()
+    return _deadline_index
+
+def get_cache() -> TieredCache:
+    """
+    Dependency for the task read cache.
+    
+    The shared backend named by CACHE_URL, if any, behind an in-process LRU of
+    CACHE_MAX_ENTRIES entries kept for CACHE_TTL_SECONDS. The LRU is off by default
+    (CACHE_MAX_ENTRIES=0): deletes only reach the worker that made the write, so
+    turn it on only when the API runs as a single worker.
+    """
+    global _cache
+    if _cache is None:
+        _cache = TieredCache(
+            LRUCache(
+                max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "0")),
+                ttl=float(os.getenv("CACHE_TTL_SECONDS", "30")),
+            ),
+            cache_from_url(os.getenv("CACHE_URL", "")),
+        )
+    return _cache
+
+def get_write_buffer() -> Optional[WriteBehindBuffer]:
+    """
+    Dependency for the write-behind buffer.
+    
+    Enabled by WRITE_BEHIND_DIR, which holds its journal and must belong to a
+    single worker process. Returns None when write-behind is off.
+    """
+    global _write_buffer
+    if _write_buffer is None:
+        directory = os.getenv("WRITE_BEHIND_DIR")
+        if directory:
+            _write_buffer = WriteBehindBuffer(
+                directory,
+                SessionLocal,
+                interval=float(os.getenv("WRITE_BEHIND_INTERVAL_MS", "50")) / 1000,
+                max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "500")),
+            )
+    return _write_buffer
+
+def get_job_runner() -> JobRunner:
+    """
+    Dependency for the background job runner.
+    
+    JOB_WORKERS worker threads run jobs from the jobs table once the application
+    starts. Every JOB_RESCORE_INTERVAL_SECONDS (0 disables) the queue is
+    re-scored, keeping clock-dependent algorithms such as time_decay current.
+    """
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner(
+            SessionLocal,
+            queue=get_priority_queue(),
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            poll_interval=float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1")),
+        )
+        interval = float(os.getenv("JOB_RESCORE_INTERVAL_SECONDS", "300"))
+        if interval > 0:
+            _job_runner.schedule("rescore_tasks", interval, priority=SCHEDULED_RESCORE_PRIORITY)
+    return _job_runner
+
+def get_reminder_scheduler() -> Optional[ReminderScheduler]:
+    """
+    Dependency for the due date reminder scheduler.
+    
+    Enabled by REMINDERS_ENABLED. Reminders fire REMINDER_OFFSETS_MINUTES before
+    each due date to the comma-separated REMINDER_SINKS: log, webhook (POST to
+    REMINDER_WEBHOOK_URL) and feed (the queue change feed). The scheduler follows
+    this process's deadline index, so enable it in one worker only. Returns None
+    when reminders are off.
+    """
+    global _reminder_scheduler
+    if _reminder_scheduler is None and os.getenv("REMINDERS_ENABLED", "false").lower() == "true":
+        sinks = []
+        for name in os.getenv("REMINDER_SINKS", "log").split(","):
+            name = name.strip()
+            if name == "log":
+                sinks.append(LogSink())
+            elif name == "webhook":
+                sinks.append(WebhookSink(os.environ["REMINDER_WEBHOOK_URL"]))
+            elif name == "feed":
+                sinks.append(ChangeFeedSink(get_priority_queue()))
+            elif name:
+                raise ValueError(f"Unknown reminder sink: {name}")
+        _reminder_scheduler = ReminderScheduler(get_deadline_index(), sinks, reminder_offsets())
+    return _reminder_scheduler
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency guarding admin endpoints.
+    
+    Requires the X-Admin-Token header to match ADMIN_TOKEN; admin endpoints are
+    disabled entirely when ADMIN_TOKEN is not set.
+    """
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
@@ -0,0 +1,255 @@
+"""
+Rate limiting.
+Per-client token buckets by route class, plus admission control that sheds load while the server is saturated.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from fastapi.responses import JSONResponse
+from monitoring.metrics import RATE_LIMITED_REQUESTS
+
+CRUD = "crud"
+BULK = "bulk"
+ASSISTANT = "assistant"
+
+# Whole-table reads and batch operations; everything else under /api is CRUD
+BULK_ROUTES = {
+    ("GET", "/api/tasks"),
+    ("GET", "/api/queue"),
+    ("POST", "/api/tasks/prioritize"),
+    ("POST", "/api/archive/run"),
+}
+BULK_PREFIXES = ("/api/analytics/", "/api/archive")
+
+DEFAULT_LIMITS = {CRUD: "20/40", BULK: "2/10", ASSISTANT: "0.25/5"}  # Assistant: 15 a minute
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Rate limit class of a request, or None for unlimited paths (health checks, metrics, docs)."""
+    if not path.startswith("/api/"):
+        return None
+    if path.startswith("/api/assistant/"):
+        return ASSISTANT
+    if (method, path.rstrip("/")) in BULK_ROUTES or path.startswith(BULK_PREFIXES):
+        return BULK
+    return CRUD
+
+class RateLimit(NamedTuple):
+    """Sustained requests per second and burst size of one route class."""
+    rate: float
+    burst: float
+    
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse "rate/burst", e.g. "20/40"."""
+        rate, burst = value.split("/")
+        return cls(float(rate), float(burst))
+
+class TokenBucket:
+    """Tokens refilled at a steady rate up to a burst; each request takes one."""
+    
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+    
+    def refill(self, limit: RateLimit, now: float) -> float:
+        """Add the tokens earned since the last refill and return the balance."""
+        self.tokens = min(limit.burst, self.tokens + (now - self.updated) * limit.rate)
+        self.updated = now
+        return self.tokens
+    
+    def take(self, limit: RateLimit) -> float:
+        """Take a token after refill(); returns 0 on success, else seconds until one is available."""
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / limit.rate
+
+class AdmissionController:
+    """
+    Tracks how long admitted CRUD requests take to start responding and reports
+    overload once that passes a target.
+    
+    A single-task read or write does little work of its own, so its time to
+    first byte is mostly the waits in front of it: the threadpool queue, the
+    connection pool and the SQLite write lock. Bulk and assistant requests are
+    not sampled; a slow Gemini reply says nothing about saturation. It is kept
+    as an exponentially weighted moving average, which decays towards zero with
+    half_life while no samples arrive, so shedding cannot outlive the overload.
+    """
+    
+    def __init__(self, target: float = 0.25, alpha: float = 0.1, half_life: float = 2.0):
+        """
+        Initialize an unloaded controller.
+        
+        Args:
+            target: Average seconds to first byte above which load is shed
+            alpha: Weight of each new sample in the moving average
+            half_life: Seconds for the average to halve while no samples arrive
+        """
+        self.target = target
+        self.alpha = alpha
+        self.half_life = half_life
+        self._average = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds: float, now: Optional[float] = None) -> None:
+        """Record the time to first byte of an admitted CRUD request."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._average = self._decayed(now) + self.alpha * (seconds - self._decayed(now))
+            self._updated = now
+    
+    def latency(self, now: Optional[float] = None) -> float:
+        """Current moving average of the time to first byte, in seconds."""
+        with self._lock:
+            return self._decayed(time.monotonic() if now is None else now)
+    
+    def _decayed(self, now: float) -> float:
+        return self._average * 0.5 ** (max(0.0, now - self._updated) / self.half_life)
+    
+    def overloaded(self, now: Optional[float] = None) -> bool:
+        """Whether requests are currently being slowed by saturation."""
+        return self.latency(now) > self.target
+    
+    def retry_after(self, now: Optional[float] = None) -> float:
+        """Seconds a shed client should wait: longer the further past the target."""
+        return min(30.0, max(1.0, self.latency(now) / self.target))
+
+class RateLimiter:
+    """
+    Token bucket per client and route class, with adaptive admission.
+    
+    While the admission controller reports overload, bulk and assistant
+    requests are shed outright, and so are CRUD requests from clients that have
+    used more than half their burst. Clients staying inside their limits keep
+    being served, and shedding the heavy ones is what brings latency back down.
+    Buckets of the least recently seen clients are dropped beyond max_clients;
+    such a client starts again with a full bucket.
+    """
+    
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None,
+                 admission: Optional[AdmissionController] = None, max_clients: int = 10000,
+                 trust_forwarded: bool = False, enabled: bool = True):
+        """
+        Initialize a limiter.
+        
+        Args:
+            limits: RateLimit per route class (defaults to DEFAULT_LIMITS)
+            admission: Optional admission controller; None disables load shedding
+            max_clients: Clients whose buckets are kept
+            trust_forwarded: Identify clients by the first X-Forwarded-For address
+                (only behind a proxy that sets it)
+            enabled: Whether requests are checked at all
+        """
+        self.limits = limits or {name: RateLimit.parse(value) for name, value in DEFAULT_LIMITS.items()}
+        self.admission = admission
+        self.max_clients = max_clients
+        self.trust_forwarded = trust_forwarded
+        self.enabled = enabled
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build a limiter from RATE_LIMIT_ENABLED, RATE_LIMIT_CRUD, RATE_LIMIT_BULK,
+        RATE_LIMIT_ASSISTANT ("rate/burst"), RATE_LIMIT_TRUST_FORWARDED and
+        ADMISSION_LATENCY_MS (0 disables load shedding).
+        """
+        limits = {
+            name: RateLimit.parse(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+            for name, default in DEFAULT_LIMITS.items()
+        }
+        target_ms = float(os.getenv("ADMISSION_LATENCY_MS", "250"))
+        return cls(
+            limits,
+            admission=AdmissionController(target_ms / 1000) if target_ms > 0 else None,
+            trust_forwarded=os.getenv("RATE_LIMIT_TRUST_FORWARDED", "").lower() in ("1", "true"),
+            enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true"),
+        )
+    
+    def client_id(self, scope) -> str:
+        """Client address of an ASGI request."""
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    def check(self, client: str, request_class: str, now: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Admit or reject one request.
+        
+        Returns:
+            (None, 0) when admitted, else the reason ("rate" or "overload") and
+            the seconds the client should wait before retrying
+        """
+        now = time.monotonic() if now is None else now
+        limit = self.limits[request_class]
+        overloaded = self.admission is not None and self.admission.overloaded(now)
+        with self._lock:
+            key = (client, request_class)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(limit.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            tokens = bucket.refill(limit, now)
+            if overloaded and (request_class != CRUD or tokens < limit.burst / 2):
+                return "overload", self.admission.retry_after(now)
+            wait = bucket.take(limit)
+        return ("rate", wait) if wait else (None, 0.0)
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware answering over-limit requests with 429 and Retry-After
+    before they reach a threadpool thread or the database.
+    """
+    
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+        request_class = route_class(scope["method"], scope["path"])
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        reason, retry_after = self.limiter.check(self.limiter.client_id(scope), request_class)
+        if reason is not None:
+            RATE_LIMITED_REQUESTS.inc(route_class=request_class, reason=reason)
+            detail = "Rate limit exceeded" if reason == "rate" else "Server is overloaded"
+            response = JSONResponse(
+                {"detail": f"{detail}, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        
+        admission = self.limiter.admission
+        if admission is None or request_class != CRUD:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                admission.observe(time.perf_counter() - started)
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
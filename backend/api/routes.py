@@ -3,81 +3,195 @@ API route definitions.
 RESTful endpoints for task management and priority queue operations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from api.schemas import TaskCreate, TaskResponse, TaskUpdate, ChatMessage, ChatResponse, TaskActionRequest
-from api.dependencies import get_database_session
+from api.schemas import TaskCreate, TaskResponse, TaskUpdate, ChatMessage, ChatResponse, TaskActionRequest, CompletionRollupResponse, AssistantMessageRequest
+from api.dependencies import (
+    get_cache, get_database_session, get_deadline_index, get_job_runner, get_priority_queue, get_queue_snapshot,
+    get_write_buffer, require_admin,
+)
 from services.task_service import TaskService
 from services.ai_service import AIService
+from services.archive_service import ArchiveService
+from jobs.handlers import ASSISTANT_MESSAGE_PRIORITY, RESCORE_PRIORITY
+from priority_queue.algorithms import ALGORITHMS
+from priority_queue.priority_queue import PriorityQueue
+from analytics.processors import get_completion_rollups
+from monitoring.middleware import serialization_timer
+from monitoring.profiler import PROFILER, ProfiledRoute
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Seconds between queue service polls per open stream, and between keepalive comments
+CHANGE_STREAM_POLL_INTERVAL = 0.25
+CHANGE_STREAM_KEEPALIVE = 15.0
+
+# Sync versions count microseconds from here; timestamps are stored as naive UTC
+SYNC_EPOCH = datetime(1970, 1, 1)
 
 @router.get("/tasks", response_model=dict)
-def get_tasks(db: Session = Depends(get_database_session)):
+def get_tasks(db: Session = Depends(get_database_session), writer = Depends(get_write_buffer)):
     """Get all tasks."""
     try:
-        service = TaskService(db)
+        service = TaskService(db, writer=writer)
         tasks = service.get_all_tasks()
-        return {"tasks": [TaskResponse.model_validate(task).model_dump() for task in tasks]}
+        with serialization_timer():
+            return {"tasks": [TaskResponse.model_validate(task).model_dump() for task in tasks]}
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_tasks")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/tasks", response_model=TaskResponse, status_code=201)
-def create_task(task: TaskCreate, db: Session = Depends(get_database_session)):
+def create_task(task: TaskCreate, db: Session = Depends(get_database_session),
+                queue = Depends(get_priority_queue), cache = Depends(get_cache),
+                deadlines = Depends(get_deadline_index)):
     """Create a new task."""
     try:
-        service = TaskService(db)
+        service = TaskService(db, queue, cache, deadlines=deadlines)
         task_data = task.model_dump(exclude_unset=True)
         created_task = service.create_task(task_data)
         db.refresh(created_task)
         return TaskResponse.model_validate(created_task)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in create_task")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _parse_watermark(since: str) -> datetime:
+    """Parse a sync watermark: a version (microseconds since the epoch, UTC) or an ISO timestamp."""
+    if since.isdigit():
+        return SYNC_EPOCH + timedelta(microseconds=int(since))
+    watermark = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    if watermark.tzinfo is not None:
+        watermark = watermark.astimezone(timezone.utc).replace(tzinfo=None)
+    return watermark
+
+# Declared before /tasks/{task_id}, which would otherwise capture "changes", "search", "due" and "overdue" as IDs
+@router.get("/tasks/changes", response_model=dict)
+def get_task_changes(since: str = Query(..., description="Version or ISO timestamp from the last sync"),
+                     db: Session = Depends(get_database_session)):
+    """
+    Get tasks created, updated or deleted since a watermark.
+    Pass the returned version as since on the next call.
+    """
+    try:
+        watermark = _parse_watermark(since)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="since must be a version or an ISO 8601 timestamp")
+    try:
+        tasks, deleted, watermark = TaskService(db).get_changes_since(watermark)
+        with serialization_timer():
+            return {
+                "tasks": [TaskResponse.model_validate(task).model_dump() for task in tasks],
+                "deleted": deleted,
+                "version": (watermark - SYNC_EPOCH) // timedelta(microseconds=1),
+                "watermark": watermark.isoformat(),
+            }
+    except Exception as e:
+        logger.exception("Error in get_task_changes")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tasks/search", response_model=dict)
+def search_tasks(q: str = Query(..., min_length=1, max_length=500, description="Words to find in titles and descriptions"),
+                 limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0),
+                 priority_weight: float = Query(0.0, ge=0.0, le=1.0, description="Share of priority in the ranking"),
+                 completed: Optional[bool] = Query(None, description="Only completed (true) or open (false) tasks"),
+                 db: Session = Depends(get_database_session), writer = Depends(get_write_buffer)):
+    """Search task titles and descriptions, best matches first."""
+    try:
+        hits, total = TaskService(db, writer=writer).search_tasks(q, limit, offset, priority_weight, completed)
+        with serialization_timer():
+            return {
+                "tasks": [
+                    {**TaskResponse.model_validate(hit.task).model_dump(), "relevance": hit.relevance,
+                     "priority_score": hit.priority_score, "score": hit.score}
+                    for hit in hits
+                ],
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+            }
+    except Exception as e:
+        logger.exception("Error in search_tasks")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tasks/due", response_model=dict)
+def get_tasks_due(hours: float = Query(24.0, gt=0, le=24 * 366, description="Window length from now"),
+                  include_overdue: bool = Query(False, description="Also list tasks already past due"),
+                  limit: int = Query(100, ge=1, le=1000),
+                  db: Session = Depends(get_database_session), writer = Depends(get_write_buffer)):
+    """Get the open tasks due within the next hours, soonest first."""
+    try:
+        now = datetime.utcnow()
+        tasks = TaskService(db, writer=writer).get_tasks_due(
+            now + timedelta(hours=hours), None if include_overdue else now, limit
+        )
+        return {"tasks": [TaskResponse.model_validate(task).model_dump() for task in tasks], "as_of": now.isoformat()}
+    except Exception as e:
+        logger.exception("Error in get_tasks_due")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tasks/overdue", response_model=dict)
+def get_overdue_tasks(limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_database_session),
+                      writer = Depends(get_write_buffer)):
+    """Get the open tasks past their due date, most overdue first."""
+    try:
+        now = datetime.utcnow()
+        tasks = TaskService(db, writer=writer).get_overdue_tasks(now, limit)
+        return {"tasks": [TaskResponse.model_validate(task).model_dump() for task in tasks], "as_of": now.isoformat()}
+    except Exception as e:
+        logger.exception("Error in get_overdue_tasks")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_database_session)):
+def get_task(task_id: int, db: Session = Depends(get_database_session), cache = Depends(get_cache),
+             writer = Depends(get_write_buffer)):
     """Get a specific task by ID."""
     try:
-        service = TaskService(db)
-        task = service.get_task(task_id)
+        service = TaskService(db, cache=cache, writer=writer)
+        task = service.get_task_data(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         return TaskResponse.model_validate(task)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_task")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/tasks/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_database_session)):
+def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_database_session),
+                queue = Depends(get_priority_queue), cache = Depends(get_cache),
+                writer = Depends(get_write_buffer), deadlines = Depends(get_deadline_index)):
     """Update a task."""
     try:
-        service = TaskService(db)
+        service = TaskService(db, queue, cache, writer, deadlines)
         task_data = task_update.model_dump(exclude_unset=True)
         updated_task = service.update_task(task_id, task_data)
         if not updated_task:
             raise HTTPException(status_code=404, detail="Task not found")
-        db.refresh(updated_task)
         return TaskResponse.model_validate(updated_task)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in update_task")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/tasks/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_database_session)):
+def delete_task(task_id: int, db: Session = Depends(get_database_session),
+                queue = Depends(get_priority_queue), cache = Depends(get_cache),
+                writer = Depends(get_write_buffer), deadlines = Depends(get_deadline_index)):
     """Delete a task."""
     try:
-        service = TaskService(db)
+        service = TaskService(db, queue, cache, writer, deadlines)
         success = service.delete_task(task_id)
         if not success:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -85,34 +199,253 @@ def delete_task(task_id: int, db: Session = Depends(get_database_session)):
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in delete_task")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.patch("/tasks/{task_id}/complete", response_model=TaskResponse)
-def toggle_task_complete(task_id: int, db: Session = Depends(get_database_session)):
+def toggle_task_complete(task_id: int, db: Session = Depends(get_database_session),
+                         queue = Depends(get_priority_queue), cache = Depends(get_cache),
+                         writer = Depends(get_write_buffer), deadlines = Depends(get_deadline_index)):
     """Toggle task completion status."""
     try:
-        service = TaskService(db)
-        task = service.get_task(task_id)
+        service = TaskService(db, queue, cache, writer, deadlines)
+        task = service.toggle_task_complete(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        
-        task.completed = not task.completed
-        db.commit()
-        db.refresh(task)
         return TaskResponse.model_validate(task)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in toggle_task_complete")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/tasks/prioritize", response_model=dict, status_code=202)
+def prioritize_tasks(algorithm: Optional[str] = Query(None, description="Algorithm (defaults to the queue's)"),
+                     runner = Depends(get_job_runner)):
+    """
+    Re-score every open task in the priority queue, as a background job.
+    Repeated requests while one is pending return the pending job.
+    """
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm '{algorithm}'")
+    try:
+        return runner.enqueue("rescore_tasks", {"algorithm": algorithm}, priority=RESCORE_PRIORITY,
+                              dedup_key=f"rescore:{algorithm or 'queue'}")
+    except Exception as e:
+        logger.exception("Error in prioritize_tasks")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}", response_model=dict)
+def get_job(job_id: int, runner = Depends(get_job_runner)):
+    """Get a background job's status and, once it succeeded, its result."""
+    job = runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/queue", response_model=dict)
+def get_queue_state(queue = Depends(get_priority_queue)):
+    """Get a snapshot of the shared priority queue."""
+    try:
+        return queue.get_snapshot()
+    except Exception as e:
+        logger.exception("Error in get_queue_state")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/tasks/prioritize")
-def prioritize_tasks():
-    """Reprioritize all tasks using the priority queue engine."""
-    return {"message": "Prioritization not yet implemented"}
+@router.get("/queue/top", response_model=dict)
+def get_queue_top(k: int = Query(10, ge=1, le=10000), snapshot = Depends(get_queue_snapshot),
+                  queue = Depends(get_priority_queue)):
+    """Get the top k ranked tasks, from shared memory when the queue service publishes it."""
+    try:
+        if snapshot is not None:
+            ranking = snapshot.read(k)
+            return {
+                "version": ranking["version"],
+                "queue_size": ranking["queue_size"],
+                "tasks": [{"id": task_id, "priority": score} for task_id, score in ranking["entries"]],
+            }
+        state = queue.get_snapshot()
+        return {
+            "version": None,
+            "queue_size": state["queue_size"],
+            "tasks": [{"id": t["id"], "priority": t["priority"]} for t in state["tasks"][:k]],
+        }
+    except Exception as e:
+        logger.exception("Error in get_queue_top")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/queue/changes", response_model=dict)
+def get_queue_changes(since: Optional[int] = Query(None, ge=0), queue = Depends(get_priority_queue)):
+    """
+    Get queue changes after version since.
+    Without since, returns just the current version to start following from.
+    """
+    try:
+        return queue.get_changes(since)
+    except Exception as e:
+        logger.exception("Error in get_queue_changes")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _change_stream(request: Request, queue, since: Optional[int]):
+    """
+    Server-sent events for queue changes after since.
+    
+    Each event carries its version as the SSE id, so a reconnecting EventSource
+    resumes through Last-Event-ID. A "reset" event tells the client its version
+    is no longer covered and it has to refetch the task list.
+    
+    An in-process queue wakes the stream from its change log; the queue service
+    cannot, so it is polled every CHANGE_STREAM_POLL_INTERVAL seconds.
+    """
+    local = isinstance(queue, PriorityQueue)
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    
+    def on_change(version: int) -> None:
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # The event loop has closed
+    
+    async def get_changes(version: Optional[int] = None) -> dict:
+        if local:
+            return queue.get_changes(version)
+        return await run_in_threadpool(queue.get_changes, version)
+    
+    if local:
+        queue.changes.listeners.append(on_change)
+    try:
+        if since is None:
+            since = (await get_changes())["version"]
+            yield f"event: version\ndata: {json.dumps({'version': since})}\n\n"
+        timeout = CHANGE_STREAM_KEEPALIVE if local else CHANGE_STREAM_POLL_INTERVAL
+        idle = 0.0
+        while not await request.is_disconnected():
+            # Cleared before reading, so a change recorded from here on wakes the next wait
+            wake.clear()
+            changes = await get_changes(since)
+            if changes["reset"]:
+                since = changes["version"]
+                yield f"id: {since}\nevent: reset\ndata: {json.dumps({'version': since})}\n\n"
+            for event in changes["events"]:
+                yield f"id: {event['version']}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n"
+            if changes["events"] or changes["reset"]:
+                since = changes["version"]
+                idle = 0.0
+                continue
+            if idle >= CHANGE_STREAM_KEEPALIVE:
+                yield ": keepalive\n\n"
+                idle = 0.0
+            started = loop.time()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            idle += loop.time() - started
+    finally:
+        if local:
+            queue.changes.listeners.remove(on_change)
+
+@router.get("/queue/changes/stream")
+async def stream_queue_changes(request: Request, since: Optional[int] = Query(None, ge=0),
+                               last_event_id: Optional[int] = Header(None),
+                               queue = Depends(get_priority_queue)):
+    """Stream queue changes as server-sent events, resuming from since or Last-Event-ID."""
+    return StreamingResponse(
+        _change_stream(request, queue, since if since is not None else last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/analytics/completions", response_model=List[CompletionRollupResponse])
+def get_completion_analytics(granularity: str = Query("day", pattern="^(hour|day|week)$"),
+                             start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             db: Session = Depends(get_database_session)):
+    """Get task completion counts per hour, day or week from the pre-aggregated rollups."""
+    try:
+        return get_completion_rollups(db, granularity, start, end)
+    except Exception as e:
+        logger.exception("Error in get_completion_analytics")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/archive/run", response_model=dict)
+def run_archive(older_than_days: int = Query(30, ge=0), db: Session = Depends(get_database_session),
+                queue = Depends(get_priority_queue), cache = Depends(get_cache)):
+    """Archive tasks completed more than older_than_days ago."""
+    try:
+        archived = ArchiveService(db).archive_completed(older_than_days, queue=queue, cache=cache)
+        return {"archived": archived}
+    except Exception as e:
+        logger.exception("Error in run_archive")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/archive", response_model=dict)
+def list_archive_partitions(db: Session = Depends(get_database_session)):
+    """List archive partitions (YYYY-MM), newest first."""
+    return {"partitions": ArchiveService(db).list_partitions()}
+
+@router.get("/archive/tasks/{task_id}", response_model=dict)
+def get_archived_task(task_id: int, db: Session = Depends(get_database_session)):
+    """Get an archived task with its completion history."""
+    task = ArchiveService(db).get_archived_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    return task
+
+@router.get("/archive/{month}", response_model=dict)
+def get_archived_tasks(month: str, limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0),
+                       db: Session = Depends(get_database_session)):
+    """Get archived tasks completed in a month (YYYY-MM)."""
+    return {"month": month, "tasks": ArchiveService(db).get_archived_tasks(month, limit, offset)}
+
+@router.get("/admin/profiler", response_model=dict, dependencies=[Depends(require_admin)])
+def get_profiler_status():
+    """Get the slow request profiler's settings."""
+    return PROFILER.status()
+
+@router.post("/admin/profiler/start", response_model=dict, dependencies=[Depends(require_admin)])
+def start_profiler(threshold_ms: Optional[float] = Query(None, ge=0), interval_ms: Optional[float] = Query(None, gt=0)):
+    """Start sampling; requests slower than threshold_ms are captured."""
+    PROFILER.start(
+        interval=interval_ms / 1000 if interval_ms is not None else None,
+        threshold=threshold_ms / 1000 if threshold_ms is not None else None,
+    )
+    return PROFILER.status()
+
+@router.post("/admin/profiler/stop", response_model=dict, dependencies=[Depends(require_admin)])
+def stop_profiler():
+    """Stop sampling. Captures are kept until cleared."""
+    PROFILER.stop()
+    return PROFILER.status()
+
+@router.get("/admin/profiler/captures", dependencies=[Depends(require_admin)])
+def download_profiler_captures(format: str = Query("json", pattern="^(json|collapsed)$")):
+    """
+    Download captured slow requests.
+    json: full captures; collapsed: merged stack samples for flame graph tools.
+    """
+    captures = PROFILER.captures()
+    if format == "collapsed":
+        merged = {}
+        for capture in captures:
+            for stack, count in capture["profile"].items():
+                merged[stack] = merged.get(stack, 0) + count
+        body = "".join(f"{stack} {count}\n" for stack, count in merged.items())
+        filename = "slow-requests.folded"
+    else:
+        body = json.dumps(captures, indent=2)
+        filename = "slow-requests.json"
+    return Response(
+        body,
+        media_type="text/plain" if format == "collapsed" else "application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.delete("/admin/profiler/captures", response_model=dict, dependencies=[Depends(require_admin)])
+def clear_profiler_captures():
+    """Drop captured slow requests."""
+    PROFILER.clear()
+    return PROFILER.status()
 
 @router.post("/assistant/chat", response_model=ChatResponse)
 def chat_with_assistant(chat_msg: ChatMessage, db: Session = Depends(get_database_session)):
@@ -129,18 +462,24 @@ def chat_with_assistant(chat_msg: ChatMessage, db: Session = Depends(get_databas
         return ChatResponse(response=response_text)
     except ValueError as e:
         # API key not configured
-        import traceback
-        traceback.print_exc()
+        logger.warning("AI assistant is not configured: %s", e)
         raise HTTPException(status_code=500, detail="AI assistant is not configured. Please add GEMINI_API_KEY to your .env file and restart the server.")
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in chat endpoint:\n{error_trace}")
+        logger.exception("Error in chat endpoint")
         # Return the error message from the AI service (which already handles it)
         # If it's a different error, provide details
         error_msg = str(e)
         raise HTTPException(status_code=500, detail=f"Error: {error_msg}")
 
+@router.post("/assistant/messages", response_model=dict, status_code=202)
+def queue_assistant_message(request: AssistantMessageRequest, runner = Depends(get_job_runner)):
+    """Generate a task created/completed message as a background job; poll /jobs/{id} for the response."""
+    try:
+        return runner.enqueue("assistant_message", request.model_dump(), priority=ASSISTANT_MESSAGE_PRIORITY)
+    except Exception as e:
+        logger.exception("Error in queue_assistant_message")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/assistant/on-task-created", response_model=ChatResponse)
 def on_task_created(request: TaskActionRequest = TaskActionRequest(task_title=None), db: Session = Depends(get_database_session)):
     """Get an encouraging message when a task is created."""
@@ -152,43 +491,23 @@ def on_task_created(request: TaskActionRequest = TaskActionRequest(task_title=No
         # API key not configured - return default message
         return ChatResponse(response="Great! You're making progress.")
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in on_task_created")
         # Return default message on error
         return ChatResponse(response="Great! Keep up the good work!")
 
 @router.post("/assistant/on-task-completed", response_model=ChatResponse)
 def on_task_completed(request: TaskActionRequest = TaskActionRequest(task_title=None), db: Session = Depends(get_database_session)):
     """Get a congratulatory message when a task is completed."""
+    task_title = request.task_title
     try:
         ai_service = AIService()
-        task_title = request.task_title
-        # Use a different prompt for completion
-        if task_title:
-            prompt = f"""Generate a short, congratulatory message for someone who just completed a task called '{task_title}'. 
-Tone: Lighthearted, happy, encouraging.
-Length: Short and to the point (1-2 sentences max).
-Format: No emojis. Use exclamation points after each sentence (unless the sentence is a question).
-Style: Encouraging.
-Content: 100% focused on the task '{task_title}'. Nothing else should be mentioned.
-Example: "Woohoo! {task_title} is complete! Well done!" """
-        else:
-            prompt = """Generate a short, congratulatory message for someone who just completed a task. 
-Tone: Lighthearted, happy, encouraging.
-Length: Short and to the point (1-2 sentences max).
-Format: No emojis. Use exclamation points after each sentence (unless the sentence is a question).
-Style: Encouraging.
-Content: 100% focused on the task. Nothing else should be mentioned."""
-        
-        response = ai_service.model.generate_content(prompt)
-        response_text = response.text.strip() if response and response.text else f"Woohoo! {task_title if task_title else 'Your task'} is complete! Well done!"
+        response_text = ai_service.get_completion_message(task_title)
         return ChatResponse(response=response_text)
     except ValueError as e:
         # API key not configured - return default message
         return ChatResponse(response=f"Woohoo! {task_title if task_title else 'Your task'} is complete! Well done!")
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in on_task_completed")
         # Return default message on error
         return ChatResponse(response=f"Woohoo! {task_title if task_title else 'Your task'} is complete! Well done!")
 
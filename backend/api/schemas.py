@@ -80,6 +80,12 @@ class TaskWithHistory(TaskResponse):
     class Config:
         from_attributes = True
 
+class CompletionRollupResponse(BaseModel):
+    """Schema for one bucket of completion analytics."""
+    bucket_start: datetime
+    completed_count: int
+    mean_completion_hours: float = Field(..., description="Mean time from creation to completion")
+
 class ChatMessage(BaseModel):
     """Schema for chat message."""
     message: str = Field(..., min_length=1, max_length=1000, description="User message to the AI assistant")
@@ -92,3 +98,8 @@ class TaskActionRequest(BaseModel):
     """Schema for task action requests (create/complete)."""
     task_title: Optional[str] = Field(None, description="Title of the task")
 
+
+class AssistantMessageRequest(BaseModel):
+    """Schema for queueing an assistant message as a background job."""
+    kind: str = Field(..., pattern="^(task_created|task_completed)$", description="Event the message is for")
+    task_title: Optional[str] = Field(None, description="Title of the task")
@@ -0,0 +1,4 @@
+"""
+Benchmarks module.
+pytest-benchmark suite for the queue, algorithms, services and API.
+"""
@@ -0,0 +1,48 @@
+"""
+Shared benchmark fixtures.
+Task populations at the configured sizes plus the test database fixtures.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from analytics.evaluation import sample_task_fields
+from models.task import Task
+from tests.conftest import api_client, db_engine, db_session  # noqa: F401
+
+pytest.importorskip("pytest_benchmark")
+
+# Population sizes; add 1000000 for the full 1k-1M sweep (needs a few GB of memory)
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,100000").split(",")]
+NOW = datetime(2025, 6, 1)
+
+def make_tasks(n: int, seed: int = 0) -> List[Task]:
+    """Build n transient tasks with the synthetic workload's field distributions."""
+    rng = random.Random(seed)
+    tasks = []
+    for task_id in range(1, n + 1):
+        created = NOW - timedelta(hours=rng.randint(0, 24 * 30))
+        tasks.append(Task(id=task_id, title=f"Task {task_id}", created_at=created, completed=False,
+                          **sample_task_fields(rng, created)))
+    return tasks
+
+_populations = {}
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"n={n}")
+def tasks(request):
+    """
+    Tasks with random priority scores, cached per size across the session.
+    
+    Scores are reset on every use: algorithm benchmarks overwrite them, and
+    queue benchmarks must not depend on which algorithm ran last.
+    """
+    n = request.param
+    if n not in _populations:
+        _populations[n] = make_tasks(n)
+    population = _populations[n]
+    rng = random.Random(n)
+    for task in population:
+        task.priority_score = rng.uniform(0, 100)
+    return population
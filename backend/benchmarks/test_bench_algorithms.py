@@ -0,0 +1,45 @@
+"""
+Algorithm benchmarks.
+Scoring every task with each priority algorithm, in-process and across a process pool.
+"""
+
+import math
+import os
+import pytest
+from ml.models import FEATURE_NAMES, LogisticPriorityModel
+from priority_queue.algorithms import ALGORITHMS, LearnedPriorityAlgorithm, PriorityAlgorithm
+from priority_queue.parallel import score_tasks, shutdown_pool
+
+class SimulatedCostlyAlgorithm(PriorityAlgorithm):
+    """Stand-in for a custom algorithm that cannot be vectorized: ~10us of Python per task."""
+    
+    parallel_scoring = True
+    
+    @staticmethod
+    def calculate_priority(task, now=None) -> float:
+        score, difficulty = float(task.urgency), task.difficulty
+        for step in range(1, 100):
+            score = math.fmod(score * 1.0001 + difficulty / step, 100.0)
+        return score
+
+@pytest.fixture
+def learned_model(monkeypatch):
+    """Fixed model so the learned algorithm is measured on NumPy inference, not the fallback."""
+    model = LogisticPriorityModel([0.8, -0.2, 0.3, -0.5, 0.1], -0.4, [3.0] * len(FEATURE_NAMES),
+                                  [1.0] * len(FEATURE_NAMES))
+    monkeypatch.setattr(LearnedPriorityAlgorithm, "model", model)
+    monkeypatch.setattr(LearnedPriorityAlgorithm, "_model_checked", True)
+
+@pytest.mark.parametrize("name", list(ALGORITHMS))
+def test_algorithm_scoring(benchmark, tasks, name, learned_model):
+    """Score every task."""
+    benchmark(ALGORITHMS[name].apply_to_tasks, tasks)
+
+@pytest.mark.parametrize("workers", sorted({1, 2, os.cpu_count() or 1}), ids=lambda n: f"workers={n}")
+def test_parallel_scoring(benchmark, tasks, workers):
+    """Score every task with a costly pure-Python algorithm in 10k-task chunks (workers=1 is in-process)."""
+    score_tasks(SimulatedCostlyAlgorithm, tasks, workers=workers, chunk_size=10000)  # Start the pool outside the timing
+    try:
+        benchmark(score_tasks, SimulatedCostlyAlgorithm, tasks, workers=workers, chunk_size=10000)
+    finally:
+        shutdown_pool()
@@ -0,0 +1,152 @@
+"""
+Queue benchmarks.
+PriorityQueue and PriorityQueueEngine operations at each population size.
+"""
+
+import random
+import pytest
+from datetime import timedelta
+from benchmarks.conftest import NOW
+from notifications import ReminderScheduler
+from priority_queue.deadlines import DeadlineIndex
+from priority_queue.engine import PriorityQueueEngine
+from priority_queue.heaps import HEAP_BACKENDS
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
+
+OPS = 1000  # operations per round for the per-operation benchmarks
+
+@pytest.fixture(params=sorted(HEAP_BACKENDS))
+def heap(request):
+    """Each heap backend in turn."""
+    return request.param
+
+def loaded_queue(tasks, heap="binary"):
+    queue = PriorityQueue(heap=heap)
+    queue.bulk_load([QueueEntry.from_task(task) for task in tasks])
+    return queue
+
+def test_queue_push(benchmark, tasks, heap):
+    """Push every task into an empty queue."""
+    entries = [QueueEntry.from_task(task) for task in tasks]
+    
+    def push_all(queue):
+        for entry in entries:
+            queue.push(entry)
+    
+    benchmark.pedantic(push_all, setup=lambda: ((PriorityQueue(heap=heap),), {}), rounds=3)
+
+def test_queue_bulk_load(benchmark, tasks, heap):
+    """Heapify every task at once."""
+    entries = [QueueEntry.from_task(task) for task in tasks]
+    benchmark.pedantic(lambda queue: queue.bulk_load(entries), setup=lambda: ((PriorityQueue(heap=heap),), {}), rounds=3)
+
+def test_queue_pop(benchmark, tasks, heap):
+    """Pop OPS entries."""
+    def pop_many(queue):
+        for _ in range(OPS):
+            queue.pop()
+    
+    benchmark.pedantic(pop_many, setup=lambda: ((loaded_queue(tasks, heap),), {}), rounds=5)
+
+def test_queue_update_priority(benchmark, tasks, heap):
+    """Reprioritize OPS random entries."""
+    rng = random.Random(0)
+    updates = [(rng.randint(1, len(tasks)), rng.uniform(0, 100)) for _ in range(OPS)]
+    queue = loaded_queue(tasks, heap)
+    
+    def update_many():
+        for task_id, score in updates:
+            queue.update_priority(task_id, score)
+    
+    benchmark(update_many)
+
+def test_queue_delete(benchmark, tasks, heap):
+    """Delete OPS random entries."""
+    task_ids = random.Random(0).sample(range(1, len(tasks) + 1), min(OPS, len(tasks)))
+    
+    def delete_many(queue):
+        for task_id in task_ids:
+            queue.delete(task_id)
+    
+    benchmark.pedantic(delete_many, setup=lambda: ((loaded_queue(tasks, heap),), {}), rounds=5)
+
+def test_queue_workload_mix(benchmark, tasks, heap):
+    """OPS operations in the service's mix: mostly rescoring, some creates and completions, few pops."""
+    rng = random.Random(0)
+    operations = []
+    next_id = len(tasks) + 1
+    for _ in range(OPS):
+        roll = rng.random()
+        if roll < 0.5:
+            # Rescoring drifts a task a little, mostly towards the front
+            task = tasks[rng.randrange(len(tasks))]
+            operations.append(("update", task.id, max(0.0, task.priority_score + rng.uniform(-2.0, 0.5))))
+        elif roll < 0.8:
+            operations.append(("update", rng.randint(1, len(tasks)), rng.uniform(0, 100)))
+        elif roll < 0.9:
+            operations.append(("push", next_id, rng.uniform(0, 100)))
+            next_id += 1
+        elif roll < 0.97:
+            operations.append(("delete", rng.randint(1, len(tasks)), None))
+        else:
+            operations.append(("pop", None, None))
+    
+    def run(queue):
+        for operation, task_id, value in operations:
+            if operation == "update":
+                queue.update_priority(task_id, value)
+            elif operation == "push":
+                queue.push(QueueEntry(value, task_id))
+            elif operation == "delete":
+                queue.delete(task_id, completed=True)
+            else:
+                queue.pop()
+    
+    benchmark.pedantic(run, setup=lambda: ((loaded_queue(tasks, heap),), {}), rounds=5)
+
+def test_engine_reprioritize_all(benchmark, tasks):
+    """Rebuild the engine queue from every task."""
+    engine = PriorityQueueEngine()
+    benchmark(engine.reprioritize_all, tasks)
+
+def test_engine_add_and_pop(benchmark, tasks):
+    """Add then pop 100 tasks on a loaded engine (each op re-sorts or shifts the list)."""
+    extra = tasks[:100]
+    
+    def add_and_pop(engine):
+        for task in extra:
+            engine.add_task(task)
+        for _ in extra:
+            engine.pop_next_task()
+    
+    def setup():
+        engine = PriorityQueueEngine()
+        engine.reprioritize_all(tasks)
+        return (engine,), {}
+    
+    benchmark.pedantic(add_and_pop, setup=setup, rounds=3)
+
+def reminder_scheduler(tasks):
+    deadlines = DeadlineIndex()
+    deadlines.bulk_load(sorted((task.due_date, task.id) for task in tasks if task.due_date))
+    scheduler = ReminderScheduler(deadlines, [], clock=lambda: NOW - timedelta(days=365))
+    deadlines.listeners.append(scheduler.on_deadline)
+    return scheduler
+
+def test_reminder_reload(benchmark, tasks):
+    """Build the reminder timer heap from the deadline index."""
+    scheduler = reminder_scheduler(tasks)
+    benchmark(scheduler.reload)
+
+def test_reminder_due_date_edits(benchmark, tasks):
+    """Move OPS random due dates, rescheduling their reminders."""
+    rng = random.Random(0)
+    edits = [(rng.randint(1, len(tasks)), NOW + timedelta(minutes=rng.randint(0, 60 * 24 * 30))) for _ in range(OPS)]
+    scheduler = reminder_scheduler(tasks)
+    scheduler.reload()
+    
+    def edit_many():
+        for task_id, due_date in edits:
+            scheduler.deadlines.set(task_id, due_date)
+    
+    benchmark(edit_many)
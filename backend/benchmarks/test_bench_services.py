@@ -0,0 +1,66 @@
+"""
+Service and API benchmarks.
+TaskService CRUD on SQLite and /api/tasks throughput through TestClient.
+"""
+
+import itertools
+import pytest
+from benchmarks.conftest import make_tasks
+from services.task_service import TaskService
+
+ROWS = 1000  # rows in the table while measuring
+
+@pytest.fixture
+def populated_session(db_session):
+    """Session on a database holding ROWS tasks."""
+    db_session.bulk_save_objects(make_tasks(ROWS))
+    db_session.commit()
+    return db_session
+
+def test_service_create(benchmark, db_session):
+    """Create one task."""
+    service = TaskService(db_session)
+    benchmark(service.create_task, {"title": "Benchmark task", "urgency": 4, "difficulty": 2})
+
+def test_service_get(benchmark, populated_session):
+    """Fetch one task by ID."""
+    service = TaskService(populated_session)
+    ids = itertools.cycle(range(1, ROWS + 1))
+    benchmark(lambda: service.get_task(next(ids)))
+
+def test_service_get_all(benchmark, populated_session):
+    """Fetch every task."""
+    service = TaskService(populated_session)
+    benchmark(service.get_all_tasks)
+
+def test_service_update(benchmark, populated_session):
+    """Update one task."""
+    service = TaskService(populated_session)
+    ids = itertools.cycle(range(1, ROWS + 1))
+    benchmark(lambda: service.update_task(next(ids), {"urgency": 5}))
+
+def test_service_delete(benchmark, populated_session):
+    """Delete one task."""
+    service = TaskService(populated_session)
+    ids = iter(range(1, ROWS + 1))
+    benchmark.pedantic(lambda: service.delete_task(next(ids)), rounds=200)
+
+def test_service_search(benchmark, populated_session):
+    """Full-text search for one word every task has and one that picks out a single task."""
+    service = TaskService(populated_session)
+    hits, total = benchmark(service.search_tasks, "task 500")
+    assert total == 1
+
+def test_api_create(benchmark, api_client):
+    """POST /api/tasks."""
+    benchmark(api_client.post, "/api/tasks", json={"title": "Benchmark task", "urgency": 4})
+
+def test_api_get(benchmark, api_client, populated_session):
+    """GET /api/tasks/{id}."""
+    ids = itertools.cycle(range(1, ROWS + 1))
+    benchmark(lambda: api_client.get(f"/api/tasks/{next(ids)}"))
+
+def test_api_list(benchmark, api_client, populated_session):
+    """GET /api/tasks with ROWS tasks."""
+    response = benchmark(api_client.get, "/api/tasks")
+    assert len(response.json()["tasks"]) == ROWS
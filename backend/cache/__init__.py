@@ -0,0 +1,9 @@
+"""
+Cache module.
+Two-level read cache: an in-process LRU in front of an optional shared backend.
+"""
+
+from cache.backends import CacheBackend, LRUCache, RedisCache, cache_from_url
+from cache.tiered import TieredCache
+
+__all__ = ["CacheBackend", "LRUCache", "RedisCache", "TieredCache", "cache_from_url"]
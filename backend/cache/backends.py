@@ -0,0 +1,203 @@
+"""
+Cache backends.
+In-process LRU with TTL, and a Redis backend for sharing cached values across workers.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Returned by get() on a miss, since None is a cacheable value
+MISSING = object()
+
+class CacheBackend:
+    """
+    Base class for cache backends.
+    Values must be JSON-serializable so every backend can store them.
+    
+    Every delete bumps a version that loads read before going to the source of
+    truth and pass to set_if_version(), so a load that overlapped a delete made by
+    any worker cannot store its older value afterwards.
+    """
+    
+    def get(self, key: str) -> Any:
+        """Get a value, or MISSING."""
+        raise NotImplementedError("Subclasses must implement get")
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a value."""
+        raise NotImplementedError("Subclasses must implement set")
+    
+    def delete(self, key: str) -> None:
+        """Drop a value if present and bump the key's version."""
+        raise NotImplementedError("Subclasses must implement delete")
+    
+    def version(self, key: str) -> int:
+        """Current version of a key, for a later set_if_version()."""
+        raise NotImplementedError("Subclasses must implement version")
+    
+    def set_if_version(self, key: str, value: Any, version: int) -> bool:
+        """Store a value unless the key was deleted since version() returned version."""
+        raise NotImplementedError("Subclasses must implement set_if_version")
+    
+    def clear(self) -> None:
+        """Drop every value."""
+        raise NotImplementedError("Subclasses must implement clear")
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+    Expired entries are dropped when read; the size bound evicts the least recently used.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Maximum number of entries kept
+            ttl: Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._version = 0  # One counter for every key: bumped by any delete
+    
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._set(key, value)
+    
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._version += 1
+    
+    def version(self, key: str) -> int:
+        return self._version
+    
+    def set_if_version(self, key: str, value: Any, version: int) -> bool:
+        with self._lock:
+            if self._version != version:
+                return False
+            self._set(key, value)
+            return True
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+# KEYS: value key, version key; ARGV: JSON value, expected version, expiry in ms
+SET_IF_VERSION_SCRIPT = """
+if (tonumber(redis.call('GET', KEYS[2])) or 0) ~= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+return 1
+"""
+
+# KEYS: value key, version key; ARGV: expiry in ms
+DELETE_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('PEXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+class RedisCache(CacheBackend):
+    """
+    Redis-backed cache shared by every worker, storing values as JSON with an expiry.
+    Versions live in a companion key per value, kept for as long as a value would be;
+    the compare-and-set and the delete run as Lua scripts so they are atomic.
+    Requires the optional redis package.
+    """
+    
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = "priorityforge:", client=None):
+        """
+        Connect to Redis.
+        
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0
+            ttl: Seconds an entry stays valid
+            prefix: Key prefix, so the database can be shared with other applications
+            client: Optional ready-made client (anything with get/set/delete/eval/scan_iter)
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("CACHE_URL points at Redis but the redis package is not installed") from e
+            client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return MISSING if raw is None else json.loads(raw)
+    
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+    
+    def delete(self, key: str) -> None:
+        self.client.eval(DELETE_SCRIPT, 2, self.prefix + key, self._version_key(key), int(self.ttl * 1000))
+    
+    def version(self, key: str) -> int:
+        return int(self.client.get(self._version_key(key)) or 0)
+    
+    def set_if_version(self, key: str, value: Any, version: int) -> bool:
+        return bool(self.client.eval(SET_IF_VERSION_SCRIPT, 2, self.prefix + key, self._version_key(key),
+                                     json.dumps(value), version, int(self.ttl * 1000)))
+    
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+    
+    def _version_key(self, key: str) -> str:
+        return f"{self.prefix}version:{key}"
+
+def cache_from_url(url: str) -> Optional[CacheBackend]:
+    """
+    Build the shared cache backend named by CACHE_URL.
+    
+    Args:
+        url: redis://host:port/db for Redis, or memory://?max_entries=&ttl= for an
+            in-process stand-in (development and tests); empty for none
+    
+    Returns:
+        The backend, or None when url is empty
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    options = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+    ttl = float(options.pop("ttl", 300))
+    if parsed.scheme == "memory":
+        return LRUCache(max_entries=int(options.pop("max_entries", 100000)), ttl=ttl)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisCache(url.split("?", 1)[0], ttl=ttl)
+    raise ValueError(f"Unsupported cache URL scheme '{parsed.scheme}'")
@@ -0,0 +1,168 @@
+"""
+Tiered cache.
+Reads through an in-process LRU and an optional shared backend, coalescing concurrent loads.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+from cache.backends import MISSING, CacheBackend, LRUCache
+from monitoring.metrics import CACHE_COALESCED_LOADS, CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """A load in progress that other readers of the same key wait for."""
+    
+    __slots__ = ("done", "value", "failed")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+class TieredCache:
+    """
+    Two-level read cache.
+    
+    Lookups try the in-process LRU (l1), then the shared backend (l2, e.g. Redis)
+    and finally the loader, filling the levels on the way back. Concurrent misses
+    for one key run the loader once and share its result (stampede protection).
+    Writers keep the levels current through set() and delete(); a load that
+    overlaps a write is returned but not cached, so it cannot overwrite the newer
+    value. In the shared backend that holds for writes made by other workers too:
+    loads are stored with set_if_version(). Deletes do not reach other workers'
+    in-process LRUs, so run with several workers only with the LRU off (see
+    api.dependencies.get_cache). Shared backend errors are logged and treated as misses.
+    """
+    
+    def __init__(self, l1: Optional[LRUCache] = None, l2: Optional[CacheBackend] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            l1: In-process cache (a default LRUCache when omitted)
+            l2: Optional shared backend
+        """
+        self.l1 = l1 if l1 is not None else LRUCache()
+        self.l2 = l2
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+    
+    def get(self, key: str) -> Any:
+        """Get a value from the first level holding it, or MISSING."""
+        value = self.l1.get(key)
+        if value is not MISSING:
+            CACHE_LOOKUPS.inc(level="l1", result="hit")
+            return value
+        CACHE_LOOKUPS.inc(level="l1", result="miss")
+        if self.l2 is None:
+            return MISSING
+        try:
+            value = self.l2.get(key)
+        except Exception:
+            logger.warning("Shared cache read failed for %s", key, exc_info=True)
+            return MISSING
+        CACHE_LOOKUPS.inc(level="l2", result="miss" if value is MISSING else "hit")
+        if value is not MISSING:
+            self.l1.set(key, value)
+        return value
+    
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, running loader on a miss. None results are not cached.
+        
+        Args:
+            key: Cache key
+            loader: Callable producing the value from the source of truth
+        
+        Returns:
+            The cached or loaded value
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            writes = self._writes
+        
+        if not leader:
+            CACHE_COALESCED_LOADS.inc()
+            flight.done.wait()
+            return loader() if flight.failed else flight.value
+        
+        try:
+            version = self._shared_version(key)
+            value = loader()
+            flight.value = value
+            if value is not None:
+                with self._lock:
+                    stale = self._writes != writes
+                if not stale:
+                    self.l1.set(key, value)
+                    self._store_shared(key, value, version)
+            return value
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+    
+    def set(self, key: str, value: Any) -> None:
+        """Write a value through every level."""
+        with self._lock:
+            self._writes += 1
+        self._store(key, value)
+    
+    def delete(self, key: str) -> None:
+        """Drop a value from every level."""
+        with self._lock:
+            self._writes += 1
+        self.l1.delete(key)
+        if self.l2 is not None:
+            try:
+                self.l2.delete(key)
+            except Exception:
+                logger.warning("Shared cache delete failed for %s", key, exc_info=True)
+    
+    def clear(self) -> None:
+        """Drop every value from every level."""
+        with self._lock:
+            self._writes += 1
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+    
+    def _store(self, key: str, value: Any) -> None:
+        self.l1.set(key, value)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, value)
+            except Exception:
+                logger.warning("Shared cache write failed for %s", key, exc_info=True)
+    
+    def _shared_version(self, key: str) -> Optional[int]:
+        """The shared backend's version of a key before a load, or None to skip storing the load there."""
+        if self.l2 is None:
+            return None
+        try:
+            return self.l2.version(key)
+        except Exception:
+            logger.warning("Shared cache read failed for %s", key, exc_info=True)
+            return None
+    
+    def _store_shared(self, key: str, value: Any, version: Optional[int]) -> None:
+        """Store a loaded value in the shared backend unless a delete overlapped the load."""
+        if version is None:
+            return
+        try:
+            self.l2.set_if_version(key, value, version)
+        except Exception:
+            logger.warning("Shared cache write failed for %s", key, exc_info=True)
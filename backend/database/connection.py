@@ -5,8 +5,13 @@ SQLAlchemy engine setup and connection string management.
 
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from database.migrations import MigrationRunner, TableRebuild
+from database.search import ensure_search_index
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # SQLite database path
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./priority_forge.db")
 
@@ -19,76 +24,113 @@ engine = create_engine(
 # Base class for declarative models
 Base = declarative_base()
 
+# Bump whenever models or migrate_schema change, so existing databases get upgraded
+SCHEMA_VERSION = 6
+
 def init_db():
-    """Initialize database tables."""
-    from models import task, task_history  # Import all models
+    """
+    Initialize database tables.
+    
+    Skips create_all and schema inspection entirely when the database already
+    records the current SCHEMA_VERSION, so a warm boot costs a single read.
+    """
+    if get_schema_version() == SCHEMA_VERSION:
+        return
+    from models import task, task_history, completion_rollup, task_tombstone, job  # Import all models
     Base.metadata.create_all(bind=engine)
-    migrate_schema()
+    if migrate_schema():
+        set_schema_version(SCHEMA_VERSION)
 
-def migrate_schema():
-    """Migrate database schema to match current models."""
-    from sqlalchemy import inspect, text, MetaData
+def get_schema_version():
+    """Return the schema version recorded in the database, or None if there is none."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
     
-    with engine.connect() as conn:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        
-        if 'tasks' in tables:
-            # Check if due_date column exists and if estimated_time needs to be removed
-            columns = [col['name'] for col in inspector.get_columns('tasks')]
-            has_estimated_time = 'estimated_time' in columns
-            has_due_date = 'due_date' in columns
-            
-            # If estimated_time exists or due_date doesn't exist, we need to recreate
-            if has_estimated_time or not has_due_date:
-                try:
-                    # SQLite doesn't support DROP COLUMN, so we recreate the table
-                    print("Migrating tasks table schema...")
-                    
-                    # Create new table with correct schema
-                    conn.execute(text("""
-                        CREATE TABLE tasks_new (
-                            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                            title VARCHAR(200) NOT NULL,
-                            description TEXT,
-                            urgency INTEGER NOT NULL DEFAULT 3,
-                            difficulty INTEGER NOT NULL DEFAULT 3,
-                            due_date DATETIME,
-                            completed BOOLEAN NOT NULL DEFAULT 0,
-                            created_at DATETIME NOT NULL,
-                            updated_at DATETIME,
-                            CHECK (urgency >= 1 AND urgency <= 5),
-                            CHECK (difficulty >= 1 AND difficulty <= 5)
-                        )
-                    """))
-                    
-                    # Copy data (excluding estimated_time, handling due_date)
-                    conn.execute(text("""
-                        INSERT INTO tasks_new (id, title, description, urgency, difficulty, due_date, completed, created_at, updated_at)
-                        SELECT id, title, description, urgency, difficulty, NULL as due_date, completed, created_at, updated_at
-                        FROM tasks
-                    """))
-                    
-                    # Drop old table and rename new one
-                    conn.execute(text("DROP TABLE tasks"))
-                    conn.execute(text("ALTER TABLE tasks_new RENAME TO tasks"))
-                    
-                    # Recreate indexes
-                    conn.execute(text("CREATE INDEX ix_tasks_title ON tasks (title)"))
-                    conn.execute(text("CREATE INDEX ix_tasks_completed ON tasks (completed)"))
-                    
-                    conn.commit()
-                    print("Successfully migrated tasks table")
-                except Exception as e:
-                    print(f"Error migrating schema: {e}")
-                    conn.rollback()
-            elif not has_due_date:
-                # Just add due_date column
-                try:
-                    conn.execute(text("ALTER TABLE tasks ADD COLUMN due_date DATETIME"))
-                    conn.commit()
-                    print("Added due_date column to tasks table")
-                except Exception as e:
-                    print(f"Error adding due_date column: {e}")
-                    conn.rollback()
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version FROM schema_version")).scalar()
+    except DBAPIError:
+        return None  # Fresh or pre-versioning database
+
+def set_schema_version(version: int):
+    """Record the schema version the database has been migrated to."""
+    from sqlalchemy import text
+    
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
+
+# Drops estimated_time and adds due_date (existing rows get no due date)
+TASKS_DUE_DATE_REBUILD = TableRebuild(
+    name="tasks_drop_estimated_time_add_due_date",
+    table="tasks",
+    create_sql="""
+        CREATE TABLE tasks_new (
+            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+            title VARCHAR(200) NOT NULL,
+            description TEXT,
+            urgency INTEGER NOT NULL DEFAULT 3,
+            difficulty INTEGER NOT NULL DEFAULT 3,
+            due_date DATETIME,
+            completed BOOLEAN NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME,
+            CHECK (urgency >= 1 AND urgency <= 5),
+            CHECK (difficulty >= 1 AND difficulty <= 5)
+        )
+    """,
+    columns=["id", "title", "description", "urgency", "difficulty", "due_date",
+             "completed", "created_at", "updated_at"],
+    select_exprs=["id", "title", "description", "urgency", "difficulty", "NULL",
+                  "completed", "created_at", "updated_at"],
+    indexes=[
+        "CREATE INDEX IF NOT EXISTS ix_tasks_title ON tasks (title)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completed ON tasks (completed)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_updated_at ON tasks (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completed_due_date ON tasks (completed, due_date)",
+    ],
+)
 
+def migrate_schema() -> bool:
+    """
+    Migrate database schema to match current models.
+    
+    Table rebuilds run through MigrationRunner in checkpointed batches, so an
+    interrupted migration resumes on the next start instead of starting over.
+    
+    Returns:
+        True if the schema is current, False if a migration step failed
+    """
+    from sqlalchemy import inspect, text
+    
+    runner = MigrationRunner(engine)
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    
+    if 'tasks' in tables:
+        # Check if due_date column exists and if estimated_time needs to be removed
+        columns = [col['name'] for col in inspector.get_columns('tasks')]
+        has_estimated_time = 'estimated_time' in columns
+        has_due_date = 'due_date' in columns
+        progress = runner.get_progress(TASKS_DUE_DATE_REBUILD.name)
+        interrupted = progress is not None and progress["phase"] != "done"
+        
+        # If estimated_time exists or due_date doesn't exist, we need to recreate
+        if has_estimated_time or not has_due_date or interrupted:
+            try:
+                # SQLite doesn't support DROP COLUMN, so we recreate the table
+                logger.info("Migrating tasks table schema...")
+                runner.run(TASKS_DUE_DATE_REBUILD)
+                logger.info("Successfully migrated tasks table")
+            except Exception:
+                logger.exception("Error migrating schema")
+                return False
+        
+        # create_all does not add indexes to existing tables
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_updated_at ON tasks (updated_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_completed_due_date ON tasks (completed, due_date)"))
+            if ensure_search_index(conn):
+                logger.info("Built the task search index")
+    return True
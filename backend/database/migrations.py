@@ -0,0 +1,204 @@
+"""
+Database migration runner.
+Rebuilds tables in bounded, checkpointed batches so large upgrades never hold one long lock.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TABLE = "migration_progress"
+
+PHASE_COPYING = "copying"
+PHASE_SWAPPED = "swapped"
+PHASE_DONE = "done"
+
+class TableRebuild:
+    """
+    Describes rebuilding a table into a new schema.
+    SQLite cannot drop or retype columns, so the table is recreated and its rows copied.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        create_sql: str,
+        columns: List[str],
+        select_exprs: Optional[List[str]] = None,
+        indexes: Optional[List[str]] = None,
+        changed_column: Optional[str] = "updated_at",
+    ):
+        """
+        Initialize a table rebuild.
+        
+        Args:
+            name: Unique migration name, used to checkpoint progress
+            table: Table being rebuilt (must have an integer id primary key)
+            create_sql: CREATE TABLE statement for the new table, named {table}_new
+            columns: Columns of the new table to fill
+            select_exprs: Source expressions for each column (defaults to the column names)
+            indexes: CREATE INDEX statements run after the data has been copied
+            changed_column: Source timestamp column used to re-copy rows edited mid-migration
+        """
+        self.name = name
+        self.table = table
+        self.new_table = f"{table}_new"
+        self.create_sql = create_sql
+        self.columns = columns
+        self.select_exprs = select_exprs or columns
+        self.indexes = indexes or []
+        self.changed_column = changed_column
+    
+    def copy_sql(self, where: str) -> str:
+        """Build the INSERT ... SELECT statement copying rows that match a condition."""
+        return (
+            f"INSERT OR REPLACE INTO {self.new_table} ({', '.join(self.columns)}) "
+            f"SELECT {', '.join(self.select_exprs)} FROM {self.table} WHERE {where}"
+        )
+
+class MigrationRunner:
+    """
+    Runs table rebuilds in batches.
+    
+    Each batch copies up to batch_size rows and records the last copied id in the
+    migration_progress table within the same transaction, so a crash loses at most
+    one uncommitted batch and a rerun resumes where the last one stopped. The lock
+    on the database is released between batches. The final swap re-copies rows
+    inserted, edited or deleted during the copy, then indexes are built on the
+    filled table.
+    """
+    
+    def __init__(self, engine: Engine, batch_size: int = 1000):
+        """
+        Initialize the migration runner.
+        
+        Args:
+            engine: Engine for the database being migrated
+            batch_size: Maximum number of rows copied per transaction
+        """
+        self.engine = engine
+        self.batch_size = batch_size
+    
+    def _ensure_progress_table(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+                    name VARCHAR(100) NOT NULL PRIMARY KEY,
+                    phase VARCHAR(20) NOT NULL,
+                    last_id INTEGER NOT NULL DEFAULT 0,
+                    rows_copied INTEGER NOT NULL DEFAULT 0,
+                    started_at DATETIME NOT NULL
+                )
+            """))
+    
+    def get_progress(self, name: str) -> Optional[dict]:
+        """
+        Get the checkpoint of a migration.
+        
+        Args:
+            name: Migration name
+        
+        Returns:
+            Progress row as a dictionary, or None if the migration never started
+        """
+        self._ensure_progress_table()
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text(f"SELECT phase, last_id, rows_copied, started_at FROM {PROGRESS_TABLE} WHERE name = :name"),
+                {"name": name},
+            ).mappings().first()
+        return dict(row) if row else None
+    
+    def run(self, rebuild: TableRebuild) -> None:
+        """
+        Run (or resume) a table rebuild to completion.
+        
+        Args:
+            rebuild: Table rebuild to run
+        """
+        progress = self.get_progress(rebuild.name)
+        if progress is None:
+            progress = self._start(rebuild)
+        if progress["phase"] == PHASE_DONE:
+            return
+        if progress["phase"] == PHASE_COPYING:
+            self._copy(rebuild, progress)
+            self._swap(rebuild, progress)
+        self._build_indexes(rebuild)
+        self._set_phase(rebuild.name, PHASE_DONE)
+        logger.info("Migration %s complete", rebuild.name)
+    
+    def _start(self, rebuild: TableRebuild) -> dict:
+        """Create the new table and the progress checkpoint."""
+        progress = {"phase": PHASE_COPYING, "last_id": 0, "rows_copied": 0, "started_at": datetime.utcnow()}
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {rebuild.new_table}"))
+            conn.execute(text(rebuild.create_sql))
+            conn.execute(
+                text(f"INSERT INTO {PROGRESS_TABLE} (name, phase, last_id, rows_copied, started_at) "
+                     "VALUES (:name, :phase, :last_id, :rows_copied, :started_at)"),
+                dict(progress, name=rebuild.name),
+            )
+        return progress
+    
+    def _copy(self, rebuild: TableRebuild, progress: dict) -> None:
+        """Copy rows in id order, one checkpointed batch per transaction."""
+        last_id = progress["last_id"]
+        rows_copied = progress["rows_copied"]
+        while True:
+            with self.engine.begin() as conn:
+                upper = conn.execute(
+                    text(f"SELECT id FROM {rebuild.table} WHERE id > :last_id ORDER BY id LIMIT 1 OFFSET :offset"),
+                    {"last_id": last_id, "offset": self.batch_size - 1},
+                ).scalar()
+                if upper is None:
+                    return  # Fewer than batch_size rows left; the swap copies them
+                copied = conn.execute(
+                    text(rebuild.copy_sql("id > :last_id AND id <= :upper")),
+                    {"last_id": last_id, "upper": upper},
+                ).rowcount
+                last_id = upper
+                rows_copied += copied
+                conn.execute(
+                    text(f"UPDATE {PROGRESS_TABLE} SET last_id = :last_id, rows_copied = :rows_copied WHERE name = :name"),
+                    {"last_id": last_id, "rows_copied": rows_copied, "name": rebuild.name},
+                )
+            logger.info("Migration %s: %d rows copied", rebuild.name, rows_copied)
+    
+    def _swap(self, rebuild: TableRebuild, progress: dict) -> None:
+        """Catch up on concurrent changes and replace the old table in one short transaction."""
+        last_id = self.get_progress(rebuild.name)["last_id"]
+        with self.engine.begin() as conn:
+            conn.execute(text(rebuild.copy_sql("id > :last_id")), {"last_id": last_id})
+            if rebuild.changed_column:
+                conn.execute(
+                    text(rebuild.copy_sql(f"{rebuild.changed_column} >= :started_at")),
+                    {"started_at": progress["started_at"]},
+                )
+            conn.execute(text(
+                f"DELETE FROM {rebuild.new_table} WHERE id NOT IN (SELECT id FROM {rebuild.table})"
+            ))
+            conn.execute(text(f"DROP TABLE {rebuild.table}"))
+            conn.execute(text(f"ALTER TABLE {rebuild.new_table} RENAME TO {rebuild.table}"))
+            conn.execute(
+                text(f"UPDATE {PROGRESS_TABLE} SET phase = :phase WHERE name = :name"),
+                {"phase": PHASE_SWAPPED, "name": rebuild.name},
+            )
+    
+    def _build_indexes(self, rebuild: TableRebuild) -> None:
+        """Create indexes once the table is filled, which is cheaper than maintaining them per row."""
+        for statement in rebuild.indexes:
+            with self.engine.begin() as conn:
+                conn.execute(text(statement))
+    
+    def _set_phase(self, name: str, phase: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"UPDATE {PROGRESS_TABLE} SET phase = :phase WHERE name = :name"),
+                {"phase": phase, "name": name},
+            )
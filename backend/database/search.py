@@ -0,0 +1,86 @@
+"""
+Full-text search index.
+An SQLite FTS5 index over task titles and descriptions, kept in step with the tasks table by triggers.
+"""
+
+import re
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SEARCH_TABLE = "tasks_fts"
+
+# bm25 column weights: a term in the title counts for more than one in the description
+TITLE_WEIGHT = 4.0
+DESCRIPTION_WEIGHT = 1.0
+
+# External content table: the index stores only the inverted lists and reads
+# column values from tasks. Prefix indexes keep search-as-you-type queries fast.
+SEARCH_INDEX_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, description,
+        content='tasks', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    # Only edits to the indexed columns touch the index; toggles and rescoring do not
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+_TERM = re.compile(r"\w+")
+
+def ensure_search_index(conn: Connection) -> bool:
+    """
+    Create the search index and its triggers if they are missing.
+    
+    A newly created index is filled from the existing tasks. Triggers dropped
+    along with a rebuilt tasks table are recreated.
+    
+    Returns:
+        True if the index was created (and filled)
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+    ).first() is not None
+    for statement in SEARCH_INDEX_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+    return not exists
+
+def match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+    
+    Every word must match; the last one also matches as a prefix, so results
+    follow the user while they type. Operators and punctuation are dropped
+    rather than passed through, so no input is an FTS5 syntax error.
+    
+    Returns:
+        The MATCH expression, or None if the text has no words
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= 2:  # Single-character prefixes have no prefix index and match most rows
+        quoted[-1] += "*"
+    return " ".join(quoted)
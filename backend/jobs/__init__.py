@@ -0,0 +1,9 @@
+"""
+Jobs module.
+SQLite-backed background jobs with retries, dedup keys and priority order.
+"""
+
+from jobs.runner import JOB_HANDLERS, JobRunner, job_data, job_handler
+from jobs import handlers  # noqa: F401  Registers the built-in handlers
+
+__all__ = ["JOB_HANDLERS", "JobRunner", "job_data", "job_handler"]
@@ -0,0 +1,43 @@
+"""
+Job handlers.
+Rescoring and assistant message generation, run by the job runner instead of in requests.
+"""
+
+from services.ai_service import AIService
+from services.task_service import TaskService
+from jobs.runner import JobRunner, job_handler
+
+ASSISTANT_MESSAGE_KINDS = ("task_created", "task_completed")
+
+# Job priorities (lower runs first): someone is waiting on assistant messages,
+# requested rescoring is next and the periodic refresh can wait
+ASSISTANT_MESSAGE_PRIORITY = 10.0
+RESCORE_PRIORITY = 50.0
+SCHEDULED_RESCORE_PRIORITY = 80.0
+
+@job_handler("rescore_tasks")
+def rescore_tasks(runner: JobRunner, payload: dict) -> dict:
+    """Re-score every open task and update the priority queue. Payload: optional algorithm."""
+    db = runner.session_factory()
+    try:
+        return {"rescored": TaskService(db, runner.queue).rescore_queue(payload.get("algorithm"))}
+    finally:
+        db.close()
+
+@job_handler("assistant_message")
+def assistant_message(runner: JobRunner, payload: dict) -> dict:
+    """Generate an assistant message. Payload: kind (task_created or task_completed), optional task_title."""
+    kind = payload.get("kind")
+    if kind not in ASSISTANT_MESSAGE_KINDS:
+        raise ValueError(f"Unknown assistant message kind '{kind}'")
+    task_title = payload.get("task_title")
+    try:
+        ai_service = AIService()
+    except ValueError:
+        # API key not configured - same defaults as the synchronous endpoints
+        if kind == "task_created":
+            return {"response": "Great! You're making progress."}
+        return {"response": f"Woohoo! {task_title if task_title else 'Your task'} is complete! Well done!"}
+    if kind == "task_created":
+        return {"response": ai_service.get_motivational_message(task_title)}
+    return {"response": ai_service.get_completion_message(task_title)}
@@ -0,0 +1,356 @@
+"""
+Background job runner.
+Persistent jobs run by worker threads off the request path, highest priority first.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from models.job import Job
+from monitoring.metrics import JOB_RUN_SECONDS
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Jobs in these states block a new job with the same dedup key
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+JobHandler = Callable[["JobRunner", dict], Any]
+
+# Handlers by job name, filled in by @job_handler
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+def job_handler(name: str):
+    """Decorator registering a function as the handler of a job name."""
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[name] = func
+        return func
+    return decorator
+
+def job_data(job: Job) -> dict:
+    """A job's state as a JSON-ready dictionary."""
+    return {
+        "id": job.id,
+        "name": job.name,
+        "payload": json.loads(job.payload),
+        "priority": job.priority,
+        "dedup_key": job.dedup_key,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_at": job.run_at.isoformat() if job.run_at else None,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result is not None else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+class _Schedule:
+    """A job enqueued every interval seconds."""
+    
+    __slots__ = ("name", "interval", "payload", "priority", "dedup_key", "next_run")
+    
+    def __init__(self, name: str, interval: float, payload: dict, priority: float, dedup_key: str):
+        self.name = name
+        self.interval = interval
+        self.payload = payload
+        self.priority = priority
+        self.dedup_key = dedup_key
+        self.next_run = time.monotonic()
+
+class JobRunner:
+    """
+    Runs jobs stored in the jobs table on a pool of worker threads.
+    
+    A dispatcher thread polls for due queued jobs (and is woken early by
+    enqueue) and pushes them onto a PriorityQueue keyed on job priority, so
+    workers always take the most urgent ready job; equal priorities run in
+    enqueue order. A worker claims a job with a conditional UPDATE before
+    running it, so several processes can share one jobs table and each job
+    runs once. The claim holds a lease: jobs whose runner died mid-run are
+    queued again once the lease expires, so the lease must outlast the
+    slowest job. Failed attempts are retried with jittered exponential
+    backoff until max_attempts. A job enqueued with a dedup key is not
+    enqueued again while one with that key is queued or running.
+    """
+    
+    def __init__(self, session_factory: Callable[[], Session], queue=None, workers: int = 2,
+                 poll_interval: float = 1.0, lease: float = 600.0, backoff: float = 2.0,
+                 max_backoff: float = 300.0, retention: float = 7 * 86400.0,
+                 handlers: Optional[Dict[str, JobHandler]] = None):
+        """
+        Initialize a stopped runner.
+        
+        Args:
+            session_factory: Callable returning a new database session
+            queue: Task priority queue (PriorityQueue or QueueClient) handlers may update
+            workers: Number of worker threads
+            poll_interval: Seconds between polls for due jobs
+            lease: Seconds a claimed job may run before another runner may take it over
+            backoff: Delay in seconds before the first retry; doubles with each attempt
+            max_backoff: Upper bound of the retry delay in seconds
+            retention: Seconds finished jobs are kept before being purged
+            handlers: Handlers by job name (defaults to those registered with @job_handler)
+        """
+        self.session_factory = session_factory
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self._ready = PriorityQueue()  # QueueEntry(job priority, job ID)
+        self._local: set = set()  # IDs of jobs readied or running in this runner
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._schedules: List[_Schedule] = []
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._next_purge = 0.0
+    
+    def enqueue(self, name: str, payload: Optional[dict] = None, priority: float = 50.0,
+                dedup_key: Optional[str] = None, delay: float = 0.0, max_attempts: int = 3) -> dict:
+        """
+        Add a job.
+        
+        Args:
+            name: Registered job name
+            payload: JSON-serializable arguments passed to the handler
+            priority: Job priority (lower runs first)
+            dedup_key: Optional key; while a job with this key is queued or running,
+                that job is returned instead of adding another
+            delay: Seconds before the job may run
+            max_attempts: Attempts before the job is marked failed
+        
+        Returns:
+            The job's state (see job_data)
+        
+        Raises:
+            ValueError: If no handler is registered for name
+        """
+        if name not in self.handlers:
+            raise ValueError(f"Unknown job '{name}'")
+        db = self.session_factory()
+        try:
+            if dedup_key is not None:
+                existing = (
+                    db.query(Job)
+                    .filter(Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_STATUSES))
+                    .order_by(Job.id)
+                    .first()
+                )
+                if existing is not None:
+                    return job_data(existing)
+            job = Job(
+                name=name,
+                payload=json.dumps(payload or {}),
+                priority=priority,
+                dedup_key=dedup_key,
+                status=QUEUED,
+                max_attempts=max_attempts,
+                run_at=datetime.utcnow() + timedelta(seconds=delay),
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            data = job_data(job)
+        finally:
+            db.close()
+        if delay <= 0:
+            self._wake.set()
+        return data
+    
+    def get_job(self, job_id: int) -> Optional[dict]:
+        """A job's state, or None if there is no such job."""
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            return job_data(job) if job else None
+        finally:
+            db.close()
+    
+    def schedule(self, name: str, interval: float, payload: Optional[dict] = None,
+                 priority: float = 50.0, dedup_key: Optional[str] = None) -> None:
+        """
+        Enqueue a job every interval seconds, starting at the next poll.
+        
+        Runs are deduplicated on dedup_key (schedule:<name> by default), so a
+        run that is still pending is not doubled up, also across processes.
+        """
+        self._schedules.append(_Schedule(name, interval, payload or {}, priority, dedup_key or f"schedule:{name}"))
+    
+    def start(self) -> None:
+        """Start the dispatcher and worker threads."""
+        if self._running:
+            return
+        self._running = True
+        self._threads = [threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work_loop, name=f"job-worker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self) -> None:
+        """Stop the threads, letting running jobs finish. Readied jobs stay queued in the table."""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        with self._condition:
+            self._ready = PriorityQueue()
+            self._local.clear()
+    
+    def poll(self) -> int:
+        """
+        Enqueue due scheduled jobs, recover expired leases and ready due jobs.
+        
+        Returns:
+            Number of jobs newly pushed onto the ready queue
+        """
+        now = time.monotonic()
+        for schedule in self._schedules:
+            if schedule.next_run <= now:
+                schedule.next_run = now + schedule.interval
+                self.enqueue(schedule.name, schedule.payload, schedule.priority, schedule.dedup_key)
+        
+        utcnow = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            expired = (Job.status == RUNNING, Job.locked_until < utcnow)
+            db.query(Job).filter(*expired, Job.attempts >= Job.max_attempts).update(
+                {Job.status: FAILED, Job.locked_until: None, Job.finished_at: utcnow,
+                 Job.last_error: "Lease expired before the job finished"},
+                synchronize_session=False,
+            )
+            db.query(Job).filter(*expired).update(
+                {Job.status: QUEUED, Job.locked_until: None}, synchronize_session=False,
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + 3600.0
+                db.query(Job).filter(
+                    Job.status.in_((SUCCEEDED, FAILED)),
+                    Job.finished_at < utcnow - timedelta(seconds=self.retention),
+                ).delete(synchronize_session=False)
+            db.commit()
+            due = (
+                db.query(Job.id, Job.priority)
+                .filter(Job.status == QUEUED, Job.run_at <= utcnow)
+                .order_by(Job.priority, Job.id)
+                .limit(max(100, self.workers * 10))
+                .all()
+            )
+        finally:
+            db.close()
+        
+        readied = 0
+        with self._condition:
+            for job_id, priority in due:
+                if job_id not in self._local:
+                    self._local.add(job_id)
+                    self._ready.push(QueueEntry(priority, job_id))
+                    readied += 1
+            if readied:
+                self._condition.notify(readied)
+        return readied
+    
+    def run_job(self, job_id: int) -> bool:
+        """
+        Claim a due queued job and run it on the calling thread.
+        
+        Returns:
+            True if the job was claimed and run (whatever its outcome), False if it
+            was not due, not queued or claimed by another runner first
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            claimed = db.query(Job).filter(Job.id == job_id, Job.status == QUEUED, Job.run_at <= now).update(
+                {Job.status: RUNNING, Job.attempts: Job.attempts + 1,
+                 Job.locked_until: now + timedelta(seconds=self.lease)},
+                synchronize_session=False,
+            )
+            db.commit()
+            if not claimed:
+                return False
+            
+            job = db.get(Job, job_id)
+            try:
+                handler = self.handlers.get(job.name)
+                if handler is None:
+                    raise LookupError(f"No handler registered for job '{job.name}'")
+                result = handler(self, json.loads(job.payload))
+            except Exception as e:
+                outcome = self._record_failure(job, e)
+            else:
+                job.status = SUCCEEDED
+                job.result = json.dumps(result)
+                job.finished_at = datetime.utcnow()
+                job.locked_until = None
+                outcome = SUCCEEDED
+            db.commit()
+            JOB_RUN_SECONDS.observe(time.perf_counter() - started, job=job.name, result=outcome)
+            return True
+        finally:
+            db.close()
+    
+    def _record_failure(self, job: Job, error: Exception) -> str:
+        """Schedule a retry with backoff, or mark the job failed after its last attempt."""
+        job.last_error = f"{type(error).__name__}: {error}"
+        job.locked_until = None
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed after %d attempts: %s", job.id, job.name, job.attempts, job.last_error)
+            job.status = FAILED
+            job.finished_at = datetime.utcnow()
+            return FAILED
+        delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1))
+        delay *= 0.5 + random.random() / 2  # Jitter, so jobs failing together do not retry together
+        logger.warning("Job %s (%s) attempt %d failed, retrying in %.1fs: %s",
+                       job.id, job.name, job.attempts, delay, job.last_error)
+        job.status = QUEUED
+        job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        return "retried"
+    
+    def _dispatch_loop(self) -> None:
+        while self._running:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Job poll failed; retrying on the next interval")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def _work_loop(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not self._ready:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                entry = self._ready.pop()
+            try:
+                self.run_job(entry.task_id)
+            except Exception:
+                logger.exception("Job %s could not be run", entry.task_id)
+            finally:
+                with self._condition:
+                    self._local.discard(entry.task_id)
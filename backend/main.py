@@ -3,37 +3,116 @@ FastAPI application entry point.
 Main application setup, middleware configuration, and route registration.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router
+from api.rate_limit import RateLimiter, RateLimitMiddleware
 from database.connection import init_db
+from api.dependencies import (
+    get_deadline_index, get_job_runner, get_priority_queue, get_reminder_scheduler, get_write_buffer,
+)
+from database.session import SessionLocal
+from priority_queue.priority_queue import PriorityQueue
+from services.task_service import TaskService
+from monitoring import PROFILER, REGISTRY, MetricsMiddleware, TimedJSONResponse, install_sql_hooks
+from monitoring.metrics import CONTENT_TYPE
+import logging
 import os
+import signal
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="PriorityForge API",
     description="API for PriorityForge task management system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse,
 )
 
+# Per-client rate limits and load shedding, inside the metrics so 429s are counted
+rate_limiter = RateLimiter.from_env()
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+# Request, SQL and queue metrics, served on /metrics
+install_sql_hooks()
+app.add_middleware(MetricsMiddleware)
+
+# Slow request profiler: toggle with SIGUSR2 or /api/admin/profiler, or enable at boot
+PROFILER.queue_size = lambda: len(get_priority_queue())
+if hasattr(signal, "SIGUSR2") and threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGUSR2, lambda signum, frame: logger.info(
+        "Request profiler %s", "enabled" if PROFILER.toggle() else "disabled"))
+if os.getenv("PROFILER_ENABLED", "").lower() in ("1", "true"):
+    PROFILER.start()
+
 # Initialize database on startup if tables don't exist
 @app.on_event("startup")
 def startup_event():
     """Initialize database tables on application startup."""
     db_path = os.getenv("DATABASE_URL", "sqlite:///./priority_forge.db").replace("sqlite:///", "")
     if not os.path.exists(db_path) or os.path.getsize(db_path) == 0:
-        print("Initializing database...")
+        logger.info("Initializing database...")
         init_db()
-        print("Database initialized successfully!")
+        logger.info("Database initialized successfully")
     else:
         # Try to initialize anyway to ensure tables exist
         try:
             init_db()
         except Exception:
             pass  # Tables already exist
+    
+    # Replay task writes a crash left in the write-behind journal
+    get_write_buffer()
+    
+    # A fresh in-process queue starts from the open tasks; the queue service restores its own
+    queue = get_priority_queue()
+    if isinstance(queue, PriorityQueue) and not queue:
+        db = SessionLocal()
+        try:
+            logger.info("Loaded %d open tasks into the priority queue", TaskService(db, queue).load_queue())
+        finally:
+            db.close()
+    
+    db = SessionLocal()
+    try:
+        loaded = TaskService(db, deadlines=get_deadline_index()).load_deadlines()
+        logger.info("Loaded %d due dates into the deadline index", loaded)
+    finally:
+        db.close()
+    
+    # Rescoring and assistant jobs run on background threads
+    get_job_runner().start()
+
+@app.on_event("startup")
+async def start_reminders():
+    """Start firing due date reminders once the deadline index is loaded."""
+    scheduler = get_reminder_scheduler()
+    if scheduler is not None:
+        await scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_reminders():
+    """Stop the reminder scheduler before the deadline index stops changing."""
+    scheduler = get_reminder_scheduler()
+    if scheduler is not None:
+        await scheduler.stop()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Finish running jobs and commit buffered task writes before the process exits."""
+    get_job_runner().stop()
+    writer = get_write_buffer()
+    if writer is not None:
+        writer.close()
 
 # CORS middleware configuration
 app.add_middleware(
@@ -57,3 +136,7 @@ def health_check():
     """Detailed health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,8 @@
+"""
+ML module.
+Learned priority model, trained offline on task completion history.
+"""
+
+from ml.models import LogisticPriorityModel, load_latest_model, task_features
+
+__all__ = ["LogisticPriorityModel", "load_latest_model", "task_features"]
@@ -0,0 +1,206 @@
+"""
+Learned priority models.
+Feature extraction and a logistic model scoring tasks by how closely they resemble work that gets done.
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+FEATURE_NAMES = ["urgency", "difficulty", "has_due_date", "days_until_due", "log_age_days"]
+MAX_DUE_DAYS = 30.0  # due-date distance is clipped so far-off and long-overdue tasks do not dominate
+MODEL_FILE = re.compile(r"^priority_model_v(\d+)\.json$")
+
+def feature_matrix(
+    urgency: Sequence[float],
+    difficulty: Sequence[float],
+    due_seconds: Sequence[float],
+    age_seconds: Sequence[float],
+) -> np.ndarray:
+    """
+    Build the model's feature matrix from raw task columns.
+    
+    Args:
+        urgency: Urgency per task (1-5)
+        difficulty: Difficulty per task (1-5)
+        due_seconds: Seconds until the due date (NaN for tasks without one)
+        age_seconds: Seconds since the task was created
+    
+    Returns:
+        Array of shape (n_tasks, len(FEATURE_NAMES))
+    """
+    due_days = np.asarray(due_seconds, dtype=np.float64) / 86400.0
+    has_due = ~np.isnan(due_days)
+    age_days = np.maximum(np.asarray(age_seconds, dtype=np.float64) / 86400.0, 0.0)
+    return np.column_stack([
+        np.asarray(urgency, dtype=np.float64),
+        np.asarray(difficulty, dtype=np.float64),
+        has_due.astype(np.float64),
+        np.where(has_due, np.clip(np.nan_to_num(due_days), -MAX_DUE_DAYS, MAX_DUE_DAYS), 0.0),
+        np.log1p(age_days),
+    ])
+
+def task_features(tasks: List, now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Build the feature matrix for tasks as of a point in time.
+    
+    Args:
+        tasks: Tasks (or anything with urgency, difficulty, due_date and created_at)
+        now: Reference time (defaults to now)
+    
+    Returns:
+        Array of shape (len(tasks), len(FEATURE_NAMES))
+    """
+    now = now or datetime.utcnow()
+    return feature_matrix(
+        [task.urgency for task in tasks],
+        [task.difficulty for task in tasks],
+        [(task.due_date - now).total_seconds() if task.due_date else np.nan for task in tasks],
+        [(now - task.created_at).total_seconds() if task.created_at else 0.0 for task in tasks],
+    )
+
+class LogisticPriorityModel:
+    """
+    Logistic regression over standardized task features.
+    Scores are the predicted probability that a task is the kind the user completes, scaled to 0-100.
+    """
+    
+    def __init__(
+        self,
+        weights: Sequence[float],
+        bias: float,
+        mean: Sequence[float],
+        scale: Sequence[float],
+        version: int = 1,
+        trained_at: Optional[datetime] = None,
+        n_samples: int = 0,
+    ):
+        """
+        Initialize a model from trained parameters.
+        
+        Args:
+            weights: One weight per feature in FEATURE_NAMES
+            bias: Intercept
+            mean: Per-feature mean used for standardization
+            scale: Per-feature standard deviation used for standardization
+            version: Model version number
+            trained_at: When the model was trained
+            n_samples: Number of training samples
+        """
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        if not (len(self.weights) == len(self.mean) == len(self.scale) == len(FEATURE_NAMES)):
+            raise ValueError(f"Model parameters must have {len(FEATURE_NAMES)} features")
+        self.version = version
+        self.trained_at = trained_at or datetime.utcnow()
+        self.n_samples = n_samples
+    
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict completion probabilities.
+        
+        Args:
+            features: Feature matrix from feature_matrix() or task_features()
+        
+        Returns:
+            Probability per row
+        """
+        logits = ((features - self.mean) / self.scale) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+    
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """Priority scores (0-100, higher = more priority) for a feature matrix."""
+        return 100.0 * self.predict_proba(features)
+    
+    def to_dict(self) -> dict:
+        """Serialize the model parameters."""
+        return {
+            "version": self.version,
+            "trained_at": self.trained_at.isoformat(),
+            "n_samples": self.n_samples,
+            "features": FEATURE_NAMES,
+            "weights": self.weights.tolist(),
+            "bias": self.bias,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogisticPriorityModel":
+        """
+        Deserialize model parameters.
+        
+        Raises:
+            ValueError: If the model was trained on a different feature set
+        """
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError(f"Model features {data.get('features')} do not match {FEATURE_NAMES}")
+        return cls(
+            data["weights"],
+            data["bias"],
+            data["mean"],
+            data["scale"],
+            version=data["version"],
+            trained_at=datetime.fromisoformat(data["trained_at"]),
+            n_samples=data.get("n_samples", 0),
+        )
+    
+    def save(self, directory: str) -> str:
+        """
+        Write the model to a versioned weights file.
+        
+        Args:
+            directory: Directory holding model versions
+        
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"priority_model_v{self.version}.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
+        return path
+    
+    @classmethod
+    def load(cls, path: str) -> "LogisticPriorityModel":
+        """Load a model from a weights file."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+def model_versions(directory: str) -> List[int]:
+    """
+    List the model versions saved in a directory.
+    
+    Args:
+        directory: Directory holding model versions
+    
+    Returns:
+        Version numbers in ascending order
+    """
+    if not os.path.isdir(directory):
+        return []
+    matches = (MODEL_FILE.match(name) for name in os.listdir(directory))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+def load_latest_model(directory: str) -> Optional[LogisticPriorityModel]:
+    """
+    Load the newest model version in a directory.
+    
+    Args:
+        directory: Directory holding model versions
+    
+    Returns:
+        The newest model, or None if none has been trained yet
+    """
+    versions = model_versions(directory)
+    if not versions:
+        return None
+    return LogisticPriorityModel.load(os.path.join(directory, f"priority_model_v{versions[-1]}.json"))
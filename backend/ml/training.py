@@ -0,0 +1,155 @@
+"""
+Offline model training.
+Batch job fitting the learned priority model on local completion history.
+"""
+
+import argparse
+import os
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ml.models import FEATURE_NAMES, LogisticPriorityModel, feature_matrix, model_versions
+from models.task import Task
+from models.task_history import TaskHistory
+
+DEFAULT_MODEL_DIR = "./ml_models"
+
+def load_training_data(db: Session, now: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build training samples from task history.
+    
+    Each completion is a positive sample with features taken at the moment the task was
+    completed; each open task is a negative sample with features taken now.
+    
+    Args:
+        db: Database session
+        now: Reference time for open tasks (defaults to now)
+    
+    Returns:
+        Feature matrix and 0/1 labels
+    """
+    now = now or datetime.utcnow()
+    completed = (
+        db.query(Task.urgency, Task.difficulty, Task.due_date, Task.created_at, TaskHistory.completed_at)
+        .join(TaskHistory, TaskHistory.task_id == Task.id)
+        .all()
+    )
+    pending = (
+        db.query(Task.urgency, Task.difficulty, Task.due_date, Task.created_at)
+        .filter(Task.completed == False)  # noqa: E712
+        .all()
+    )
+    rows = [tuple(row) for row in completed] + [tuple(row) + (now,) for row in pending]
+    if not rows:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0)
+    
+    urgency, difficulty, due_date, created_at, reference = zip(*rows)
+    features = feature_matrix(
+        urgency,
+        difficulty,
+        [(due - ref).total_seconds() if due else np.nan for due, ref in zip(due_date, reference)],
+        [(ref - created).total_seconds() if created else 0.0 for created, ref in zip(created_at, reference)],
+    )
+    labels = np.concatenate([np.ones(len(completed)), np.zeros(len(pending))])
+    return features, labels
+
+def fit_logistic(
+    features: np.ndarray,
+    labels: np.ndarray,
+    epochs: int = 200,
+    learning_rate: float = 0.1,
+    l2: float = 1e-3,
+    batch_size: int = 4096,
+    seed: int = 0,
+) -> Tuple[np.ndarray, float, np.ndarray, np.ndarray]:
+    """
+    Fit a class-balanced, L2-regularized logistic regression with mini-batch gradient descent.
+    
+    Args:
+        features: Feature matrix
+        labels: 0/1 labels
+        epochs: Passes over the data
+        learning_rate: Gradient step size
+        l2: L2 penalty on the weights
+        batch_size: Samples per gradient step
+        seed: Seed for shuffling
+    
+    Returns:
+        Weights, bias, feature mean and feature scale
+    """
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    standardized = (features - mean) / scale
+    
+    # Weight samples so completions and open tasks contribute equally however skewed the history is
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    sample_weights = np.where(labels == 1, len(labels) / (2 * positives), len(labels) / (2 * negatives))
+    
+    rng = np.random.default_rng(seed)
+    weights = np.zeros(features.shape[1])
+    bias = 0.0
+    for _ in range(epochs):
+        order = rng.permutation(len(labels))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x, y, w = standardized[batch], labels[batch], sample_weights[batch]
+            predictions = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+            error = w * (predictions - y)
+            weights -= learning_rate * (x.T @ error / len(batch) + l2 * weights)
+            bias -= learning_rate * error.mean()
+    return weights, bias, mean, scale
+
+def train_model(
+    db: Session,
+    model_dir: str = DEFAULT_MODEL_DIR,
+    now: Optional[datetime] = None,
+    **fit_options,
+) -> Tuple[LogisticPriorityModel, str]:
+    """
+    Train a new model version on the current history and save it.
+    
+    Args:
+        db: Database session
+        model_dir: Directory holding model versions
+        now: Reference time for open tasks (defaults to now)
+        **fit_options: Options passed to fit_logistic()
+    
+    Returns:
+        The trained model and the path of its weights file
+    
+    Raises:
+        ValueError: If the history lacks either completed or open tasks
+    """
+    features, labels = load_training_data(db, now)
+    if labels.size == 0 or labels.min() == labels.max():
+        raise ValueError("Training needs both completed and open tasks")
+    weights, bias, mean, scale = fit_logistic(features, labels, **fit_options)
+    versions = model_versions(model_dir)
+    model = LogisticPriorityModel(
+        weights, bias, mean, scale,
+        version=(versions[-1] + 1) if versions else 1,
+        n_samples=len(labels),
+    )
+    return model, model.save(model_dir)
+
+if __name__ == "__main__":
+    from database.session import SessionLocal
+    
+    parser = argparse.ArgumentParser(description="Train the PriorityForge learned priority model")
+    parser.add_argument("--model-dir", default=os.getenv("ML_MODEL_DIR", DEFAULT_MODEL_DIR),
+                        help="Directory to write the versioned weights file to")
+    parser.add_argument("--epochs", type=int, default=200, help="Passes over the training data")
+    parser.add_argument("--batch-size", type=int, default=4096, help="Samples per gradient step")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        model, path = train_model(db, args.model_dir, epochs=args.epochs, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Trained model v{model.version} on {model.n_samples} samples: {path}")
@@ -5,7 +5,10 @@ Database models for the PriorityForge application.
 
 from models.task import Task
 from models.task_history import TaskHistory
+from models.completion_rollup import CompletionRollup
+from models.task_tombstone import TaskTombstone
+from models.job import Job
 from models.base import BaseModel
 
-__all__ = ["Task", "TaskHistory", "BaseModel"]
+__all__ = ["Task", "TaskHistory", "CompletionRollup", "TaskTombstone", "Job", "BaseModel"]
 
@@ -0,0 +1,27 @@
+"""
+CompletionRollup model.
+Pre-aggregated task completion counts per time bucket.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+from models.base import BaseModel
+
+class CompletionRollup(BaseModel):
+    """
+    CompletionRollup model holding completion totals for one time bucket.
+    Maintained incrementally as completions are recorded, so analytics reads never scan task_history.
+    """
+    __tablename__ = "completion_rollups"
+    
+    granularity = Column(String(10), nullable=False)  # "hour", "day" or "week"
+    bucket_start = Column(DateTime, nullable=False)
+    completed_count = Column(Integer, nullable=False, default=0)
+    total_lag_seconds = Column(Float, nullable=False, default=0.0)  # Sum of created -> completed times
+    
+    # Constraints
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', name='uq_completion_rollups_bucket'),
+    )
+    
+    def __repr__(self):
+        return f"<CompletionRollup(granularity='{self.granularity}', bucket_start={self.bucket_start}, completed_count={self.completed_count})>"
@@ -0,0 +1,36 @@
+"""
+Job model.
+Persistent background job queued for the job runner.
+"""
+
+from sqlalchemy import Column, String, Integer, Text, DateTime, Float, Index
+from models.base import BaseModel
+from datetime import datetime
+
+class Job(BaseModel):
+    """
+    Job model holding one unit of background work and its retry state.
+    Payload and result are JSON text; priority follows the queue (lower runs first).
+    """
+    __tablename__ = "jobs"
+    
+    name = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    priority = Column(Float, nullable=False, default=50.0)
+    dedup_key = Column(String(200), nullable=True, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Not picked up before this
+    locked_until = Column(DateTime, nullable=True)  # Lease of the runner working on it
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Constraints
+    __table_args__ = (
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),  # Runners poll for due queued jobs
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, name='{self.name}', status='{self.status}', attempts={self.attempts})>"
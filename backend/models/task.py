@@ -3,9 +3,10 @@ Task model.
 Database model for tasks in the priority queue system.
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, Text, DateTime, CheckConstraint
+from sqlalchemy import DDL, Column, String, Integer, Boolean, Text, DateTime, CheckConstraint, Index, event
 from sqlalchemy.orm import relationship
 from models.base import BaseModel
+from database.search import SEARCH_INDEX_DDL
 from datetime import datetime
 
 class Task(BaseModel):
@@ -29,8 +30,13 @@ class Task(BaseModel):
     __table_args__ = (
         CheckConstraint('urgency >= 1 AND urgency <= 5', name='check_urgency_range'),
         CheckConstraint('difficulty >= 1 AND difficulty <= 5', name='check_difficulty_range'),
+        Index('ix_tasks_updated_at', 'updated_at'),  # Incremental sync filters on updated_at
+        Index('ix_tasks_completed_due_date', 'completed', 'due_date'),  # Deadline windows of open tasks
     )
     
     def __repr__(self):
         return f"<Task(id={self.id}, title='{self.title}', urgency={self.urgency}, difficulty={self.difficulty}, completed={self.completed})>"
 
+# A fresh tasks table gets its full-text search index straight away (existing databases via migrate_schema)
+for _statement in SEARCH_INDEX_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
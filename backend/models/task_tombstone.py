@@ -0,0 +1,21 @@
+"""
+TaskTombstone model.
+Record of a deleted task, so incremental sync can tell clients what to drop.
+"""
+
+from sqlalchemy import Column, Integer, DateTime
+from models.base import BaseModel
+from datetime import datetime
+
+class TaskTombstone(BaseModel):
+    """
+    TaskTombstone model marking a task deleted (or archived) at a point in time.
+    Holds no task data; clients only need the ID to drop their copy.
+    """
+    __tablename__ = "task_tombstones"
+    
+    task_id = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<TaskTombstone(task_id={self.task_id}, deleted_at={self.deleted_at})>"
@@ -0,0 +1,14 @@
+"""
+Monitoring module.
+Low-overhead request, SQL and queue metrics exposed in Prometheus text format.
+"""
+
+from monitoring.metrics import REGISTRY, Counter, Histogram
+from monitoring.middleware import MetricsMiddleware, TimedJSONResponse
+from monitoring.profiler import PROFILER, ProfiledRoute
+from monitoring.sql import install_sql_hooks
+
+__all__ = [
+    "REGISTRY", "Counter", "Histogram", "MetricsMiddleware", "TimedJSONResponse",
+    "PROFILER", "ProfiledRoute", "install_sql_hooks",
+]
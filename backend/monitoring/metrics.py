@@ -0,0 +1,206 @@
+"""
+Metric types and registry.
+Minimal thread-safe counters and histograms rendered in the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond SQL statements up to slow assistant calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics."""
+    
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+    
+    def register(self, metric) -> None:
+        """Add a metric to the registry."""
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics.append(metric)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class Counter:
+    """Monotonically increasing value per label set."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+    
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increase the counter for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def collect(self) -> List[str]:
+        """Exposition lines for this counter."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                     for key, value in values)
+        return lines
+
+class Histogram:
+    """
+    Distribution of observed values per label set.
+    Bucket counts are stored per bucket and only made cumulative when rendered.
+    """
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+    
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def count(self, **labels) -> int:
+        """Number of observations for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+    
+    def collect(self) -> List[str]:
+        """Exposition lines for this histogram."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def timed(histogram: Histogram, **labels):
+    """Decorator observing each call's duration in a histogram."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "priorityforge_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SQL_STATEMENTS = Histogram(
+    "priorityforge_http_request_sql_statements",
+    "SQL statements issued per HTTP request.",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+HTTP_SERIALIZATION_SECONDS = Histogram(
+    "priorityforge_http_serialization_duration_seconds",
+    "Time spent serializing response bodies per HTTP request.",
+    ("method", "route"),
+)
+SQL_STATEMENT_SECONDS = Histogram(
+    "priorityforge_sql_statement_duration_seconds",
+    "SQL statement execution time by statement type.",
+    ("operation",),
+)
+QUEUE_OPERATION_SECONDS = Histogram(
+    "priorityforge_queue_operation_duration_seconds",
+    "Priority queue operation time, in process (local) or including the round trip to the queue service.",
+    ("operation", "queue"),
+)
+CACHE_LOOKUPS = Counter(
+    "priorityforge_cache_lookups_total",
+    "Read cache lookups by level (l1 in-process, l2 shared) and result.",
+    ("level", "result"),
+)
+CACHE_COALESCED_LOADS = Counter(
+    "priorityforge_cache_coalesced_loads_total",
+    "Cache misses that waited for a concurrent load of the same key instead of querying.",
+)
+JOB_RUN_SECONDS = Histogram(
+    "priorityforge_job_run_duration_seconds",
+    "Background job run time by job name and result (succeeded, retried or failed).",
+    ("job", "result"),
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "priorityforge_rate_limited_requests_total",
+    "Requests answered with 429 by route class and reason (rate limit or overload).",
+    ("route_class", "reason"),
+)
+REMINDERS_FIRED = Counter(
+    "priorityforge_reminders_fired_total",
+    "Due date reminders sent to the reminder sinks, by kind (due_soon, due or overdue).",
+    ("kind",),
+)
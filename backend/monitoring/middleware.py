@@ -0,0 +1,97 @@
+"""
+Request instrumentation.
+ASGI middleware recording per-route latency, SQL statement counts and serialization time.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from fastapi.responses import JSONResponse
+from monitoring.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUEST_SQL_STATEMENTS, HTTP_SERIALIZATION_SECONDS
+from monitoring.profiler import PROFILER
+
+class RequestMetrics:
+    """
+    Per-request accumulators filled in by the SQL hooks and response rendering.
+    samples and statements are only collected while the profiler is enabled.
+    """
+    
+    __slots__ = ("sql_statements", "serialization_seconds", "samples", "statements")
+    
+    def __init__(self, profiled: bool = False):
+        self.sql_statements = 0
+        self.serialization_seconds = 0.0
+        self.samples = {} if profiled else None
+        self.statements = [] if profiled else None
+
+# Threadpool endpoints run in a copy of the request context, so they share this object
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+def _route_template(scope) -> str:
+    """Full path template of the matched route, e.g. /api/tasks/{task_id}."""
+    # Newer FastAPI releases keep included routers unflattened, so scope["route"] lacks the prefix
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering, unlike BaseHTTPMiddleware).
+    Requests are labelled by route template, e.g. /api/tasks/{task_id}, to keep label cardinality bounded.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        metrics = RequestMetrics(profiled=PROFILER.enabled)
+        token = current_request.set(metrics)
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = _route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=method, route=route, status=status)
+            HTTP_REQUEST_SQL_STATEMENTS.observe(metrics.sql_statements, method=method, route=route)
+            HTTP_SERIALIZATION_SECONDS.observe(metrics.serialization_seconds, method=method, route=route)
+            if metrics.samples is not None:
+                PROFILER.record(method, scope["path"], route, status, elapsed, metrics)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that adds its encoding time to the current request's serialization time."""
+    
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = super().render(content)
+        metrics = current_request.get()
+        if metrics is not None:
+            metrics.serialization_seconds += time.perf_counter() - started
+        return body
+
+@contextmanager
+def serialization_timer():
+    """Add a block's duration to the current request's serialization time."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = current_request.get()
+        if metrics is not None:
+            metrics.serialization_seconds += time.perf_counter() - started
@@ -0,0 +1,202 @@
+"""
+Slow request profiler.
+Sampling stack profiler switched on at runtime, keeping the last slow requests in a ring buffer.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+from fastapi.routing import APIRoute
+
+MAX_STACK_DEPTH = 64
+MAX_STATEMENT_LENGTH = 500
+
+class RequestProfiler:
+    """
+    Sampling profiler for slow requests.
+    
+    While enabled, a background thread snapshots the stack of every thread that is
+    running an endpoint every interval seconds and counts identical stacks per
+    request. Requests slower than threshold seconds are kept, with their stack
+    samples, the SQL they issued and the queue size, in a ring buffer of the last
+    capacity captures. Disabled, it costs one attribute check per request.
+    """
+    
+    def __init__(self, interval: float = 0.005, threshold: float = 0.5, capacity: int = 50):
+        """
+        Initialize the profiler (disabled).
+        
+        Args:
+            interval: Seconds between stack samples
+            threshold: Minimum request duration in seconds to capture
+            capacity: Number of captures kept
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.enabled = False
+        self.queue_size: Optional[Callable[[], int]] = None
+        self._captures = deque(maxlen=capacity)
+        self._active: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self, interval: Optional[float] = None, threshold: Optional[float] = None) -> None:
+        """
+        Start sampling (restarting with new settings if already running).
+        
+        Args:
+            interval: Seconds between stack samples
+            threshold: Minimum request duration in seconds to capture
+        """
+        with self._lock:
+            self._stop_thread()
+            if interval is not None:
+                if interval <= 0:
+                    raise ValueError("Sampling interval must be positive")
+                self.interval = interval
+            if threshold is not None:
+                self.threshold = threshold
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._thread.start()
+            self.enabled = True
+    
+    def stop(self) -> None:
+        """Stop sampling; captures are kept."""
+        with self._lock:
+            self._stop_thread()
+    
+    def toggle(self) -> bool:
+        """Start the profiler if stopped, stop it if running. Returns whether it is now enabled."""
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+        return self.enabled
+    
+    def _stop_thread(self) -> None:
+        self.enabled = False
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+    
+    def status(self) -> dict:
+        """Current settings and number of captures."""
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "capacity": self._captures.maxlen,
+            "captures": len(self._captures),
+        }
+    
+    def attach(self, metrics) -> None:
+        """Start sampling the calling thread on behalf of a request."""
+        self._active[threading.get_ident()] = metrics
+    
+    def detach(self) -> None:
+        """Stop sampling the calling thread."""
+        self._active.pop(threading.get_ident(), None)
+    
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, metrics in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is None or metrics.samples is None:
+                    continue
+                stack = _collapse(frame)
+                metrics.samples[stack] = metrics.samples.get(stack, 0) + 1
+    
+    def record(self, method: str, path: str, route: str, status: int, elapsed: float, metrics) -> None:
+        """
+        Keep a request if it was slower than the threshold.
+        
+        Args:
+            method: HTTP method
+            path: Request path
+            route: Route template
+            status: Response status
+            elapsed: Request duration in seconds
+            metrics: The request's RequestMetrics
+        """
+        if elapsed < self.threshold or metrics.samples is None:
+            return
+        queue_size = None
+        if self.queue_size is not None:
+            try:
+                queue_size = self.queue_size()
+            except Exception:
+                pass  # A capture without the queue size beats no capture
+        self._captures.append({
+            "captured_at": datetime.utcnow().isoformat(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "queue_size": queue_size,
+            "sql": [
+                {"statement": statement[:MAX_STATEMENT_LENGTH], "duration_ms": round(seconds * 1000, 3)}
+                for statement, seconds in metrics.statements
+            ],
+            "samples": sum(metrics.samples.values()),
+            "profile": dict(sorted(metrics.samples.items(), key=lambda item: -item[1])),
+        })
+    
+    def captures(self) -> List[dict]:
+        """Captured slow requests, oldest first."""
+        return list(self._captures)
+    
+    def clear(self) -> None:
+        """Drop all captures."""
+        self._captures.clear()
+
+def _collapse(frame) -> str:
+    """Render a stack outermost-first in collapsed format (frames joined by ';')."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+PROFILER = RequestProfiler(
+    interval=float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000,
+    threshold=float(os.getenv("PROFILER_THRESHOLD_MS", "500")) / 1000,
+    capacity=int(os.getenv("PROFILER_CAPACITY", "50")),
+)
+
+def _sampled(endpoint):
+    """Register the threadpool thread running a sync endpoint with the profiler."""
+    # Imported here to avoid a cycle: the middleware imports PROFILER from this module
+    from monitoring.middleware import current_request
+    
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        metrics = current_request.get()
+        if not PROFILER.enabled or metrics is None or metrics.samples is None:
+            return endpoint(*args, **kwargs)
+        PROFILER.attach(metrics)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            PROFILER.detach()
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint is sampled by PROFILER while it runs."""
+    
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _sampled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,39 @@
+"""
+SQL instrumentation.
+SQLAlchemy cursor event hooks timing every statement and counting statements per request.
+"""
+
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from monitoring.metrics import SQL_STATEMENT_SECONDS
+from monitoring.middleware import current_request
+
+_STATEMENT_START = "priorityforge_statement_start"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STATEMENT_START, []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_STATEMENT_START].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    SQL_STATEMENT_SECONDS.observe(elapsed, operation=operation)
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.sql_statements += 1
+        if metrics.statements is not None:
+            metrics.statements.append((statement, elapsed))
+
+def _handle_error(exception_context):
+    # The after hook never runs for a failed statement; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_STATEMENT_START):
+        conn.info[_STATEMENT_START].pop()
+
+def install_sql_hooks() -> None:
+    """Time statements on every engine. Safe to call more than once."""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
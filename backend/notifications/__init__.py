@@ -0,0 +1,17 @@
+"""
+Notifications module.
+Due date reminders fired from a timer heap to pluggable sinks.
+"""
+
+from notifications.scheduler import Reminder, ReminderScheduler, reminder_offsets
+from notifications.sinks import ChangeFeedSink, LogSink, ReminderSink, WebhookSink
+
+__all__ = [
+    "ChangeFeedSink",
+    "LogSink",
+    "Reminder",
+    "ReminderScheduler",
+    "ReminderSink",
+    "WebhookSink",
+    "reminder_offsets",
+]
@@ -0,0 +1,206 @@
+"""
+Reminder scheduler.
+Fires due date reminders from a timer heap, sleeping until the next one is due.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional, Sequence
+from monitoring.metrics import REMINDERS_FIRED
+from notifications.sinks import ReminderSink
+from priority_queue.changes import DUE, DUE_SOON, OVERDUE
+from priority_queue.deadlines import DeadlineIndex
+
+logger = logging.getLogger(__name__)
+
+# Minutes before the due date at which reminders fire: an hour ahead, then when due
+DEFAULT_OFFSETS_MINUTES = "60,0"
+
+class Reminder(NamedTuple):
+    """A reminder that has come due."""
+    task_id: int
+    kind: str  # due_soon, due or overdue
+    due_date: datetime
+    remind_at: datetime
+    
+    def to_dict(self) -> dict:
+        """JSON-ready form."""
+        return {
+            "task_id": self.task_id,
+            "kind": self.kind,
+            "due_date": self.due_date.isoformat(),
+            "remind_at": self.remind_at.isoformat(),
+        }
+
+def reminder_offsets() -> List[float]:
+    """Reminder offsets in seconds before the due date, from REMINDER_OFFSETS_MINUTES (negative = after)."""
+    value = os.getenv("REMINDER_OFFSETS_MINUTES", DEFAULT_OFFSETS_MINUTES)
+    return [float(minutes) * 60 for minutes in value.split(",") if minutes.strip()]
+
+class ReminderScheduler:
+    """
+    Fires reminders at fixed offsets from the due dates of open tasks.
+    
+    Every task with a due date has one entry in a timer heap (a DeadlineIndex
+    keyed on its next reminder instant, not its due date). The scheduler
+    listens to the task deadline index, so a due date being set, moved,
+    cleared or completed moves the task's timer in O(log n); no table is
+    scanned after start. An asyncio task sleeps until the earliest instant,
+    or until an edit puts an earlier one at the top of the heap, then takes
+    every reminder that has come due, sends them in one batch to each sink and
+    schedules each task's next offset. Reminders whose instant passed while
+    the server was down are not sent on start.
+    """
+    
+    def __init__(self, deadlines: DeadlineIndex, sinks: Sequence[ReminderSink], offsets: Sequence[float] = (3600.0, 0.0),
+                 batch_size: int = 1000, max_sleep: float = 60.0,
+                 clock: Callable[[], datetime] = datetime.utcnow):
+        """
+        Initialize a stopped scheduler.
+        
+        Args:
+            deadlines: Deadline index of the open tasks, kept in step by TaskService
+            sinks: Where fired reminders are sent
+            offsets: Seconds before the due date at which reminders fire (negative = after)
+            batch_size: Maximum reminders taken from the heap per batch
+            max_sleep: Upper bound of one sleep, so wall clock adjustments cannot delay
+                reminders for longer than this
+            clock: Current time as naive UTC
+        """
+        self.deadlines = deadlines
+        self.sinks = list(sinks)
+        self.offsets = sorted(set(offsets), reverse=True)  # Earliest reminder first
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self.clock = clock
+        self._timers = DeadlineIndex()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        """Number of tasks with a pending reminder."""
+        return len(self._timers)
+    
+    def next_reminder(self, due_date: datetime, after: datetime) -> Optional[datetime]:
+        """The first reminder instant of a due date later than after, or None if none is left."""
+        for offset in self.offsets:
+            instant = due_date - timedelta(seconds=offset)
+            if instant > after:
+                return instant
+        return None
+    
+    def kind(self, due_date: datetime, instant: datetime) -> str:
+        """Reminder kind of an instant: before, at or after the due date."""
+        if instant < due_date:
+            return DUE_SOON
+        return DUE if instant == due_date else OVERDUE
+    
+    def peek(self) -> Optional[datetime]:
+        """The next reminder instant, or None if no reminder is pending."""
+        entry = self._timers.peek()
+        return entry[0] if entry else None
+    
+    def on_deadline(self, task_id: int, due_date: Optional[datetime]) -> None:
+        """
+        Deadline index listener: reschedule a task whose due date changed.
+        
+        Runs on whichever thread wrote the task; wakes the scheduler when the
+        task's reminder becomes the earliest one.
+        """
+        instant = self.next_reminder(due_date, self.clock()) if due_date is not None else None
+        self._timers.set(task_id, instant)
+        if instant is not None and self._loop is not None:
+            top = self._timers.peek()
+            if top is not None and top[1] == task_id:
+                self._loop.call_soon_threadsafe(self._wake.set)
+    
+    def reload(self) -> int:
+        """
+        Rebuild the timer heap from the deadline index in O(n).
+        
+        Returns:
+            Number of tasks with a pending reminder
+        """
+        now = self.clock()
+        timers = []
+        for due_date, task_id in self.deadlines.entries():
+            instant = self.next_reminder(due_date, now)
+            if instant is not None:
+                timers.append((instant, task_id))
+        self._timers.bulk_load(timers)
+        return len(timers)
+    
+    async def start(self) -> None:
+        """Follow the deadline index and start firing reminders on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.deadlines.listeners.append(self.on_deadline)
+        logger.info("Scheduled reminders for %d tasks", self.reload())
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop firing reminders and stop following the deadline index."""
+        if self._task is None:
+            return
+        if self.on_deadline in self.deadlines.listeners:
+            self.deadlines.listeners.remove(self.on_deadline)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+    
+    async def fire_due(self) -> List[Reminder]:
+        """
+        Send every reminder due now and schedule each task's next one.
+        
+        Returns:
+            The reminders sent, earliest first
+        """
+        fired: List[Reminder] = []
+        while True:
+            now = self.clock()
+            batch = []
+            for instant, task_id in self._timers.pop_due(now, self.batch_size):
+                due_date = self.deadlines.due_date(task_id)
+                if due_date is None:
+                    continue  # Completed or cleared after the timer was read
+                batch.append(Reminder(task_id, self.kind(due_date, instant), due_date, instant))
+                next_instant = self.next_reminder(due_date, instant)
+                if next_instant is not None:
+                    self._timers.set(task_id, next_instant)
+            if not batch:
+                return fired
+            for sink in self.sinks:
+                try:
+                    await sink.send(batch)
+                except Exception:
+                    logger.exception("Reminder sink %s failed", sink.name)
+            for reminder in batch:
+                REMINDERS_FIRED.inc(kind=reminder.kind)
+            fired.extend(batch)
+    
+    async def _run(self) -> None:
+        while True:
+            # Cleared before looking at the heap, so a wake-up for an earlier
+            # reminder arriving from here on is never lost
+            self._wake.clear()
+            try:
+                await self.fire_due()
+            except Exception:
+                logger.exception("Firing reminders failed")
+            next_instant = self.peek()
+            timeout = self.max_sleep
+            if next_instant is not None:
+                timeout = min(timeout, max(0.0, (next_instant - self.clock()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
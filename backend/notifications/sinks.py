@@ -0,0 +1,103 @@
+"""
+Reminder sinks.
+Destinations fired reminders are delivered to: the log, a webhook or the queue change feed.
+"""
+
+import asyncio
+import json
+import logging
+import urllib.request
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+
+class ReminderSink:
+    """
+    Destination for fired reminders.
+    
+    Reminders arrive in batches (everything that came due together); a sink
+    should not raise for a failed delivery, only log it.
+    """
+    
+    name = "base"
+    
+    async def send(self, reminders: Sequence) -> None:
+        """Deliver a batch of Reminder tuples."""
+        raise NotImplementedError
+
+class LogSink(ReminderSink):
+    """Writes one log line per reminder."""
+    
+    name = "log"
+    
+    async def send(self, reminders: Sequence) -> None:
+        for reminder in reminders:
+            logger.info("Reminder: task %s is %s (due %s)", reminder.task_id, reminder.kind,
+                        reminder.due_date.isoformat())
+
+class WebhookSink(ReminderSink):
+    """
+    POSTs each batch as a JSON array to a URL, once, without retries.
+    
+    A stand-in for a real notification channel: point it at a local receiver
+    (or a test server) to see reminders as they fire.
+    """
+    
+    name = "webhook"
+    
+    def __init__(self, url: str, timeout: float = 5.0):
+        """
+        Initialize a webhook sink.
+        
+        Args:
+            url: URL receiving POST requests with a JSON array of reminders
+            timeout: Seconds to wait for the receiver
+        """
+        self.url = url
+        self.timeout = timeout
+    
+    async def send(self, reminders: Sequence) -> None:
+        body = json.dumps([reminder.to_dict() for reminder in reminders]).encode()
+        try:
+            await asyncio.to_thread(self._post, body)
+        except Exception as e:
+            logger.warning("Reminder webhook %s failed for %d reminders: %s", self.url, len(reminders), e)
+    
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(self.url, body, {"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class ChangeFeedSink(ReminderSink):
+    """
+    Records reminders in the priority queue's change log, so clients following
+    /api/queue/changes (or its stream) receive them as due_soon, due and overdue events.
+    """
+    
+    name = "feed"
+    
+    def __init__(self, queue):
+        """
+        Initialize a change feed sink.
+        
+        Args:
+            queue: PriorityQueue or QueueClient whose change log carries the events
+        """
+        self.queue = queue
+    
+    async def send(self, reminders: Sequence) -> None:
+        try:
+            await asyncio.to_thread(self._record, reminders)
+        except Exception as e:
+            logger.warning("Could not record %d reminders in the change feed: %s", len(reminders), e)
+    
+    def _record(self, reminders: Sequence) -> None:
+        if hasattr(self.queue, "pipeline"):
+            # One round trip to the queue service for the whole batch
+            pipeline = self.queue.pipeline()
+            for reminder in reminders:
+                pipeline.notify(reminder.kind, reminder.task_id)
+            pipeline.execute()
+            return
+        for reminder in reminders:
+            self.queue.notify(reminder.kind, reminder.task_id)
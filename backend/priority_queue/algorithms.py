@@ -3,7 +3,8 @@ Priority queue algorithms.
 Various algorithms for calculating task priorities.
 """
 
-from typing import List
+import os
+from typing import List, Optional
 from models.task import Task
 from datetime import datetime, timedelta
 
@@ -13,33 +14,55 @@ class PriorityAlgorithm:
     Subclasses should implement calculate_priority method.
     """
     
+    # Score large task sets across a process pool (see priority_queue.parallel); worth
+    # it only when scoring a task costs well over the few microseconds of shipping it
+    parallel_scoring = False
+    
     @staticmethod
-    def calculate_priority(task: Task) -> float:
+    def calculate_priority(task: Task, now: Optional[datetime] = None) -> float:
         """
         Calculate priority score for a task.
         
         Args:
             task: Task to calculate priority for
+            now: Reference time for due date and age terms (defaults to now, UTC);
+                replays pass their simulated clock
             
         Returns:
             Priority score (higher = more priority)
         """
         raise NotImplementedError("Subclasses must implement calculate_priority")
     
-    @staticmethod
-    def apply_to_tasks(tasks: List[Task]) -> List[Task]:
+    @classmethod
+    def apply_to_tasks(cls, tasks: List[Task], now: Optional[datetime] = None) -> List[Task]:
         """
         Apply priority calculation to a list of tasks.
         
         Args:
             tasks: List of tasks to prioritize
+            now: Reference time (defaults to now, UTC)
             
         Returns:
             List of tasks with updated priority scores
         """
-        for task in tasks:
-            task.priority_score = PriorityAlgorithm.calculate_priority(task)
+        for task, score in zip(tasks, cls.score_tasks(tasks, now)):
+            task.priority_score = score
         return tasks
+    
+    @classmethod
+    def score_tasks(cls, tasks: List[Task], now: Optional[datetime] = None) -> List[float]:
+        """
+        Score tasks without modifying them, so read-only rows can be scored too.
+        
+        Args:
+            tasks: Tasks (or rows with the columns the algorithm reads)
+            now: Reference time, the same for every task (defaults to now, UTC)
+        
+        Returns:
+            Priority score per task (higher = more priority)
+        """
+        now = now or datetime.utcnow()
+        return [cls.calculate_priority(task, now) for task in tasks]
 
 class DefaultPriorityAlgorithm(PriorityAlgorithm):
     """
@@ -48,7 +71,7 @@ class DefaultPriorityAlgorithm(PriorityAlgorithm):
     """
     
     @staticmethod
-    def calculate_priority(task: Task) -> float:
+    def calculate_priority(task: Task, now: Optional[datetime] = None) -> float:
         """Calculate priority using urgency and difficulty."""
         # Simple weighted calculation: urgency * 0.6 + difficulty * 0.4
         # Scale to 0-100 range
@@ -64,20 +87,30 @@ class EisenhowerMatrixAlgorithm(PriorityAlgorithm):
     Prioritizes based on urgency and importance quadrants.
     """
     
+    # A task is urgent when its due date is this close (or past)
+    URGENT_WINDOW = timedelta(days=2)
+    
     @staticmethod
-    def calculate_priority(task: Task) -> float:
+    def calculate_priority(task: Task, now: Optional[datetime] = None) -> float:
         """
         Calculate priority using Eisenhower Matrix.
         Quadrant 1 (Urgent + Important): Highest priority
         Quadrant 2 (Not Urgent + Important): High priority
         Quadrant 3 (Urgent + Not Important): Medium priority
         Quadrant 4 (Not Urgent + Not Important): Low priority
+        
+        Urgent means due within URGENT_WINDOW; tasks carry no importance flag,
+        so high urgency (4-5) stands in for importance, as in TimeDecayAlgorithm.
         """
-        if task.is_urgent and task.is_important:
+        is_urgent = task.due_date is not None and (
+            task.due_date - (now or datetime.utcnow()) <= EisenhowerMatrixAlgorithm.URGENT_WINDOW
+        )
+        is_important = task.urgency >= 4
+        if is_urgent and is_important:
             return 100.0  # Do first
-        elif not task.is_urgent and task.is_important:
+        elif not is_urgent and is_important:
             return 75.0   # Schedule
-        elif task.is_urgent and not task.is_important:
+        elif is_urgent and not is_important:
             return 50.0   # Delegate
         else:
             return 25.0   # Eliminate
@@ -89,12 +122,12 @@ class TimeDecayAlgorithm(PriorityAlgorithm):
     """
     
     @staticmethod
-    def calculate_priority(task: Task) -> float:
+    def calculate_priority(task: Task, now: Optional[datetime] = None) -> float:
         """Calculate priority with time decay factor."""
         base_score = 50.0
         
         if task.due_date:
-            time_remaining = (task.due_date - datetime.utcnow()).total_seconds()
+            time_remaining = (task.due_date - (now or datetime.utcnow())).total_seconds()
             days_remaining = time_remaining / 86400  # Convert to days
             
             if days_remaining < 0:
@@ -107,9 +140,68 @@ class TimeDecayAlgorithm(PriorityAlgorithm):
             else:
                 base_score += 10.0
         
-        # Adjust for importance
-        if task.is_important:
+        # Adjust for importance (tasks carry no importance flag; high urgency stands in)
+        if task.urgency >= 4:
             base_score *= 1.5
         
         return base_score
 
+class LearnedPriorityAlgorithm(PriorityAlgorithm):
+    """
+    Learned priority algorithm.
+    Scores tasks with the newest logistic model trained by ``python -m ml.training``
+    (read from ML_MODEL_DIR). Falls back to DefaultPriorityAlgorithm until a model exists.
+    """
+    
+    model = None
+    _model_checked = False
+    
+    @classmethod
+    def load_model(cls, model_dir: Optional[str] = None):
+        """
+        Load the newest trained model.
+        
+        Args:
+            model_dir: Directory holding model versions (defaults to ML_MODEL_DIR)
+        
+        Returns:
+            The loaded model, or None if none has been trained yet
+        """
+        # Imported here so NumPy is only loaded when the learned algorithm is used
+        from ml.models import load_latest_model
+        from ml.training import DEFAULT_MODEL_DIR
+        cls.model = load_latest_model(model_dir or os.getenv("ML_MODEL_DIR", DEFAULT_MODEL_DIR))
+        cls._model_checked = True
+        return cls.model
+    
+    @classmethod
+    def calculate_priority(cls, task: Task, now: Optional[datetime] = None) -> float:
+        """Calculate priority with the learned model."""
+        return cls.score_tasks([task], now)[0]
+    
+    @classmethod
+    def score_tasks(cls, tasks: List[Task], now: Optional[datetime] = None) -> List[float]:
+        """
+        Score many tasks in one vectorized pass.
+        
+        Args:
+            tasks: Tasks to score
+            now: Reference time (defaults to now)
+        
+        Returns:
+            Priority score per task (higher = more priority)
+        """
+        if not cls._model_checked:
+            cls.load_model()
+        if cls.model is None:
+            return DefaultPriorityAlgorithm.score_tasks(tasks, now)
+        from ml.models import task_features
+        return cls.model.score(task_features(tasks, now)).tolist()
+
+# Algorithms by the names PriorityQueueEngine accepts
+ALGORITHMS = {
+    "default": DefaultPriorityAlgorithm,
+    "eisenhower": EisenhowerMatrixAlgorithm,
+    "time_decay": TimeDecayAlgorithm,
+    "learned": LearnedPriorityAlgorithm,
+}
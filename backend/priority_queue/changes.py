@@ -0,0 +1,113 @@
+"""
+Queue change log.
+Versioned ring buffer of queue change events, so clients can apply deltas instead of refetching.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional
+
+ADDED = "added"
+REMOVED = "removed"
+PRIORITY_CHANGED = "priority_changed"
+UPDATED = "updated"
+COMPLETED = "completed"
+
+# Reminder events: recorded in the log for clients, but the queue itself is unchanged
+DUE_SOON = "due_soon"
+DUE = "due"
+OVERDUE = "overdue"
+
+DEFAULT_CAPACITY = 1024
+
+# Called with the new version after every event, on the recording thread
+ChangeListener = Callable[[int], None]
+
+
+class ChangeEvent(NamedTuple):
+    """One queue change; version is the queue version right after it."""
+    version: int
+    kind: str
+    task_id: int
+    priority: Optional[float]
+
+
+class ChangeLog:
+    """
+    Monotonically increasing version plus the last capacity change events.
+    
+    Versions start at the start-up time in milliseconds and grow by one per event,
+    so a version remembered from before a restart always reads as out of range.
+    Clients whose version has fallen out of the buffer are told to reset (refetch).
+    Safe to record from several threads; listeners are told about every new
+    version, so readers can wait for changes instead of polling.
+    """
+    
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize an empty change log.
+        
+        Args:
+            capacity: Number of events kept for clients to catch up from
+        """
+        self.version = time.time_ns() // 1_000_000
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.listeners: List[ChangeListener] = []
+    
+    def record(self, kind: str, task_id: int, priority: Optional[float] = None) -> int:
+        """
+        Append an event and bump the version.
+        
+        Returns:
+            The new version
+        """
+        with self._lock:
+            self.version += 1
+            version = self.version
+            self._events.append(ChangeEvent(version, kind, task_id, priority))
+        self._notify(version)
+        return version
+    
+    def reset(self) -> None:
+        """Drop buffered events after a wholesale change; every client has to refetch."""
+        with self._lock:
+            self._events.clear()
+            self.version += 1
+            version = self.version
+        self._notify(version)
+    
+    def since(self, version: Optional[int]) -> dict:
+        """
+        Events after a version.
+        
+        Args:
+            version: Last version the client has applied; None to just learn the current version
+        
+        Returns:
+            Dictionary with the current version, the events after version (oldest first)
+            and reset, which is True when version is too old or unknown and the client
+            must refetch the full state
+        """
+        with self._lock:
+            current = self.version
+            if version is None or version == current:
+                return {"version": current, "events": [], "reset": False}
+            events = list(self._events)
+        oldest = events[0].version - 1 if events else current
+        current = events[-1].version if events else current
+        if version < oldest or version > current:
+            return {"version": current, "events": [], "reset": True}
+        return {
+            "version": current,
+            "events": [event._asdict() for event in events[version - oldest:]],
+            "reset": False,
+        }
+    
+    def _notify(self, version: int) -> None:
+        for listener in list(self.listeners):
+            listener(version)
+    
+    def __len__(self) -> int:
+        return len(self._events)
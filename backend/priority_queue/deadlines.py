@@ -0,0 +1,201 @@
+"""
+DeadlineIndex class.
+In-memory min-heap of open tasks keyed on due date, for overdue sweeps and reminders.
+"""
+
+import threading
+from datetime import datetime
+from heapq import heappop, heappush
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# (due_date, task_id); tuples compare by due date, then by ID
+DeadlineEntry = Tuple[datetime, int]
+
+# Called with (task_id, due_date) after a task is set, or (task_id, None) after it is removed
+DeadlineListener = Callable[[int, Optional[datetime]], None]
+
+
+class DeadlineIndex:
+    """
+    Open tasks with a due date, in a binary min-heap on (due_date, task_id).
+    
+    A task_id -> heap index map makes adding, moving and removing a task
+    O(log n), so the index can follow every task write. The earliest deadline
+    is read in O(1); sweeping the k tasks that have come due costs O(k log n)
+    and listing the k next deadlines without removing them O(k log k),
+    however many tasks are indexed. Methods are thread-safe. Listeners hear
+    about every set and removal (not bulk loads), on the writing thread.
+    """
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self._heap: List[DeadlineEntry] = []
+        self._positions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.listeners: List[DeadlineListener] = []
+    
+    def set(self, task_id: int, due_date: Optional[datetime]) -> None:
+        """
+        Index a task's due date, replacing any earlier one.
+        
+        Args:
+            task_id: Task ID
+            due_date: Due date; None removes the task
+        """
+        if due_date is None:
+            self.remove(task_id)
+            return
+        with self._lock:
+            index = self._positions.get(task_id)
+            if index is None:
+                self._heap.append((due_date, task_id))
+                index = len(self._heap) - 1
+                self._positions[task_id] = index
+                self._sift_up(index)
+            else:
+                old_due_date = self._heap[index][0]
+                self._heap[index] = (due_date, task_id)
+                if due_date < old_due_date:
+                    self._sift_up(index)
+                else:
+                    self._sift_down(index)
+        self._notify(task_id, due_date)
+    
+    def remove(self, task_id: int) -> bool:
+        """
+        Remove a task from the index.
+        
+        Returns:
+            True if the task was indexed, False otherwise
+        """
+        with self._lock:
+            index = self._positions.pop(task_id, None)
+            if index is None:
+                return False
+            last = self._heap.pop()
+            if index < len(self._heap):
+                # The last entry fills the hole and may belong above or below it
+                self._heap[index] = last
+                self._positions[last[1]] = index
+                self._sift_up(index)
+                self._sift_down(self._positions[last[1]])
+        self._notify(task_id, None)
+        return True
+    
+    def peek(self) -> Optional[DeadlineEntry]:
+        """The earliest (due_date, task_id), or None if the index is empty."""
+        with self._lock:
+            return self._heap[0] if self._heap else None
+    
+    def pop_due(self, now: datetime, limit: Optional[int] = None) -> List[DeadlineEntry]:
+        """
+        Remove and return the tasks due at or before now, earliest first.
+        
+        Args:
+            now: Cut-off time
+            limit: Maximum number of tasks to take; the rest stay indexed
+        """
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+                entry = self._heap[0]
+                self.remove(entry[1])
+                due.append(entry)
+        return due
+    
+    def due_before(self, until: datetime, limit: Optional[int] = None) -> List[DeadlineEntry]:
+        """
+        List the tasks due before a time, earliest first, leaving the index unchanged.
+        
+        Walks the heap best-first from the root with a frontier of candidate
+        children, so only the entries returned and their children are visited.
+        
+        Args:
+            until: Exclusive upper bound on the due date
+            limit: Maximum number of tasks to list
+        """
+        result = []
+        with self._lock:
+            heap = self._heap
+            frontier = [(heap[0], 0)] if heap and heap[0][0] < until else []
+            while frontier and (limit is None or len(result) < limit):
+                entry, index = heappop(frontier)
+                result.append(entry)
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap) and heap[child][0] < until:
+                        heappush(frontier, (heap[child], child))
+        return result
+    
+    def due_date(self, task_id: int) -> Optional[datetime]:
+        """A task's indexed due date, or None if it is not indexed."""
+        with self._lock:
+            index = self._positions.get(task_id)
+            return self._heap[index][0] if index is not None else None
+    
+    def entries(self) -> List[DeadlineEntry]:
+        """A copy of the indexed (due_date, task_id) pairs, in heap order."""
+        with self._lock:
+            return list(self._heap)
+    
+    def bulk_load(self, entries: Iterable[DeadlineEntry]) -> None:
+        """
+        Replace the index contents in O(n).
+        
+        Args:
+            entries: (due_date, task_id) pairs; entries already sorted (e.g. from an
+                ORDER BY due_date query) form a valid heap as they are
+        
+        Raises:
+            ValueError: If two entries share a task ID
+        """
+        heap = list(entries)
+        positions = {task_id: index for index, (_, task_id) in enumerate(heap)}
+        if len(positions) != len(heap):
+            raise ValueError("Duplicate task IDs in bulk load")
+        with self._lock:
+            self._heap = heap
+            self._positions = positions
+            for index in range(len(heap) // 2 - 1, -1, -1):
+                self._sift_down(index)
+    
+    def _notify(self, task_id: int, due_date: Optional[datetime]) -> None:
+        for listener in self.listeners:
+            listener(task_id, due_date)
+    
+    def _sift_up(self, index: int) -> None:
+        heap, positions = self._heap, self._positions
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if not entry < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            positions[heap[index][1]] = index
+            index = parent
+        heap[index] = entry
+        positions[entry[1]] = index
+    
+    def _sift_down(self, index: int) -> None:
+        heap, positions = self._heap, self._positions
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[index] = heap[child]
+            positions[heap[index][1]] = index
+            index = child
+        heap[index] = entry
+        positions[entry[1]] = index
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._positions
+
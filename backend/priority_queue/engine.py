@@ -3,44 +3,51 @@ Priority queue engine.
 Main engine for managing and processing priority queue operations.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Union
 from models.task import Task
+from priority_queue.priority_queue import QueueEntry, TaskLoader
 
 class PriorityQueueEngine:
     """
     Core priority queue engine.
     Handles task prioritization, queue management, and algorithm execution.
+    
+    The queue holds compact QueueEntry records (priority score and task ID) rather
+    than Task instances; task payloads are fetched on demand through task_loader.
     """
     
-    def __init__(self, algorithm: Optional[str] = "default"):
+    def __init__(self, algorithm: Optional[str] = "default", task_loader: Optional[TaskLoader] = None):
         """
         Initialize the priority queue engine.
         
         Args:
             algorithm: Algorithm name to use for prioritization
+            task_loader: Optional callable fetching a Task by ID, e.g. ``session.get``
+                bound to Task. Without it, lookups return QueueEntry records.
         """
         self.algorithm = algorithm
-        self.queue = []
+        self.task_loader = task_loader
+        self.queue: List[QueueEntry] = []
     
     def add_task(self, task: Task) -> None:
         """Add a task to the priority queue."""
-        self.queue.append(task)
+        self.queue.append(QueueEntry.from_task(task))
         self._reorder()
     
-    def remove_task(self, task_id: int) -> Optional[Task]:
+    def remove_task(self, task_id: int) -> Optional[Union[Task, QueueEntry]]:
         """Remove a task from the priority queue by ID."""
-        for i, task in enumerate(self.queue):
-            if task.id == task_id:
-                return self.queue.pop(i)
+        for i, entry in enumerate(self.queue):
+            if entry.task_id == task_id:
+                return self._resolve(self.queue.pop(i))
         return None
     
-    def get_next_task(self) -> Optional[Task]:
+    def get_next_task(self) -> Optional[Union[Task, QueueEntry]]:
         """Get the highest priority task without removing it."""
-        return self.queue[0] if self.queue else None
+        return self._resolve(self.queue[0]) if self.queue else None
     
-    def pop_next_task(self) -> Optional[Task]:
+    def pop_next_task(self) -> Optional[Union[Task, QueueEntry]]:
         """Get and remove the highest priority task."""
-        return self.queue.pop(0) if self.queue else None
+        return self._resolve(self.queue.pop(0)) if self.queue else None
     
     def reprioritize_all(self, tasks: List[Task]) -> List[Task]:
         """
@@ -48,24 +55,29 @@ class PriorityQueueEngine:
         
         Args:
             tasks: List of tasks to reprioritize
-            
+        
         Returns:
             List of tasks sorted by priority
         """
-        self.queue = tasks
+        self.queue = [QueueEntry.from_task(task) for task in tasks]
         self._reorder()
-        return self.queue
+        return sorted(tasks, key=lambda x: x.priority_score, reverse=True)
     
     def _reorder(self) -> None:
         """Internal method to reorder the queue based on priority."""
         self.queue.sort(key=lambda x: x.priority_score, reverse=True)
     
+    def _resolve(self, entry: QueueEntry) -> Optional[Union[Task, QueueEntry]]:
+        """Fetch the task payload for an entry through the task loader, if any."""
+        if self.task_loader is None:
+            return entry
+        return self.task_loader(entry.task_id)
+    
     def get_queue_state(self) -> dict:
         """Get current state of the priority queue."""
         return {
             "algorithm": self.algorithm,
             "queue_size": len(self.queue),
-            "tasks": [{"id": t.id, "title": t.title, "priority": t.priority_score} 
-                     for t in self.queue]
+            "tasks": [{"id": e.task_id, "priority": e.priority_score}
+                     for e in self.queue]
         }
-
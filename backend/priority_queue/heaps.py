@@ -0,0 +1,389 @@
+"""
+Heap backends.
+Interchangeable min-heaps the PriorityQueue keeps its entries in: binary, 4-ary and pairing heaps.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+# A QueueEntry: ordered by <, identified by task_id, keyed on a mutable priority_score
+Entry = Any
+
+
+class DaryHeap:
+    """
+    Array-backed d-ary min-heap with a task_id -> index map.
+    
+    Push, pop, priority changes and removals are O(log_d n). A wider heap is
+    shallower, so sifting up (push, priority decreases) visits fewer levels,
+    and the d children compared when sifting down sit next to each other in
+    the array; in exchange each level down costs d - 1 comparisons. A 4-ary
+    heap usually beats a binary one when priority changes outnumber pops.
+    """
+    
+    def __init__(self, arity: int = 2):
+        """
+        Initialize an empty heap.
+        
+        Args:
+            arity: Children per node (2 for a binary heap)
+        
+        Raises:
+            ValueError: If arity is below 2
+        """
+        if arity < 2:
+            raise ValueError("A heap needs at least two children per node")
+        self.arity = arity
+        self._heap: List[Entry] = []
+        self._positions: Dict[int, int] = {}
+    
+    def push(self, entry: Entry) -> None:
+        """Add an entry whose task is not in the heap."""
+        self._heap.append(entry)
+        self._positions[entry.task_id] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+    
+    def pop(self) -> Optional[Entry]:
+        """Remove and return the smallest entry, or None if the heap is empty."""
+        heap = self._heap
+        if not heap:
+            return None
+        top = heap[0]
+        last = heap.pop()
+        del self._positions[top.task_id]
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return top
+    
+    def peek(self) -> Optional[Entry]:
+        """The smallest entry, or None if the heap is empty."""
+        return self._heap[0] if self._heap else None
+    
+    def get(self, task_id: int) -> Optional[Entry]:
+        """A task's entry, or None if it is not in the heap."""
+        index = self._positions.get(task_id)
+        return self._heap[index] if index is not None else None
+    
+    def update(self, task_id: int, priority_score: float) -> Optional[float]:
+        """
+        Change a task's priority score and restore the heap order.
+        
+        Returns:
+            The previous priority score, or None if the task is not in the heap
+        """
+        index = self._positions.get(task_id)
+        if index is None:
+            return None
+        entry = self._heap[index]
+        old_priority = entry.priority_score
+        entry.priority_score = priority_score
+        if priority_score < old_priority:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+        return old_priority
+    
+    def remove(self, task_id: int) -> Optional[Entry]:
+        """
+        Remove a task's entry.
+        
+        Returns:
+            The removed entry, or None if the task is not in the heap
+        """
+        index = self._positions.pop(task_id, None)
+        if index is None:
+            return None
+        heap = self._heap
+        entry = heap[index]
+        last = heap.pop()
+        if index < len(heap):
+            # The last entry fills the hole and may belong above or below it
+            heap[index] = last
+            self._sift_up(index)
+            self._sift_down(self._positions[last.task_id])
+        return entry
+    
+    def entries(self) -> List[Entry]:
+        """The entries in heap (array) order."""
+        return list(self._heap)
+    
+    def load(self, entries: List[Entry], is_heap: bool = False) -> None:
+        """
+        Replace the heap contents in O(n); the list is taken over by the heap.
+        
+        Args:
+            entries: Entries with distinct task IDs
+            is_heap: Whether entries are already in this heap's order (from entries()
+                of a heap with the same arity)
+        """
+        self._heap = entries
+        self._positions = {entry.task_id: index for index, entry in enumerate(entries)}
+        if not is_heap:
+            for index in range((len(entries) - 2) // self.arity, -1, -1):
+                self._sift_down(index)
+    
+    def levels(self) -> List[List[Entry]]:
+        """The entries one list per tree level, root first."""
+        levels = []
+        start, width = 0, 1
+        while start < len(self._heap):
+            levels.append(self._heap[start:start + width])
+            start += width
+            width *= self.arity
+        return levels
+    
+    def _sift_up(self, index: int) -> None:
+        """Move the entry at index up until its parent is smaller."""
+        heap, positions, arity = self._heap, self._positions, self.arity
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) // arity
+            if not entry < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            positions[heap[index].task_id] = index
+            index = parent
+        heap[index] = entry
+        positions[entry.task_id] = index
+    
+    def _sift_down(self, index: int) -> None:
+        """Move the entry at index down until its children are larger."""
+        heap, positions, arity = self._heap, self._positions, self.arity
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            first = arity * index + 1
+            if first >= size:
+                break
+            smallest = first
+            for child in range(first + 1, min(first + arity, size)):
+                if heap[child] < heap[smallest]:
+                    smallest = child
+            if not heap[smallest] < entry:
+                break
+            heap[index] = heap[smallest]
+            positions[heap[index].task_id] = index
+            index = smallest
+        heap[index] = entry
+        positions[entry.task_id] = index
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._positions
+
+
+class _PairingNode:
+    """Pairing heap node: first child, next sibling, and the parent (first child) or previous sibling."""
+    __slots__ = ("entry", "child", "sibling", "prev")
+    
+    def __init__(self, entry: Entry):
+        self.entry = entry
+        self.child: Optional["_PairingNode"] = None
+        self.sibling: Optional["_PairingNode"] = None
+        self.prev: Optional["_PairingNode"] = None
+
+
+class PairingHeap:
+    """
+    Pairing heap: a multi-way tree of nodes with a task_id -> node map.
+    
+    Push and priority decreases are O(1) (the node is cut out and linked to
+    the root), so a workload dominated by tasks becoming more urgent does
+    little work per change; pops pay for it with a two-pass pairing of the
+    root's children, O(log n) amortized. Priority increases and removals cut
+    the node out and pair its children, also O(log n) amortized. Nodes are
+    separate objects, so the heap uses more memory than the array heaps.
+    """
+    
+    def __init__(self):
+        """Initialize an empty heap."""
+        self._root: Optional[_PairingNode] = None
+        self._nodes: Dict[int, _PairingNode] = {}
+    
+    def push(self, entry: Entry) -> None:
+        """Add an entry whose task is not in the heap."""
+        node = _PairingNode(entry)
+        self._nodes[entry.task_id] = node
+        self._root = node if self._root is None else self._meld(self._root, node)
+    
+    def pop(self) -> Optional[Entry]:
+        """Remove and return the smallest entry, or None if the heap is empty."""
+        root = self._root
+        if root is None:
+            return None
+        del self._nodes[root.entry.task_id]
+        self._root = self._merge_pairs(root.child)
+        root.child = None
+        return root.entry
+    
+    def peek(self) -> Optional[Entry]:
+        """The smallest entry, or None if the heap is empty."""
+        return self._root.entry if self._root is not None else None
+    
+    def get(self, task_id: int) -> Optional[Entry]:
+        """A task's entry, or None if it is not in the heap."""
+        node = self._nodes.get(task_id)
+        return node.entry if node is not None else None
+    
+    def update(self, task_id: int, priority_score: float) -> Optional[float]:
+        """
+        Change a task's priority score and restore the heap order.
+        
+        Returns:
+            The previous priority score, or None if the task is not in the heap
+        """
+        node = self._nodes.get(task_id)
+        if node is None:
+            return None
+        old_priority = node.entry.priority_score
+        node.entry.priority_score = priority_score
+        if node is self._root:
+            if priority_score > old_priority and node.child is not None:
+                # The root may no longer be the smallest; reinsert it above its paired children
+                self._root = self._merge_pairs(node.child)
+                node.child = None
+                self._root = self._meld(self._root, node)
+        elif priority_score < old_priority:
+            self._cut(node)
+            self._root = self._meld(self._root, node)
+        elif priority_score > old_priority:
+            self._detach(node)
+            self._root = node if self._root is None else self._meld(self._root, node)
+        return old_priority
+    
+    def remove(self, task_id: int) -> Optional[Entry]:
+        """
+        Remove a task's entry.
+        
+        Returns:
+            The removed entry, or None if the task is not in the heap
+        """
+        node = self._nodes.pop(task_id, None)
+        if node is None:
+            return None
+        if node is self._root:
+            self._root = self._merge_pairs(node.child)
+            node.child = None
+        else:
+            self._detach(node)
+        return node.entry
+    
+    def entries(self) -> List[Entry]:
+        """The entries in breadth-first order, root first."""
+        return [entry for level in self.levels() for entry in level]
+    
+    def load(self, entries: List[Entry], is_heap: bool = False) -> None:
+        """
+        Replace the heap contents in O(n).
+        
+        Args:
+            entries: Entries with distinct task IDs
+            is_heap: Ignored; any order pairs up into a valid heap
+        """
+        nodes = [_PairingNode(entry) for entry in entries]
+        self._nodes = {node.entry.task_id: node for node in nodes}
+        # Meld neighbours round by round, so the tree is balanced rather than one wide root
+        while len(nodes) > 1:
+            paired = [self._meld(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+            if len(nodes) % 2:
+                paired.append(nodes[-1])
+            nodes = paired
+        self._root = nodes[0] if nodes else None
+    
+    def levels(self) -> List[List[Entry]]:
+        """The entries one list per tree level, root first."""
+        levels = []
+        level = [self._root] if self._root is not None else []
+        while level:
+            levels.append([node.entry for node in level])
+            children = []
+            for node in level:
+                child = node.child
+                while child is not None:
+                    children.append(child)
+                    child = child.sibling
+            level = children
+        return levels
+    
+    def _meld(self, first: _PairingNode, second: _PairingNode) -> _PairingNode:
+        """Link two detached trees, the larger root becoming the first child of the smaller."""
+        if second.entry < first.entry:
+            first, second = second, first
+        child = first.child
+        second.sibling = child
+        if child is not None:
+            child.prev = second
+        second.prev = first
+        first.child = second
+        return first
+    
+    def _merge_pairs(self, first: Optional[_PairingNode]) -> Optional[_PairingNode]:
+        """Two-pass pairing of a sibling list into one detached tree."""
+        pairs = []
+        node = first
+        while node is not None:
+            second = node.sibling
+            node.prev = node.sibling = None
+            if second is None:
+                pairs.append(node)
+                break
+            following = second.sibling
+            second.prev = second.sibling = None
+            pairs.append(self._meld(node, second))
+            node = following
+        if not pairs:
+            return None
+        root = pairs.pop()
+        while pairs:
+            root = self._meld(pairs.pop(), root)
+        return root
+    
+    def _cut(self, node: _PairingNode) -> None:
+        """Unlink a non-root node, with its subtree, from its parent and siblings."""
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = node.sibling = None
+    
+    def _detach(self, node: _PairingNode) -> None:
+        """Take a non-root node out of the tree alone, melding its children back in."""
+        self._cut(node)
+        children = self._merge_pairs(node.child)
+        node.child = None
+        if children is not None:
+            self._root = self._meld(self._root, children)
+    
+    def __len__(self) -> int:
+        return len(self._nodes)
+    
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._nodes
+
+
+HEAP_BACKENDS: Dict[str, Callable[[], Any]] = {
+    "binary": lambda: DaryHeap(2),
+    "4-ary": lambda: DaryHeap(4),
+    "pairing": PairingHeap,
+}
+
+
+def heap_backend(name: Optional[str] = None):
+    """
+    Create an empty heap backend.
+    
+    Args:
+        name: Backend name; defaults to QUEUE_HEAP (or "binary")
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    name = name or os.getenv("QUEUE_HEAP", "binary")
+    if name not in HEAP_BACKENDS:
+        raise ValueError(f"Unknown heap backend '{name}'")
+    return HEAP_BACKENDS[name]()
@@ -0,0 +1,182 @@
+"""
+Priority queue persistence.
+Binary snapshots plus an append-only operation log so the queue restarts without touching the database.
+"""
+
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Optional
+
+from priority_queue.priority_queue import PriorityQueue, QueueEntry, TaskLoader
+
+SNAPSHOT_FILE = "queue.snapshot"
+LOG_FILE = "queue.log"
+
+# Snapshot: magic, entry count, then int64 task ids and float64 scores in the queue's entries() order
+_SNAPSHOT_HEADER = struct.Struct("<8sQ")
+_SNAPSHOT_MAGIC = b"PFQSNAP1"
+
+# Log record: operation code, task id, priority score
+_LOG_RECORD = struct.Struct("<Bqd")
+OP_PUSH = 1
+OP_DELETE = 2
+OP_UPDATE = 3
+
+
+class QueueStore:
+    """
+    Durable storage for a PriorityQueue.
+    
+    Every mutation is appended to the operation log; fsyncs are batched so one
+    fsync covers up to sync_every operations or sync_interval seconds of writes.
+    checkpoint() writes a fresh snapshot and truncates the log. Replaying the log
+    over a snapshot is idempotent, so a crash between the two steps is harmless.
+    """
+    
+    def __init__(self, directory: str, sync_every: int = 256, sync_interval: float = 0.05):
+        """
+        Open (or create) a queue store.
+        
+        Args:
+            directory: Directory holding the snapshot and log files
+            sync_every: Maximum number of logged operations per fsync
+            sync_interval: Maximum seconds a logged operation waits for fsync
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.ops_since_checkpoint = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._log = open(self.log_path, "ab")
+    
+    def load(self, task_loader: Optional[TaskLoader] = None) -> PriorityQueue:
+        """
+        Rebuild the queue from the snapshot and the log tail.
+        
+        Args:
+            task_loader: Task loader passed to the rebuilt queue
+        
+        Returns:
+            The restored priority queue
+        """
+        queue = PriorityQueue(task_loader=task_loader)
+        if os.path.exists(self.snapshot_path) and os.path.getsize(self.snapshot_path) > 0:
+            # Heapified rather than trusted: the snapshot may be from another heap backend
+            queue.bulk_load(self._read_snapshot())
+        self.ops_since_checkpoint = self._replay_log(queue)
+        queue.changes.reset()  # Replayed operations are not news to any client
+        return queue
+    
+    def _read_snapshot(self):
+        """Map the snapshot file and decode its entries."""
+        with open(self.snapshot_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, count = _SNAPSHOT_HEADER.unpack_from(mapped, 0)
+                if magic != _SNAPSHOT_MAGIC:
+                    raise ValueError(f"{self.snapshot_path} is not a queue snapshot")
+                offset = _SNAPSHOT_HEADER.size
+                ids = array("q")
+                scores = array("d")
+                ids.frombytes(mapped[offset:offset + 8 * count])
+                scores.frombytes(mapped[offset + 8 * count:offset + 16 * count])
+        return list(map(QueueEntry, scores, ids))
+    
+    def _replay_log(self, queue: PriorityQueue) -> int:
+        """Apply every complete log record to the queue and return how many there were."""
+        self._log.flush()
+        with open(self.log_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % _LOG_RECORD.size  # drop a torn final record
+        replayed = 0
+        for operation, task_id, priority_score in _LOG_RECORD.iter_unpack(data[:usable]):
+            if operation == OP_PUSH:
+                if not queue.update_priority(task_id, priority_score):
+                    queue.push(QueueEntry(priority_score, task_id))
+            elif operation == OP_UPDATE:
+                queue.update_priority(task_id, priority_score)
+            elif operation == OP_DELETE:
+                queue.delete(task_id)
+            replayed += 1
+        if usable != len(data):
+            self._log.truncate(usable)
+        return replayed
+    
+    def log_push(self, task_id: int, priority_score: float) -> None:
+        """Record a push."""
+        self._append(OP_PUSH, task_id, priority_score)
+    
+    def log_update(self, task_id: int, priority_score: float) -> None:
+        """Record a priority update."""
+        self._append(OP_UPDATE, task_id, priority_score)
+    
+    def log_delete(self, task_id: int) -> None:
+        """Record a delete (pops are logged as deletes of the popped task)."""
+        self._append(OP_DELETE, task_id, 0.0)
+    
+    def _append(self, operation: int, task_id: int, priority_score: float) -> None:
+        self._log.write(_LOG_RECORD.pack(operation, task_id, priority_score))
+        self.ops_since_checkpoint += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+    
+    def maybe_sync(self) -> None:
+        """fsync the log if the oldest unsynced operation has waited sync_interval."""
+        if self._unsynced and time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+    
+    def sync(self) -> None:
+        """Flush and fsync all logged operations."""
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def checkpoint(self, queue: PriorityQueue) -> None:
+        """
+        Write a snapshot of the queue and truncate the log.
+        
+        Args:
+            queue: Queue whose current state becomes the new snapshot
+        """
+        entries = queue.entries()
+        ids = array("q", [entry.task_id for entry in entries])
+        scores = array("d", [entry.priority_score for entry in entries])
+        
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(entries)))
+            ids.tofile(f)
+            scores.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self._fsync_directory()
+        
+        self._log.close()
+        self._log = open(self.log_path, "wb")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self.ops_since_checkpoint = 0
+        self._unsynced = 0
+    
+    def _fsync_directory(self) -> None:
+        """Make the snapshot rename durable."""
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def close(self) -> None:
+        """Sync and close the log."""
+        if not self._log.closed:
+            self.sync()
+            self._log.close()
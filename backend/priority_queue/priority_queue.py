@@ -3,196 +3,314 @@ PriorityQueue class.
 Heap-based priority queue implementation for task management.
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+import math
+import os
+import threading
+from typing import Optional, List, Dict, Any, Callable, Union
 from models.task import Task
+from monitoring.metrics import QUEUE_OPERATION_SECONDS, timed
+from priority_queue.heaps import heap_backend
+from priority_queue.changes import ADDED, COMPLETED, DEFAULT_CAPACITY, PRIORITY_CHANGED, REMOVED, UPDATED, ChangeLog
+
+TaskLoader = Callable[[int], Optional[Task]]
+
+
+class QueueEntry:
+    """
+    Compact heap entry holding only a task's priority score and ID.
+    Uses __slots__ so each entry costs tens of bytes instead of a full ORM instance.
+    """
+    __slots__ = ("priority_score", "task_id")
+    
+    def __init__(self, priority_score: float, task_id: int):
+        self.priority_score = priority_score
+        self.task_id = task_id
+    
+    @property
+    def id(self) -> int:
+        """Task ID, so entries can be used wherever a task reference is expected."""
+        return self.task_id
+    
+    def __lt__(self, other: "QueueEntry") -> bool:
+        if self.priority_score != other.priority_score:
+            return self.priority_score < other.priority_score
+        return self.task_id < other.task_id
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, QueueEntry):
+            return NotImplemented
+        return self.priority_score == other.priority_score and self.task_id == other.task_id
+    
+    def __hash__(self) -> int:
+        # The task ID alone: equal entries share it, and it stays fixed while the
+        # queue changes priority_score in place
+        return hash(self.task_id)
+    
+    def __getstate__(self):
+        return (self.priority_score, self.task_id)
+    
+    def __setstate__(self, state):
+        self.priority_score, self.task_id = state
+    
+    def __repr__(self):
+        return f"<QueueEntry(task_id={self.task_id}, priority_score={self.priority_score})>"
+    
+    @classmethod
+    def from_task(cls, task: Task) -> "QueueEntry":
+        """
+        Build an entry from a task (or anything with id and priority_score).
+        
+        Raises:
+            ValueError: If task is None or has no id or priority score
+        """
+        if task is None:
+            raise ValueError("Cannot queue None")
+        task_id = getattr(task, "id", None)
+        priority_score = getattr(task, "priority_score", None)
+        if task_id is None:
+            raise ValueError("Task must have an id to be queued")
+        if priority_score is None:
+            raise ValueError(f"Task {task_id} has no priority score")
+        return cls(float(priority_score), task_id)
 
 
 class PriorityQueue:
     """
-    Priority queue implementation using a binary min-heap.
+    Priority queue kept in a selectable min-heap backend.
     Tasks are ordered by priority score (lower score = higher priority).
     Supports efficient insertion, deletion, and priority updates.
+    
+    Thread-safe: API handlers, the job workers and the reminder scheduler share
+    one queue, so every heap and change log operation holds the queue's lock.
     """
     
-    def __init__(self):
+    def __init__(self, task_loader: Optional[TaskLoader] = None, change_log_size: int = DEFAULT_CAPACITY,
+                 heap: Optional[str] = None):
         """
         Initialize an empty priority queue.
         
-        The queue is implemented as a list that maintains heap property.
-        Each element is a tuple (priority_score, task_id, task_object).
+        Each element is a compact QueueEntry (priority_score, task_id); task
+        objects are never held by the queue, so ORM instances cannot go stale in it.
+        The heap backend keeps a task_id -> position map, so updates and deletes
+        find their entry in O(1). Every mutation is recorded in a versioned
+        change log (see get_changes).
+        
+        Args:
+            task_loader: Optional callable fetching a Task by ID. When given, pop()
+                and peek() return loaded tasks; otherwise they return entries.
+            change_log_size: Number of change events kept for clients catching up
+            heap: Heap backend ("binary", "4-ary" or "pairing"); defaults to QUEUE_HEAP
+        
+        Raises:
+            ValueError: If the heap backend is unknown
         """
-        pass
+        self.heap_name = heap or os.getenv("QUEUE_HEAP", "binary")
+        self._heap = heap_backend(self.heap_name)
+        self.task_loader = task_loader
+        self.changes = ChangeLog(change_log_size)
+        self._lock = threading.Lock()
     
+    @timed(QUEUE_OPERATION_SECONDS, operation="push", queue="local")
     def push(self, task: Task) -> None:
         """
         Add a task to the priority queue.
         
         Args:
             task: Task object to add to the queue
-            
+        
         Raises:
             ValueError: If task is None or invalid
         """
-        pass
+        entry = QueueEntry.from_task(task)
+        with self._lock:
+            if entry.task_id in self._heap:
+                raise ValueError(f"Task {entry.task_id} is already in the queue")
+            
+            self._heap.push(entry)
+            self.changes.record(ADDED, entry.task_id, entry.priority_score)
     
-    def pop(self) -> Optional[Task]:
+    @timed(QUEUE_OPERATION_SECONDS, operation="pop", queue="local")
+    def pop(self) -> Optional[Union[Task, QueueEntry]]:
         """
         Remove and return the highest priority task (lowest priority score).
         
         Returns:
-            Task with the highest priority, or None if queue is empty
-            
-        Raises:
-            IndexError: If queue is empty
-        """
-        pass
+            Task with the highest priority (its QueueEntry when no task_loader
+            is configured), or None if queue is empty
+        """
+        with self._lock:
+            entry = self._heap.pop()
+            if entry is None:
+                return None
+            self.changes.record(REMOVED, entry.task_id)
+        return self._resolve(entry)
     
-    def update_priority(self, task_id: int, new_priority: float) -> bool:
+    @timed(QUEUE_OPERATION_SECONDS, operation="update_priority", queue="local")
+    def update_priority(self, task_id: int, new_priority: float, record_unchanged: bool = True) -> bool:
         """
         Update the priority of an existing task in the queue.
         
+        Setting the current priority again records an "updated" change, so
+        callers can signal edits to a task that leave its rank alone.
+        
         Args:
             task_id: ID of the task to update
             new_priority: New priority score for the task
-            
+            record_unchanged: Whether an unchanged priority records an "updated"
+                change; bulk re-scoring passes False so no-ops stay out of the change log
+        
         Returns:
             True if task was found and updated, False otherwise
-            
+        
         Raises:
-            ValueError: If task_id is invalid or priority is negative
+            ValueError: If task_id is invalid or priority is not a number
         """
-        pass
+        if task_id is None:
+            raise ValueError("task_id is required")
+        if new_priority is None or math.isnan(new_priority):
+            raise ValueError("Priority score must be a number")
+        
+        new_priority = float(new_priority)
+        with self._lock:
+            old_priority = self._heap.update(task_id, new_priority)
+            if old_priority is None:
+                return False
+            if new_priority == old_priority:
+                if record_unchanged:
+                    self.changes.record(UPDATED, task_id, old_priority)
+            else:
+                self.changes.record(PRIORITY_CHANGED, task_id, new_priority)
+        return True
     
-    def delete(self, task_id: int) -> bool:
+    @timed(QUEUE_OPERATION_SECONDS, operation="delete", queue="local")
+    def delete(self, task_id: int, completed: bool = False) -> bool:
         """
         Remove a task from the queue by its ID.
         
         Args:
             task_id: ID of the task to remove
-            
+            completed: Whether the task leaves the queue because it was completed
+        
         Returns:
             True if task was found and removed, False otherwise
         """
-        pass
+        with self._lock:
+            if self._heap.remove(task_id) is None:
+                return False
+            self.changes.record(COMPLETED if completed else REMOVED, task_id)
+        return True
     
-    def peek(self) -> Optional[Task]:
+    @timed(QUEUE_OPERATION_SECONDS, operation="peek", queue="local")
+    def peek(self) -> Optional[Union[Task, QueueEntry]]:
         """
         Get the highest priority task without removing it.
         
         Returns:
-            Task with the highest priority, or None if queue is empty
+            Task with the highest priority (its QueueEntry when no task_loader
+            is configured), or None if queue is empty
         """
-        pass
+        with self._lock:
+            entry = self._heap.peek()
+        return self._resolve(entry) if entry is not None else None
     
-    def get_snapshot(self) -> Dict[str, Any]:
+    def entries(self) -> List[QueueEntry]:
         """
-        Get a snapshot of the queue structure for visualization.
-        
-        Returns a dictionary containing:
-        - queue_size: Number of tasks in the queue
-        - tasks: List of tasks with their positions and priorities
-        - heap_structure: Representation of the heap structure
-        - top_priority: The current highest priority task info
+        Get the queued entries in heap order.
         
         Returns:
-            Dictionary with queue state information for visualization
+            List of QueueEntry objects (not a copy of the entries themselves)
         """
-        pass
+        with self._lock:
+            return self._heap.entries()
     
-    def _heapify_up(self, index: int) -> None:
+    @timed(QUEUE_OPERATION_SECONDS, operation="bulk_load", queue="local")
+    def bulk_load(self, entries: List[QueueEntry], is_heap: bool = False) -> None:
         """
-        Maintain heap property by moving an element up the heap.
-        
-        Used after inserting a new element or decreasing its priority.
-        Compares the element with its parent and swaps if necessary.
+        Replace the queue contents with the given entries in O(n).
         
         Args:
-            index: Index of the element to heapify up
-            
-        Raises:
-            IndexError: If index is out of bounds
-        """
-        pass
-    
-    def _heapify_down(self, index: int) -> None:
-        """
-        Maintain heap property by moving an element down the heap.
-        
-        Used after removing an element or increasing its priority.
-        Compares the element with its children and swaps with the smaller child.
+            entries: Entries to load; the list is taken over by the queue
+            is_heap: Whether entries are already in heap order (e.g. from entries()
+                of a queue with the same heap backend)
         
-        Args:
-            index: Index of the element to heapify down
-            
         Raises:
-            IndexError: If index is out of bounds
+            ValueError: If two entries share a task ID
         """
-        pass
+        if len({entry.task_id for entry in entries}) != len(entries):
+            raise ValueError("Duplicate task IDs in bulk load")
+        with self._lock:
+            self._heap.load(entries, is_heap)
+            self.changes.reset()
     
-    def _find_task_index(self, task_id: int) -> Optional[int]:
+    def notify(self, kind: str, task_id: int) -> int:
         """
-        Find the index of a task in the heap by its ID.
+        Record an event about a task in the change log without changing the queue
+        (e.g. a deadline reminder), so change feed clients receive it in order.
         
-        Internal helper method for update_priority and delete operations.
-        
-        Args:
-            task_id: ID of the task to find
-            
         Returns:
-            Index of the task in the heap, or None if not found
+            The new version
         """
-        pass
+        with self._lock:
+            return self.changes.record(kind, task_id)
     
-    def _swap(self, index1: int, index2: int) -> None:
-        """
-        Swap two elements in the heap.
-        
-        Internal helper method for heapify operations.
-        
-        Args:
-            index1: Index of first element
-            index2: Index of second element
-            
-        Raises:
-            IndexError: If either index is out of bounds
-        """
-        pass
+    @property
+    def version(self) -> int:
+        """Version of the queue contents; grows with every mutation."""
+        return self.changes.version
     
-    def _get_parent_index(self, index: int) -> Optional[int]:
+    def get_changes(self, since: Optional[int] = None) -> Dict[str, Any]:
         """
-        Get the index of the parent node.
+        Get the changes made after a version.
         
         Args:
-            index: Index of the child node
-            
-        Returns:
-            Index of the parent node, or None if root
-        """
-        pass
-    
-    def _get_left_child_index(self, index: int) -> Optional[int]:
-        """
-        Get the index of the left child node.
+            since: Last version the caller has seen; None to get the current version only
         
-        Args:
-            index: Index of the parent node
-            
         Returns:
-            Index of the left child, or None if no child exists
+            Dictionary with version, events ({version, kind, task_id, priority}, oldest
+            first) and reset, True when since is no longer covered by the change log
+            and the caller has to reload the whole queue
         """
-        pass
+        return self.changes.since(since)
     
-    def _get_right_child_index(self, index: int) -> Optional[int]:
+    def _resolve(self, entry: QueueEntry) -> Union[Task, QueueEntry, None]:
+        """Fetch the task payload for an entry through the task loader, if any."""
+        if self.task_loader is None:
+            return entry
+        return self.task_loader(entry.task_id)
+    
+    def get_snapshot(self) -> Dict[str, Any]:
         """
-        Get the index of the right child node.
+        Get a snapshot of the queue structure for visualization.
+        
+        Returns a dictionary containing:
+        - queue_size: Number of tasks in the queue
+        - heap: Name of the heap backend
+        - tasks: List of tasks with their positions and priorities
+        - heap_structure: Representation of the heap structure
+        - top_priority: The current highest priority task info
+        
+        Tasks are listed in priority order; ``position`` is the index in
+        entries() (the array index for the binary and 4-ary heaps).
         
-        Args:
-            index: Index of the parent node
-            
         Returns:
-            Index of the right child, or None if no child exists
+            Dictionary with queue state information for visualization
         """
-        pass
+        with self._lock:
+            tasks = [
+                {"id": entry.task_id, "priority": entry.priority_score, "position": position}
+                for position, entry in enumerate(self._heap.entries())
+            ]
+            # One list of task ids per heap level, root first
+            heap_structure = [[entry.task_id for entry in level] for level in self._heap.levels()]
+        tasks.sort(key=lambda t: (t["priority"], t["id"]))
+        
+        return {
+            "queue_size": len(tasks),
+            "heap": self.heap_name,
+            "tasks": tasks,
+            "heap_structure": heap_structure,
+            "top_priority": tasks[0] if tasks else None,
+        }
     
     def __len__(self) -> int:
         """
@@ -201,7 +319,7 @@ class PriorityQueue:
         Returns:
             Number of tasks in the priority queue
         """
-        pass
+        return len(self._heap)
     
     def __bool__(self) -> bool:
         """
@@ -210,7 +328,7 @@ class PriorityQueue:
         Returns:
             True if queue has tasks, False if empty
         """
-        pass
+        return len(self._heap) > 0
     
     def is_empty(self) -> bool:
         """
@@ -219,5 +337,4 @@ class PriorityQueue:
         Returns:
             True if queue is empty, False otherwise
         """
-        pass
-
+        return len(self._heap) == 0
@@ -0,0 +1,526 @@
+"""
+Priority queue service.
+Runs a single PriorityQueue in a dedicated process that API workers reach over IPC.
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener
+from typing import Any, List, Optional, Tuple, Union
+
+from monitoring.metrics import QUEUE_OPERATION_SECONDS, timed
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
+from priority_queue.persistence import QueueStore
+from priority_queue.shared_snapshot import SharedQueueSnapshot
+
+Address = Union[str, Tuple[str, int]]
+
+# Every request message is a batch: a list of (operation, args) tuples.
+# Every reply is a list of (status, value) tuples in the same order.
+Operation = Tuple[str, tuple]
+
+DEFAULT_MAX_BATCH = 512
+# Batches a client sends ahead of their replies. The server answers one batch before
+# reading the next, so unread replies must never fill the socket buffer: with both
+# directions full, both sides would block in send.
+MAX_IN_FLIGHT = 4
+
+
+class QueueServiceError(Exception):
+    """Raised on the client when the service rejects an operation."""
+
+
+def require_authkey(address: Address, authkey: Optional[bytes]) -> None:
+    """
+    Refuse TCP connections without a shared secret.
+
+    Messages are pickles, so whoever can talk to the service can run code in
+    it (and a fake service can run code in its clients). A Unix socket is
+    guarded by file permissions; a TCP port has only the authkey.
+
+    Raises:
+        ValueError: If address is (host, port) and authkey is empty
+    """
+    if not isinstance(address, str) and not authkey:
+        raise ValueError("A TCP queue service address requires an authkey (QUEUE_SERVICE_AUTHKEY)")
+
+
+class QueueServer:
+    """
+    Hosts the single source-of-truth PriorityQueue.
+    Each client connection is served by its own thread; operations are
+    applied under one lock so batches are atomic with respect to each other.
+    """
+
+    OPERATIONS = ("push", "pop", "peek", "update_priority", "delete", "size", "snapshot", "changes", "notify", "ping")
+    MUTATIONS = ("push", "pop", "update_priority", "delete")
+
+    def __init__(
+        self,
+        address: Address,
+        authkey: Optional[bytes] = None,
+        snapshot: Optional[SharedQueueSnapshot] = None,
+        publish_interval: float = 0.05,
+        store: Optional[QueueStore] = None,
+        checkpoint_every: int = 100000,
+    ):
+        """
+        Initialize the queue server.
+
+        Args:
+            address: Unix socket path or (host, port) tuple to listen on
+            authkey: Shared secret clients must present; required for TCP addresses
+            snapshot: Optional shared-memory snapshot to keep up to date for readers
+            publish_interval: Minimum seconds between snapshot publishes
+            store: Optional store the queue is restored from and journaled to
+            checkpoint_every: Logged operations between automatic snapshots
+
+        Raises:
+            ValueError: If address is TCP and no authkey is given
+        """
+        require_authkey(address, authkey)
+        self.address = address
+        self.authkey = authkey
+        self.store = store
+        self.checkpoint_every = checkpoint_every
+        self.queue = store.load() if store is not None else PriorityQueue()
+        self.snapshot = snapshot
+        self.publish_interval = publish_interval
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._listener: Optional[Listener] = None
+        self._running = False
+        self._closed = False  # Set under the lock once the store is checkpointed for shutdown
+
+    def handle_batch(self, batch: List[Operation]) -> List[Tuple[str, Any]]:
+        """
+        Apply a batch of operations to the queue.
+
+        Args:
+            batch: List of (operation, args) tuples
+
+        Returns:
+            List of ("ok", result) or ("error", message) tuples
+        """
+        results = []
+        with self._lock:
+            if self._closed:
+                # The final checkpoint is written; a mutation now would be lost
+                return [("error", "QueueServiceError: the queue service is shutting down")] * len(batch)
+            for operation, args in batch:
+                try:
+                    results.append(("ok", self._apply(operation, args)))
+                except Exception as e:
+                    results.append(("error", f"{type(e).__name__}: {e}"))
+            if self.store is not None:
+                if self.store.ops_since_checkpoint >= self.checkpoint_every:
+                    self.store.checkpoint(self.queue)
+                else:
+                    self.store.maybe_sync()
+        return results
+
+    def publish_snapshot(self) -> None:
+        """Publish the current ranking to the shared-memory snapshot."""
+        if self.snapshot is None:
+            return
+        self._dirty.clear()
+        with self._lock:
+            if not self._closed:
+                self.snapshot.publish_queue(self.queue)
+
+    def _publish_loop(self) -> None:
+        """Coalesce mutations into at most one publish per interval."""
+        while self._running:
+            if self._dirty.wait(timeout=0.5):
+                self.publish_snapshot()
+                time.sleep(self.publish_interval)
+
+    def _sync_loop(self) -> None:
+        """Bound how long a journaled operation can wait for fsync while the server is idle."""
+        while self._running:
+            time.sleep(self.store.sync_interval)
+            with self._lock:
+                if not self._closed:
+                    self.store.maybe_sync()
+
+    def _apply(self, operation: str, args: tuple) -> Any:
+        """Dispatch one operation to the underlying queue, journaling mutations."""
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"Unknown queue operation '{operation}'")
+        if operation in self.MUTATIONS:
+            result = self._mutate(operation, args)
+            self._dirty.set()
+            return result
+        if operation == "size":
+            return len(self.queue)
+        if operation == "snapshot":
+            return self.queue.get_snapshot()
+        if operation == "changes":
+            return self.queue.get_changes(*args)
+        if operation == "notify":
+            return self.queue.notify(*args)  # Change log only; nothing to journal
+        if operation == "ping":
+            return "pong"
+        return self.queue.peek()
+
+    def _mutate(self, operation: str, args: tuple) -> Any:
+        """Apply a mutation and record it in the store."""
+        store = self.store
+        if operation == "push":
+            task_id, priority_score = args
+            self.queue.push(QueueEntry(priority_score, task_id))
+            if store is not None:
+                store.log_push(task_id, priority_score)
+            return None
+        if operation == "pop":
+            entry = self.queue.pop()
+            if entry is not None and store is not None:
+                store.log_delete(entry.task_id)
+            return entry
+        if operation == "update_priority":
+            task_id, new_priority = args[:2]
+            updated = self.queue.update_priority(*args)  # (task_id, new_priority[, record_unchanged])
+            if updated and store is not None:
+                store.log_update(task_id, new_priority)
+            return updated
+        task_id = args[0]
+        deleted = self.queue.delete(*args)  # (task_id,) or (task_id, completed)
+        if deleted and store is not None:
+            store.log_delete(task_id)
+        return deleted
+
+    def serve_forever(self) -> None:
+        """Accept connections until shutdown() is called."""
+        self._remove_stale_socket()
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)  # Only the service's own user may connect
+        self._running = True
+        if self.snapshot is not None:
+            self.publish_snapshot()
+            threading.Thread(target=self._publish_loop, daemon=True).start()
+        if self.store is not None:
+            threading.Thread(target=self._sync_loop, daemon=True).start()
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _remove_stale_socket(self) -> None:
+        """Unlink a Unix socket left behind by a service that was killed."""
+        if not isinstance(self.address, str) or not os.path.exists(self.address):
+            return
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except ConnectionRefusedError:
+            os.unlink(self.address)
+
+    def _serve_connection(self, conn) -> None:
+        """Answer batches from one client, in order, until it disconnects."""
+        with conn:
+            while True:
+                try:
+                    batch = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self.handle_batch(batch))
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting connections and checkpoint the queue.
+
+        Batches already applied are in the checkpoint; connections still open
+        get an error for every later batch instead of a mutation the store
+        would no longer record.
+        """
+        self._running = False
+        if self._listener is not None:
+            self._listener.close()
+        with self._lock:
+            self._closed = True
+            if self.store is not None:
+                self.store.checkpoint(self.queue)
+                self.store.close()
+
+
+class Pipeline:
+    """
+    Buffers operations and sends them to the service in as few round trips as possible.
+    Batches of up to max_batch operations are written ahead of their replies, up to
+    MAX_IN_FLIGHT at a time, so the service works through them while the client is
+    still sending.
+    """
+
+    def __init__(self, client: "QueueClient", max_batch: int = DEFAULT_MAX_BATCH):
+        """
+        Initialize a pipeline.
+
+        Args:
+            client: Connected queue client
+            max_batch: Maximum number of operations per message
+        """
+        self.client = client
+        self.max_batch = max_batch
+        self._operations: List[Operation] = []
+
+    def push(self, task) -> "Pipeline":
+        """Queue a push of a task (anything with id and priority_score)."""
+        self._operations.append(("push", QueueClient._task_args(task)))
+        return self
+
+    def pop(self) -> "Pipeline":
+        """Queue a pop."""
+        self._operations.append(("pop", ()))
+        return self
+
+    def update_priority(self, task_id: int, new_priority: float, record_unchanged: bool = True) -> "Pipeline":
+        """Queue a priority update."""
+        self._operations.append(("update_priority", (task_id, new_priority, record_unchanged)))
+        return self
+
+    def delete(self, task_id: int, completed: bool = False) -> "Pipeline":
+        """Queue a delete."""
+        self._operations.append(("delete", (task_id, completed)))
+        return self
+
+    def notify(self, kind: str, task_id: int) -> "Pipeline":
+        """Queue a change log event."""
+        self._operations.append(("notify", (kind, task_id)))
+        return self
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="pipeline", queue="service")
+    def execute(self, raise_on_error: bool = True) -> List[Any]:
+        """
+        Send all buffered operations and collect their results.
+
+        Args:
+            raise_on_error: Raise QueueServiceError on the first failed operation
+
+        Returns:
+            List of results, one per buffered operation
+        """
+        operations, self._operations = self._operations, []
+        batches = [
+            operations[i:i + self.max_batch] for i in range(0, len(operations), self.max_batch)
+        ]
+        return self.client._round_trip(batches, raise_on_error)
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+
+class QueueClient:
+    """
+    Client for a running QueueServer.
+    Mirrors the PriorityQueue API so callers can use either interchangeably.
+    """
+
+    def __init__(self, address: Address, authkey: Optional[bytes] = None, connect_timeout: float = 5.0):
+        """
+        Connect to the queue service.
+
+        Args:
+            address: Unix socket path or (host, port) tuple of the service
+            authkey: Shared secret matching the server's; required for TCP addresses
+            connect_timeout: Seconds to keep retrying while the service starts up
+
+        Raises:
+            ValueError: If address is TCP and no authkey is given
+        """
+        require_authkey(address, authkey)
+        self.address = address
+        self._lock = threading.Lock()
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                self._conn = Client(address, authkey=authkey)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    @staticmethod
+    def _task_args(task) -> tuple:
+        """Reduce a task to the fields sent over the wire."""
+        entry = QueueEntry.from_task(task)
+        return (entry.task_id, entry.priority_score)
+
+    def _round_trip(self, batches: List[List[Operation]], raise_on_error: bool = True) -> List[Any]:
+        """Send the batches, at most MAX_IN_FLIGHT ahead of their replies, and flatten the results."""
+        replies = []
+        with self._lock:
+            for sent, batch in enumerate(batches, 1):
+                self._conn.send(batch)
+                if sent - len(replies) >= MAX_IN_FLIGHT:
+                    replies.append(self._conn.recv())
+            while len(replies) < len(batches):
+                replies.append(self._conn.recv())
+
+        results = []
+        for reply in replies:
+            for status, value in reply:
+                if status == "error" and raise_on_error:
+                    raise QueueServiceError(value)
+                results.append(value)
+        return results
+
+    def _call(self, operation: str, *args) -> Any:
+        """Run a single operation."""
+        return self._round_trip([[(operation, args)]])[0]
+
+    def pipeline(self, max_batch: int = DEFAULT_MAX_BATCH) -> Pipeline:
+        """Start a pipeline for batching several operations."""
+        return Pipeline(self, max_batch)
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="push", queue="service")
+    def push(self, task) -> None:
+        """Add a task to the queue."""
+        self._call("push", *self._task_args(task))
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="pop", queue="service")
+    def pop(self) -> Optional[QueueEntry]:
+        """Remove and return the highest priority task."""
+        return self._call("pop")
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="peek", queue="service")
+    def peek(self) -> Optional[QueueEntry]:
+        """Get the highest priority task without removing it."""
+        return self._call("peek")
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="update_priority", queue="service")
+    def update_priority(self, task_id: int, new_priority: float, record_unchanged: bool = True) -> bool:
+        """Update the priority of a queued task (see PriorityQueue.update_priority)."""
+        return self._call("update_priority", task_id, new_priority, record_unchanged)
+
+    @timed(QUEUE_OPERATION_SECONDS, operation="delete", queue="service")
+    def delete(self, task_id: int, completed: bool = False) -> bool:
+        """Remove a task from the queue by its ID."""
+        return self._call("delete", task_id, completed)
+
+    def get_snapshot(self) -> dict:
+        """Get a snapshot of the queue structure."""
+        return self._call("snapshot")
+
+    def get_changes(self, since: Optional[int] = None) -> dict:
+        """Get the queue changes made after a version (see PriorityQueue.get_changes)."""
+        return self._call("changes", since)
+
+    def notify(self, kind: str, task_id: int) -> int:
+        """Record an event about a task in the shared change log (see PriorityQueue.notify)."""
+        return self._call("notify", kind, task_id)
+
+    @property
+    def version(self) -> int:
+        """Current version of the shared queue."""
+        return self.get_changes()["version"]
+
+    def ping(self) -> bool:
+        """Check that the service is answering."""
+        return self._call("ping") == "pong"
+
+    def close(self) -> None:
+        """Close the connection to the service."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._call("size")
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def is_empty(self) -> bool:
+        """Check if the queue is empty."""
+        return len(self) == 0
+
+
+def parse_address(value: str) -> Address:
+    """
+    Parse an address from configuration.
+
+    Args:
+        value: "host:port" for TCP, anything else is treated as a Unix socket path
+
+    Returns:
+        Address usable by Listener and Client
+    """
+    host, sep, port = value.rpartition(":")
+    if sep and host and port.isdigit() and "/" not in value:
+        return (host, int(port))
+    return value
+
+
+def run_queue_service(
+    address: Address,
+    authkey: Optional[bytes] = None,
+    snapshot_name: Optional[str] = None,
+    snapshot_capacity: int = 10000,
+    data_dir: Optional[str] = None,
+) -> None:
+    """Run a queue server in the current process until it is killed."""
+    snapshot = SharedQueueSnapshot.create(snapshot_name, snapshot_capacity) if snapshot_name else None
+    store = QueueStore(data_dir) if data_dir else None
+    server = QueueServer(address, authkey, snapshot=snapshot, store=store)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+    try:
+        server.serve_forever()
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+
+def start_queue_service(
+    address: Address,
+    authkey: Optional[bytes] = None,
+    snapshot_name: Optional[str] = None,
+    snapshot_capacity: int = 10000,
+    data_dir: Optional[str] = None,
+) -> Process:
+    """
+    Start the queue service in a child process.
+
+    Args:
+        address: Address the service should listen on
+        authkey: Optional shared secret
+        snapshot_name: Shared memory name to publish the ranking under, if any
+        snapshot_capacity: Maximum number of ranked entries in the snapshot
+        data_dir: Directory to persist the queue in, if any
+
+    Returns:
+        The started daemon process
+    """
+    process = Process(
+        target=run_queue_service,
+        args=(address, authkey, snapshot_name, snapshot_capacity, data_dir),
+        daemon=True,
+    )
+    process.start()
+    return process
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the PriorityForge queue service")
+    parser.add_argument("--address", default="/tmp/priority_forge_queue.sock",
+                        help="Unix socket path or host:port to listen on")
+    parser.add_argument("--authkey", default=os.getenv("QUEUE_SERVICE_AUTHKEY"),
+                        help="Shared secret for clients (default: QUEUE_SERVICE_AUTHKEY; required for host:port)")
+    parser.add_argument("--snapshot-name", default=None,
+                        help="Publish the ranking to this shared memory segment")
+    parser.add_argument("--snapshot-capacity", type=int, default=10000,
+                        help="Maximum number of ranked entries in the snapshot")
+    parser.add_argument("--data-dir", default=None,
+                        help="Persist the queue (snapshot + operation log) in this directory")
+    args = parser.parse_args()
+    run_queue_service(
+        parse_address(args.address),
+        args.authkey.encode() if args.authkey else None,
+        args.snapshot_name,
+        args.snapshot_capacity,
+        args.data_dir,
+    )
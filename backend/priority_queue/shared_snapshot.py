@@ -0,0 +1,181 @@
+"""
+Shared-memory queue snapshot.
+Publishes the ranked (task_id, score) list into shared memory so every worker can read it without IPC.
+"""
+
+import heapq
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+# Header: sequence counter, active buffer, entry count per buffer, capacity, queue size
+_HEADER = struct.Struct("<QQQQQQ")
+_HEADER_SIZE = 64
+_ENTRY_SIZE = 16  # int64 task id + float64 score, stored as two columns per buffer
+
+
+class SnapshotReadError(Exception):
+    """Raised when a consistent snapshot could not be read."""
+
+
+class SharedQueueSnapshot:
+    """
+    Double-buffered, seqlock-protected snapshot of the ranked queue.
+    
+    The single writer fills the inactive buffer, then bumps the sequence counter to
+    odd, flips the active buffer and bumps it back to even. Readers retry whenever
+    the counter is odd or changed while they were copying, so they never block the
+    writer and never see a half-written ranking.
+    """
+    
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Wrap a shared memory segment. Use create() or attach() instead.
+        
+        Args:
+            shm: Shared memory segment holding the snapshot
+            owner: Whether this process created (and will unlink) the segment
+        """
+        self._shm = shm
+        self._owner = owner
+        self.capacity = self._read_header()[4]
+        self._ids = []
+        self._scores = []
+        for buffer in (0, 1):
+            offset = _HEADER_SIZE + buffer * self.capacity * _ENTRY_SIZE
+            column = self.capacity * 8
+            self._ids.append(shm.buf[offset:offset + column].cast("q"))
+            self._scores.append(shm.buf[offset + column:offset + 2 * column].cast("d"))
+    
+    @classmethod
+    def create(cls, name: Optional[str], capacity: int) -> "SharedQueueSnapshot":
+        """
+        Create a new snapshot segment.
+        
+        Args:
+            name: Segment name workers attach to (None picks a random name)
+            capacity: Maximum number of ranked entries kept
+        
+        Returns:
+            Writable snapshot owned by this process
+        """
+        if capacity <= 0:
+            raise ValueError("Snapshot capacity must be positive")
+        size = _HEADER_SIZE + 2 * capacity * _ENTRY_SIZE
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0, 0, capacity, 0)
+        return cls(shm, owner=True)
+    
+    @classmethod
+    def attach(cls, name: str) -> "SharedQueueSnapshot":
+        """
+        Attach to an existing snapshot segment as a reader.
+        
+        Args:
+            name: Segment name passed to create()
+        
+        Returns:
+            Snapshot view backed by the shared segment
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the writer's segment when they exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+    
+    @property
+    def name(self) -> str:
+        """Name of the shared memory segment."""
+        return self._shm.name
+    
+    def _read_header(self) -> Tuple[int, ...]:
+        return _HEADER.unpack_from(self._shm.buf, 0)
+    
+    def publish(self, entries: List[Tuple[int, float]], queue_size: Optional[int] = None) -> int:
+        """
+        Publish a ranking. Only one process may publish to a segment.
+        
+        Args:
+            entries: (task_id, score) pairs in rank order; entries past capacity are dropped
+            queue_size: Total queue size, if larger than the published ranking
+        
+        Returns:
+            The new (even) sequence number
+        """
+        sequence, active, count0, count1, capacity, _ = self._read_header()
+        target = 1 - active
+        count = min(len(entries), capacity)
+        ids, scores = self._ids[target], self._scores[target]
+        for position in range(count):
+            task_id, score = entries[position]
+            ids[position] = task_id
+            scores[position] = score
+        
+        counts = [count0, count1]
+        counts[target] = count
+        total = len(entries) if queue_size is None else queue_size
+        _HEADER.pack_into(self._shm.buf, 0, sequence + 1, active, counts[0], counts[1], capacity, total)
+        _HEADER.pack_into(self._shm.buf, 0, sequence + 2, target, counts[0], counts[1], capacity, total)
+        return sequence + 2
+    
+    def publish_queue(self, queue) -> int:
+        """
+        Publish the current ranking of a priority queue.
+        
+        Only the top capacity entries are selected, in O(n log capacity), rather
+        than ranking the whole queue.
+        
+        Args:
+            queue: PriorityQueue (or anything with entries() and len())
+        
+        Returns:
+            The new sequence number
+        """
+        top = heapq.nsmallest(self.capacity, queue.entries())
+        return self.publish([(entry.task_id, entry.priority_score) for entry in top], len(queue))
+    
+    def read(self, k: Optional[int] = None, retries: int = 100) -> Dict[str, Any]:
+        """
+        Read a consistent copy of the top k entries.
+        
+        Args:
+            k: Number of entries to return (None for the whole ranking)
+            retries: Attempts before giving up on a busy writer
+        
+        Returns:
+            Dictionary with version, queue_size and (task_id, score) entries
+        
+        Raises:
+            SnapshotReadError: If the writer kept publishing during every attempt
+        """
+        for attempt in range(retries):
+            sequence, active, count0, count1, _, queue_size = self._read_header()
+            if sequence % 2 == 0:
+                count = count1 if active else count0
+                if k is not None:
+                    count = min(count, k)
+                ids = self._ids[active][:count].tolist()
+                scores = self._scores[active][:count].tolist()
+                if self._read_header()[0] == sequence:
+                    return {
+                        "version": sequence // 2,
+                        "queue_size": queue_size,
+                        "entries": list(zip(ids, scores)),
+                    }
+            if attempt:
+                time.sleep(0)
+        raise SnapshotReadError("Queue snapshot kept changing while being read")
+    
+    @property
+    def version(self) -> int:
+        """Number of completed publishes."""
+        return self._read_header()[0] // 2
+    
+    def close(self) -> None:
+        """Detach from the segment, unlinking it if this process created it."""
+        for view in self._ids + self._scores:
+            view.release()
+        self._ids, self._scores = [], []
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -3,11 +3,13 @@ AI Assistant service.
 Handles interactions with Google Gemini API for task management assistance.
 """
 
+import logging
 import os
-import google.generativeai as genai
 from typing import Optional, List
 from models.task import Task
 
+logger = logging.getLogger(__name__)
+
 class AIService:
     """
     Service for AI assistant functionality using Google Gemini.
@@ -20,6 +22,9 @@ class AIService:
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
+        # Imported lazily: the Gemini SDK is slow to import and unused by deployments without the assistant
+        import google.generativeai as genai
+        
         genai.configure(api_key=api_key)
         # Use gemini-2.0-flash (fastest and most available)
         # Fallback to gemini-flash-latest if needed
@@ -98,10 +103,7 @@ Keep responses brief and conversational."""
             return "I'm having trouble processing that. Could you try rephrasing?"
                 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Error in AI service: {e}")
-            print(f"Full traceback:\n{error_details}")
+            logger.exception("Error in AI service")
             # Return a more helpful error message
             error_msg = str(e)
             if "API_KEY" in error_msg or "authentication" in error_msg.lower():
@@ -142,9 +144,44 @@ Content: 100% focused on the task. Nothing else should be mentioned."""
             return response.text.strip() if response and response.text else f"Good luck on completing {task_title if task_title else 'your task'}! I'm sure you'll do great!"
             
         except Exception as e:
-            print(f"Error generating motivational message: {e}")
+            logger.warning("Error generating motivational message: %s", e)
             return f"Good luck on completing {task_title if task_title else 'your task'}! I'm sure you'll do great!"
     
+    def get_completion_message(self, task_title: Optional[str] = None) -> str:
+        """
+        Generate a congratulatory message for a completed task.
+        
+        Args:
+            task_title: Optional task title for a personalized message
+            
+        Returns:
+            Congratulatory message
+        """
+        fallback = f"Woohoo! {task_title if task_title else 'Your task'} is complete! Well done!"
+        try:
+            if task_title:
+                prompt = f"""Generate a short, congratulatory message for someone who just completed a task called '{task_title}'. 
+Tone: Lighthearted, happy, encouraging.
+Length: Short and to the point (1-2 sentences max).
+Format: No emojis. Use exclamation points after each sentence (unless the sentence is a question).
+Style: Encouraging.
+Content: 100% focused on the task '{task_title}'. Nothing else should be mentioned.
+Example: "Woohoo! {task_title} is complete! Well done!" """
+            else:
+                prompt = """Generate a short, congratulatory message for someone who just completed a task. 
+Tone: Lighthearted, happy, encouraging.
+Length: Short and to the point (1-2 sentences max).
+Format: No emojis. Use exclamation points after each sentence (unless the sentence is a question).
+Style: Encouraging.
+Content: 100% focused on the task. Nothing else should be mentioned."""
+            
+            response = self.model.generate_content(prompt)
+            return response.text.strip() if response and response.text else fallback
+            
+        except Exception as e:
+            logger.warning("Error generating completion message: %s", e)
+            return fallback
+    
     def _build_task_context(self, tasks: Optional[List[Task]]) -> str:
         """Build context string about user's tasks."""
         if not tasks:
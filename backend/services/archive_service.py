@@ -0,0 +1,170 @@
+"""
+Archive service.
+Moves old completed tasks and their history into monthly archive tables.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from models.task import Task
+from models.task_tombstone import TaskTombstone
+from services.task_service import task_cache_key
+
+TASKS_ARCHIVE_PREFIX = "tasks_archive_"
+HISTORY_ARCHIVE_PREFIX = "task_history_archive_"
+_PARTITION = re.compile(r"^\d{6}$")
+
+class ArchiveService:
+    """
+    Service for archiving completed tasks.
+    Keeps the hot tasks table (and everything reading it) limited to active and recent work.
+    Archived rows live in per-month tables named tasks_archive_YYYYMM and
+    task_history_archive_YYYYMM, partitioned by when the task was completed.
+    """
+    
+    def __init__(self, db: Session, batch_size: int = 500):
+        """
+        Initialize archive service.
+        
+        Args:
+            db: Database session
+            batch_size: Maximum number of tasks moved per transaction
+        """
+        self.db = db
+        self.batch_size = batch_size
+    
+    def archive_completed(self, older_than_days: int = 30, queue=None, now: Optional[datetime] = None,
+                          cache=None) -> int:
+        """
+        Archive tasks completed more than older_than_days ago.
+        
+        Args:
+            older_than_days: Minimum age of a completed task before it is archived
+            queue: Optional priority queue to drop archived tasks from
+            now: Reference time (defaults to now)
+            cache: Optional task cache to drop archived tasks from
+        
+        Returns:
+            Number of tasks archived
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+        archived = 0
+        while True:
+            tasks = (
+                self.db.query(Task.id, Task.updated_at)
+                .filter(Task.completed == True, Task.updated_at < cutoff)  # noqa: E712
+                .order_by(Task.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not tasks:
+                return archived
+            
+            partitions: Dict[str, List[int]] = {}
+            for task_id, completed_at in tasks:
+                partitions.setdefault(completed_at.strftime("%Y%m"), []).append(task_id)
+            for partition, task_ids in partitions.items():
+                self._move(partition, task_ids)
+            self.db.commit()
+            
+            if queue is not None:
+                for task_id, _ in tasks:
+                    queue.delete(task_id)
+            if cache is not None:
+                for task_id, _ in tasks:
+                    cache.delete(task_cache_key(task_id))
+            archived += len(tasks)
+    
+    def _move(self, partition: str, task_ids: List[int]) -> None:
+        """Copy tasks and their history into a partition and delete them from the hot tables."""
+        tasks_table = self._ensure_partition(TASKS_ARCHIVE_PREFIX, "tasks", partition)
+        history_table = self._ensure_partition(HISTORY_ARCHIVE_PREFIX, "task_history", partition)
+        ids = ", ".join(str(int(task_id)) for task_id in task_ids)
+        
+        history_columns = ", ".join(self._columns(history_table))
+        tasks_columns = ", ".join(self._columns(tasks_table))
+        
+        # Name columns explicitly so partitions created before a schema change stay writable
+        self.db.execute(text(
+            f"INSERT INTO {history_table} ({history_columns}) "
+            f"SELECT {history_columns} FROM task_history WHERE task_id IN ({ids})"
+        ))
+        self.db.execute(text(
+            f"INSERT INTO {tasks_table} ({tasks_columns}) SELECT {tasks_columns} FROM tasks WHERE id IN ({ids})"
+        ))
+        self.db.execute(text(f"DELETE FROM task_history WHERE task_id IN ({ids})"))
+        self.db.execute(text(f"DELETE FROM tasks WHERE id IN ({ids})"))
+        # Archived tasks leave the task list, so incremental sync reports them as deleted
+        self.db.add_all([TaskTombstone(task_id=task_id) for task_id in task_ids])
+    
+    def _ensure_partition(self, prefix: str, source: str, partition: str) -> str:
+        """Create an archive table with the source table's columns if it does not exist yet."""
+        table = f"{prefix}{partition}"
+        self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM {source} WHERE 0"))
+        key = "task_id" if source == "task_history" else "id"
+        self.db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{key} ON {table} ({key})"))
+        return table
+    
+    def _columns(self, table: str) -> List[str]:
+        """Column names of a table."""
+        return [row[1] for row in self.db.execute(text(f"PRAGMA table_info({table})"))]
+    
+    def list_partitions(self) -> List[str]:
+        """
+        List archive partitions, newest first.
+        
+        Returns:
+            Partition names in YYYY-MM form
+        """
+        rows = self.db.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"),
+            {"prefix": f"{TASKS_ARCHIVE_PREFIX}%"},
+        ).scalars()
+        partitions = [name[len(TASKS_ARCHIVE_PREFIX):] for name in rows]
+        return [f"{p[:4]}-{p[4:]}" for p in sorted(partitions, reverse=True) if _PARTITION.match(p)]
+    
+    def get_archived_tasks(self, month: str, limit: int = 100, offset: int = 0) -> List[dict]:
+        """
+        Get archived tasks from one partition.
+        
+        Args:
+            month: Partition in YYYY-MM form
+            limit: Maximum number of tasks to return
+            offset: Number of tasks to skip
+        
+        Returns:
+            Archived task rows, or an empty list if the partition does not exist
+        """
+        partition = month.replace("-", "")
+        if not _PARTITION.match(partition) or month not in self.list_partitions():
+            return []
+        rows = self.db.execute(
+            text(f"SELECT * FROM {TASKS_ARCHIVE_PREFIX}{partition} ORDER BY id LIMIT :limit OFFSET :offset"),
+            {"limit": limit, "offset": offset},
+        ).mappings()
+        return [dict(row) for row in rows]
+    
+    def get_archived_task(self, task_id: int) -> Optional[dict]:
+        """
+        Find an archived task and its history.
+        
+        Args:
+            task_id: Task ID
+        
+        Returns:
+            Task row with a "history" list, or None if it is not archived
+        """
+        for month in self.list_partitions():
+            partition = month.replace("-", "")
+            row = self.db.execute(
+                text(f"SELECT * FROM {TASKS_ARCHIVE_PREFIX}{partition} WHERE id = :id"), {"id": task_id}
+            ).mappings().first()
+            if row:
+                history = self.db.execute(
+                    text(f"SELECT * FROM {HISTORY_ARCHIVE_PREFIX}{partition} WHERE task_id = :id ORDER BY completed_at"),
+                    {"id": task_id},
+                ).mappings()
+                return dict(row, history=[dict(entry) for entry in history])
+        return None
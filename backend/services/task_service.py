@@ -3,25 +3,113 @@ Task service.
 Business logic for task management operations.
 """
 
-from typing import List, Optional
+import logging
+import os
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional, Tuple, Type
+from sqlalchemy import column, func, literal_column, table
 from sqlalchemy.orm import Session
+from database.search import DESCRIPTION_WEIGHT, SEARCH_TABLE, TITLE_WEIGHT, match_query
 from models.task import Task
-from priority_queue.algorithms import DefaultPriorityAlgorithm
+from models.task_tombstone import TaskTombstone
+from priority_queue.algorithms import ALGORITHMS, DefaultPriorityAlgorithm, PriorityAlgorithm
+from priority_queue.parallel import SCORED_COLUMNS, score_tasks
+from priority_queue.priority_queue import QueueEntry
+from analytics.collectors import record_completion
+
+logger = logging.getLogger(__name__)
+
+# Algorithms score higher = more urgent while the queue is a min-heap, so open
+# tasks are queued on their distance below the top score
+MAX_PRIORITY_SCORE = 100.0
+
+def queue_algorithm(name: Optional[str] = None) -> Type[PriorityAlgorithm]:
+    """
+    Algorithm scoring tasks for the priority queue.
+    
+    Args:
+        name: Algorithm name; defaults to QUEUE_ALGORITHM (or "default")
+    
+    Raises:
+        ValueError: If the algorithm is unknown
+    """
+    name = name or os.getenv("QUEUE_ALGORITHM", "default")
+    if name not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm '{name}'")
+    return ALGORITHMS[name]
+
+def queue_priority(score: float) -> float:
+    """
+    Queue key of an algorithm score: the min-heap serves the highest score first.
+    
+    Scores are negated rather than subtracted from a ceiling, since some algorithms
+    (time_decay on overdue tasks) score above MAX_PRIORITY_SCORE.
+    """
+    return -score
+
+# Text matches re-ranked when search blends in priority; later matches follow in relevance order
+SEARCH_BLEND_WINDOW = 500
+
+_search_index = table(SEARCH_TABLE, column("rowid"), column(SEARCH_TABLE))  # Hidden column MATCH runs against
+_search_rank = literal_column(f"bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})")
+# Unary plus keeps SQLite from driving a filtered search from ix_tasks_completed,
+# which would evaluate the MATCH once per task instead of once per search
+_task_completed = literal_column("+tasks.completed")
+
+class SearchHit(NamedTuple):
+    """A task matching a search, with the scores it was ranked by."""
+    task: Task
+    relevance: float  # Text relevance (negated bm25; higher = better match)
+    priority_score: Optional[float]  # Algorithm score, when priority was blended in
+    score: float  # Sort key: relevance, or the blend of relevance and priority
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A datetime as naive UTC, the form timestamps are stored in."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def task_cache_key(task_id: int) -> str:
+    """Cache key of a task's data."""
+    return f"task:{task_id}"
+
+def task_data(task: Task) -> dict:
+    """A task's column values, with timestamps as ISO strings so any cache backend can hold them."""
+    data = {}
+    for column in Task.__table__.columns:
+        value = getattr(task, column.name)
+        data[column.name] = value.isoformat() if isinstance(value, datetime) else value
+    return data
 
 class TaskService:
     """
     Service for task-related business logic.
     Handles CRUD operations and priority calculations.
+    
+    When given a priority queue, the service keeps it in step with the open
+    tasks, so the queue's change log doubles as the task change feed. When given
+    a cache, single-task reads go through it and every write updates it. When
+    given a write-behind buffer, reads see buffered writes before they commit.
+    When given a deadline index, it follows the due dates of the open tasks.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, queue=None, cache=None, writer=None, deadlines=None):
         """
         Initialize task service.
         
         Args:
             db: Database session
+            queue: Optional priority queue (PriorityQueue or QueueClient) to keep in sync
+            cache: Optional TieredCache for task reads
+            writer: Optional WriteBehindBuffer; updates, toggles and deletes are then
+                buffered and group-committed instead of committed one by one
+            deadlines: Optional DeadlineIndex to keep in sync
         """
         self.db = db
+        self.queue = queue
+        self.cache = cache
+        self.writer = writer
+        self.deadlines = deadlines
     
     def create_task(self, task_data: dict) -> Task:
         """
@@ -41,6 +129,8 @@ class TaskService:
         self.db.add(task)
         self.db.commit()
         self.db.refresh(task)
+        self._sync_queue(task)
+        self._sync_deadline(task)
         
         return task
     
@@ -54,7 +144,39 @@ class TaskService:
         Returns:
             Task if found, None otherwise
         """
-        return self.db.query(Task).filter(Task.id == task_id).first()
+        task = self.db.get(Task, task_id)
+        if task is None or self.writer is None:
+            return task
+        # Detached, so edits reach the database only through the buffer
+        self.db.expunge(task)
+        write = self.writer.pending_write(task_id)
+        if write is None:
+            return task
+        if write.deleted:
+            return None
+        write.apply(task)
+        return task
+    
+    def get_task_data(self, task_id: int) -> Optional[dict]:
+        """
+        Get a task's column values by ID, through the cache when there is one.
+        
+        Hot tasks are answered from the cache without touching the database;
+        concurrent misses for one task share a single query.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            JSON-ready dictionary of the task's columns if found, None otherwise
+        """
+        def load():
+            task = self.get_task(task_id)
+            return task_data(task) if task else None
+        
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(task_cache_key(task_id), load)
     
     def get_all_tasks(self) -> List[Task]:
         """
@@ -63,7 +185,69 @@ class TaskService:
         Returns:
             List of all tasks
         """
-        return self.db.query(Task).all()
+        tasks = self.db.query(Task).all()
+        if self.writer is not None:
+            tasks = self.writer.overlay(self.db, tasks)
+        return tasks
+    
+    def search_tasks(self, query: str, limit: int = 20, offset: int = 0, priority_weight: float = 0.0,
+                     completed: Optional[bool] = None) -> Tuple[List[SearchHit], int]:
+        """
+        Full-text search over task titles and descriptions, best matches first.
+        
+        Matching and ranking (bm25, title terms weighted above description terms)
+        run inside the FTS5 index, so a search costs O(matches), not O(tasks).
+        With a priority weight, the best SEARCH_BLEND_WINDOW text matches are
+        re-ranked by a blend of relevance and the queue algorithm's score, both
+        scaled to 0-1 (relevance against the best match in the window); matches
+        past the window follow in relevance order, so pages stay stable.
+        
+        Args:
+            query: Free text; every word must match, the last also as a prefix
+            limit: Maximum number of results
+            offset: Number of results to skip
+            priority_weight: Share of the priority score in the ranking (0-1)
+            completed: Only completed (True) or open (False) tasks; None for both
+        
+        Returns:
+            Tuple of (hits for the page, total number of matching tasks)
+        """
+        match = match_query(query)
+        if match is None:
+            return [], 0
+        matches = self.db.query(_search_index.c.rowid, _search_rank.label("rank")).filter(
+            _search_index.c[SEARCH_TABLE].op("MATCH")(match)
+        )
+        if completed is not None:
+            matches = matches.join(Task, Task.id == _search_index.c.rowid).filter(_task_completed == completed)
+        total = matches.with_entities(func.count()).scalar()
+        
+        hits: List[SearchHit] = []
+        if priority_weight > 0 and offset < SEARCH_BLEND_WINDOW:
+            window = self._search_page(matches, SEARCH_BLEND_WINDOW, 0)
+            best = max([-rank for _, rank in window[:1]] + [1e-9])
+            scores = score_tasks(queue_algorithm(), [task for task, _ in window])
+            blended = [
+                SearchHit(task, -rank, score, (1 - priority_weight) * -rank / best
+                          + priority_weight * min(max(score, 0.0), MAX_PRIORITY_SCORE) / MAX_PRIORITY_SCORE)
+                for (task, rank), score in zip(window, scores)
+            ]
+            blended.sort(key=lambda hit: hit.score, reverse=True)
+            hits = blended[offset:offset + limit]
+            offset = SEARCH_BLEND_WINDOW
+        if len(hits) < limit and offset < total:
+            rows = self._search_page(matches, limit - len(hits), offset)
+            hits += [SearchHit(task, -rank, None, -rank) for task, rank in rows]
+        
+        if self.writer is not None:
+            visible = {task.id: task for task in self.writer.overlay(self.db, [hit.task for hit in hits])}
+            hits = [hit._replace(task=visible[hit.task.id]) for hit in hits if hit.task.id in visible]
+        return hits, total
+    
+    def _search_page(self, matches, limit: int, offset: int) -> List[Tuple[Task, float]]:
+        """One page of search matches as (task, bm25 rank); only the page's task rows are read."""
+        page = matches.order_by(_search_rank).limit(limit).offset(offset).subquery()
+        return self.db.query(Task, page.c.rank).join(page, page.c.rowid == Task.id).order_by(page.c.rank).all()
     
     def update_task(self, task_id: int, task_data: dict) -> Optional[Task]:
         """
@@ -80,10 +264,25 @@ class TaskService:
         if not task:
             return None
         
+        was_completed = task.completed
+        
         # Update fields
         for key, value in task_data.items():
             setattr(task, key, value)
         
+        if self.writer is not None:
+            self.writer.validate(task)
+            task.updated_at = datetime.utcnow()
+            completed_at = task.updated_at if task.completed and not was_completed else None
+            self.writer.update(task_id, task_data, completed_at)
+            self._sync_queue(task, was_completed)
+            self._sync_deadline(task)
+            self._invalidate_cache(task.id)
+            return task
+        
+        if task.completed and not was_completed:
+            record_completion(self.db, task)
+        
         # Recalculate priority if relevant fields changed
         if any(key in task_data for key in ["urgency", "difficulty"]):
             # Priority calculation can be added here if needed
@@ -91,6 +290,45 @@ class TaskService:
         
         self.db.commit()
         self.db.refresh(task)
+        self._sync_queue(task, was_completed)
+        self._sync_deadline(task)
+        self._invalidate_cache(task.id)
+        
+        return task
+    
+    def toggle_task_complete(self, task_id: int) -> Optional[Task]:
+        """
+        Toggle a task's completion status.
+        
+        Completing a task records it in the completion history and rollups.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            Updated task if found, None otherwise
+        """
+        task = self.get_task(task_id)
+        if not task:
+            return None
+        
+        task.completed = not task.completed
+        if self.writer is not None:
+            task.updated_at = datetime.utcnow()
+            self.writer.update(task_id, {"completed": task.completed}, task.updated_at if task.completed else None)
+            self._sync_queue(task, not task.completed)
+            self._sync_deadline(task)
+            self._invalidate_cache(task.id)
+            return task
+        
+        if task.completed:
+            record_completion(self.db, task)
+        
+        self.db.commit()
+        self.db.refresh(task)
+        self._sync_queue(task, not task.completed)
+        self._sync_deadline(task)
+        self._invalidate_cache(task.id)
         
         return task
     
@@ -108,11 +346,224 @@ class TaskService:
         if not task:
             return False
         
-        self.db.delete(task)
-        self.db.commit()
+        if self.writer is not None:
+            self.writer.delete(task_id)
+        else:
+            self.db.delete(task)
+            self.db.add(TaskTombstone(task_id=task_id))
+            self.db.commit()
+        if self.cache is not None:
+            self.cache.delete(task_cache_key(task_id))
+        if self.queue is not None:
+            try:
+                self.queue.delete(task_id)
+            except Exception:
+                logger.exception("Failed to remove task %s from the priority queue", task_id)
+        if self.deadlines is not None:
+            self.deadlines.remove(task_id)
         
         return True
     
+    def get_tasks_due(self, end: datetime, start: Optional[datetime] = None,
+                      limit: Optional[int] = None) -> List[Task]:
+        """
+        Get the open tasks due in a window, soonest first.
+        
+        One range scan of ix_tasks_completed_due_date, so the cost grows with the
+        tasks in the window rather than with the table.
+        
+        Args:
+            end: Exclusive end of the window (naive UTC)
+            start: Inclusive start of the window; None includes every overdue task
+            limit: Maximum number of tasks to return
+        
+        Returns:
+            Open tasks with start <= due_date < end, ordered by due date
+        """
+        end, start = naive_utc(end), naive_utc(start)
+        query = self.db.query(Task).filter(Task.completed == False, Task.due_date < end)  # noqa: E712
+        if start is not None:
+            query = query.filter(Task.due_date >= start)
+        query = query.order_by(Task.due_date, Task.id)
+        if self.writer is None:
+            return query.limit(limit).all()
+        
+        # Buffered edits can complete or delete a task, or move it into or out of the
+        # window. Each can take at most one row off the committed page, so read that many
+        # more, add the tasks they touch, and cut to limit once the edits are applied.
+        moved = self.writer.pending_ids("due_date", "completed")
+        tasks = query.limit(limit + len(moved) if limit is not None else None).all()
+        missing = moved - {task.id for task in tasks}
+        if missing:
+            tasks += self.db.query(Task).filter(Task.id.in_(missing)).all()
+        tasks = [
+            task for task in self.writer.overlay(self.db, tasks)
+            if not task.completed and task.due_date is not None and naive_utc(task.due_date) < end
+            and (start is None or naive_utc(task.due_date) >= start)
+        ]
+        tasks.sort(key=lambda task: (naive_utc(task.due_date), task.id))
+        return tasks[:limit]
+    
+    def get_overdue_tasks(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[Task]:
+        """
+        Get the open tasks past their due date, most overdue first.
+        
+        Args:
+            now: Current time (defaults to now, UTC)
+            limit: Maximum number of tasks to return
+        """
+        return self.get_tasks_due(now or datetime.utcnow(), limit=limit)
+    
+    def get_changes_since(self, since: datetime) -> Tuple[List[Task], List[int], datetime]:
+        """
+        Get the tasks created, updated or deleted at or after a watermark.
+        
+        Both lookups are range scans on indexed timestamps (tasks.updated_at and
+        task_tombstones.deleted_at), so a sync costs O(changes), not O(tasks).
+        Rows stamped exactly at the watermark are returned again; applying
+        changes is idempotent, and it keeps same-instant writes from being skipped.
+        
+        Args:
+            since: Watermark from the previous sync
+        
+        Returns:
+            Tuple of (changed tasks, deleted task IDs, next watermark)
+        """
+        tasks = self.db.query(Task).filter(Task.updated_at >= since).order_by(Task.updated_at, Task.id).all()
+        tombstones = (
+            self.db.query(TaskTombstone.task_id, TaskTombstone.deleted_at)
+            .filter(TaskTombstone.deleted_at >= since)
+            .all()
+        )
+        # A deleted ID that has since been reused by a new task is not deleted
+        live_ids = {task.id for task in tasks}
+        deleted = sorted({task_id for task_id, _ in tombstones if task_id not in live_ids})
+        
+        watermark = max(
+            [since] + [task.updated_at for task in tasks[-1:]] + [deleted_at for _, deleted_at in tombstones]
+        )
+        return tasks, deleted, watermark
+    
+    def _invalidate_cache(self, task_id: int) -> None:
+        """
+        Drop a written task from the cache; the next read loads it.
+        
+        Writing the new value instead could leave an older one cached when two
+        updates of the task finish their cache writes in the opposite order.
+        """
+        if self.cache is not None:
+            self.cache.delete(task_cache_key(task_id))
+    
+    def _sync_queue(self, task: Task, was_completed: bool = False) -> None:
+        """
+        Mirror a committed task into the priority queue.
+        
+        Open tasks are queued or re-scored (an unchanged score still records an
+        update); tasks that were just completed leave the queue as completed.
+        Queue failures are logged rather than failing a write that already committed.
+        
+        Args:
+            task: Task as committed
+            was_completed: Whether the task was completed before this change
+        """
+        if self.queue is None:
+            return
+        try:
+            if task.completed:
+                self.queue.delete(task.id, not was_completed)
+                return
+            score = queue_algorithm().calculate_priority(task)
+            task.priority_score = score
+            key = queue_priority(score)
+            if not self.queue.update_priority(task.id, key):
+                self.queue.push(QueueEntry(key, task.id))
+        except Exception:
+            logger.exception("Failed to sync task %s to the priority queue", task.id)
+    
+    def _sync_deadline(self, task: Task) -> None:
+        """Mirror a task's due date into the deadline index; completed tasks leave it."""
+        if self.deadlines is not None:
+            self.deadlines.set(task.id, None if task.completed else naive_utc(task.due_date))
+    
+    def load_deadlines(self) -> int:
+        """
+        Fill the deadline index with every open task that has a due date.
+        
+        Rows come back sorted from ix_tasks_completed_due_date, and a sorted
+        array is already a valid heap.
+        
+        Returns:
+            Number of tasks indexed
+        """
+        rows = (
+            self.db.query(Task.due_date, Task.id)
+            .filter(Task.completed == False, Task.due_date.isnot(None))  # noqa: E712
+            .order_by(Task.due_date, Task.id)
+            .all()
+        )
+        self.deadlines.bulk_load((due_date, task_id) for due_date, task_id in rows)
+        return len(rows)
+    
+    def load_queue(self) -> int:
+        """
+        Fill an empty local priority queue with every open task.
+        
+        Returns:
+            Number of tasks queued
+        """
+        rows = self._open_task_rows()
+        scores = score_tasks(queue_algorithm(), rows)
+        entries = [QueueEntry(queue_priority(score), row.id) for row, score in zip(rows, scores)]
+        self.queue.bulk_load(entries)
+        return len(entries)
+    
+    def rescore_queue(self, algorithm: Optional[str] = None) -> int:
+        """
+        Re-score every open task and move it to its new place in the priority queue.
+        
+        Scores that depend on the clock (time_decay, learned) drift as due dates
+        approach, so the background job runner calls this periodically as well
+        as on request. Large task sets are scored across a process pool (see
+        priority_queue.parallel); queue service round trips are batched in pipelines.
+        Tasks whose score did not change record nothing in the queue's change log,
+        so periodic re-scoring does not flood change feed clients.
+        
+        Args:
+            algorithm: Algorithm name; defaults to the queue's algorithm
+        
+        Returns:
+            Number of tasks re-scored
+        
+        Raises:
+            ValueError: If the algorithm is unknown
+        """
+        scorer = queue_algorithm(algorithm)
+        rows = self._open_task_rows()
+        if self.queue is None or not rows:
+            return len(rows)
+        entries = [QueueEntry(queue_priority(score), row.id) for row, score in zip(rows, score_tasks(scorer, rows))]
+        
+        if hasattr(self.queue, "pipeline"):
+            pipeline = self.queue.pipeline()
+            for entry in entries:
+                pipeline.update_priority(entry.task_id, entry.priority_score, record_unchanged=False)
+            found = pipeline.execute()
+        else:
+            found = [
+                self.queue.update_priority(entry.task_id, entry.priority_score, record_unchanged=False)
+                for entry in entries
+            ]
+        # Open tasks missing from the queue (e.g. after a queue service restart) are added back
+        for entry, present in zip(entries, found):
+            if not present:
+                self.queue.push(entry)
+        return len(entries)
+    
+    def _open_task_rows(self) -> list:
+        """ID and scored columns of every open task; rows stand in for tasks when scoring."""
+        columns = [getattr(Task, column) for column in SCORED_COLUMNS]
+        return self.db.query(Task.id, *columns).filter(Task.completed == False).all()  # noqa: E712
+    
     def reprioritize_all(self, algorithm: str = "default") -> List[Task]:
         """
         Reprioritize all tasks using the specified algorithm.
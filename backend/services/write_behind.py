@@ -0,0 +1,392 @@
+"""
+Write-behind buffer.
+Coalesces task mutations in memory and a durable journal, then group-commits them to the database.
+"""
+
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import CheckConstraint, DateTime, bindparam, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from analytics.collectors import record_completion
+from models.task import Task
+from models.task_history import TaskHistory
+from models.task_tombstone import TaskTombstone
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATTERN = "writes.{generation:012d}.log"
+DEAD_LETTER_FILE = "dead_letter.log"
+
+_DATETIME_COLUMNS = {column.name for column in Task.__table__.columns if isinstance(column.type, DateTime)}
+
+class PendingWrite:
+    """Merged, not yet committed mutations of one task."""
+    
+    __slots__ = ("changes", "deleted", "completions")
+    
+    def __init__(self):
+        self.changes: Dict[str, object] = {}
+        self.deleted = False
+        self.completions: List[datetime] = []  # Each time the task became completed
+    
+    def merge(self, newer: "PendingWrite") -> None:
+        """Fold a later write for the same task into this one."""
+        self.changes.update(newer.changes)
+        self.deleted = self.deleted or newer.deleted
+        self.completions.extend(newer.completions)
+    
+    def apply(self, task) -> None:
+        """Set the pending column values on a task (or anything with the same attributes)."""
+        for key, value in self.changes.items():
+            setattr(task, key, value)
+
+class WriteBehindBuffer:
+    """
+    Write-behind buffer for task updates, completion toggles and deletes.
+    
+    Each mutation is appended to a journal and fsynced, then merged into the
+    pending write for its task, so repeated edits to one task become one row
+    update. A background thread commits everything pending in one transaction
+    every interval seconds, or sooner once max_pending tasks are waiting: one
+    database commit covers a whole burst. Each flush starts a new journal
+    generation and deletes the older ones once committed; journals left by a
+    crash are replayed into the buffer on start. Row updates and deletes are
+    idempotent, so replaying a generation that was committed just before a crash
+    only risks counting its completions twice in the analytics rollups.
+    
+    Writes are acknowledged before they reach the database, so callers check
+    edited rows with validate() first. Should the database still reject a row,
+    the group is committed again one task at a time and the rejected writes are
+    moved to the dead-letter file, so one bad row cannot hold back the rest.
+    """
+    
+    def __init__(self, directory: str, session_factory: Callable[[], Session],
+                 interval: float = 0.05, max_pending: int = 500, fsync: bool = True):
+        """
+        Open the buffer, replaying any journals left behind, and start flushing.
+        
+        Args:
+            directory: Directory for the journal files
+            session_factory: Callable returning a new database session
+            interval: Seconds between flushes
+            max_pending: Pending tasks that trigger an early flush
+            fsync: fsync the journal on every mutation (off trades durability for speed)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = _lock_directory(directory)
+        self.directory = directory
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self._pending: Dict[int, PendingWrite] = {}
+        self._flushing: Dict[int, PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        
+        generations = self._generations()
+        for generation in generations:
+            self._replay(self._journal_path(generation))
+        self._generation = (generations[-1] + 1) if generations else 1
+        self._journal = open(self._journal_path(self._generation), "a", encoding="utf-8")
+        if self._pending:
+            logger.info("Recovered %d pending task writes from the journal", len(self._pending))
+        
+        self._thread = threading.Thread(target=self._flush_loop, name="write-behind", daemon=True)
+        self._thread.start()
+    
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, JOURNAL_PATTERN.format(generation=generation))
+    
+    def _generations(self) -> List[int]:
+        paths = glob.glob(os.path.join(self.directory, "writes.*.log"))
+        return sorted(int(os.path.basename(path).split(".")[1]) for path in paths)
+    
+    def _replay(self, path: str) -> None:
+        """Merge every complete record of a journal into the pending writes."""
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                if not line.endswith("\n"):
+                    break  # torn final record from a crash mid-write
+                task_id, write = self._decode(json.loads(line))
+                self._merge(self._pending, task_id, write)
+    
+    @staticmethod
+    def _encode(task_id: int, write: PendingWrite) -> str:
+        changes = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in write.changes.items()
+        }
+        record = {"id": task_id, "set": changes, "deleted": write.deleted,
+                  "completions": [moment.isoformat() for moment in write.completions]}
+        return json.dumps(record) + "\n"
+    
+    @staticmethod
+    def _decode(record: dict):
+        write = PendingWrite()
+        write.changes = {
+            key: datetime.fromisoformat(value) if key in _DATETIME_COLUMNS and value is not None else value
+            for key, value in record["set"].items()
+        }
+        write.deleted = record["deleted"]
+        write.completions = [datetime.fromisoformat(moment) for moment in record["completions"]]
+        return record["id"], write
+    
+    @staticmethod
+    def _merge(pending: Dict[int, PendingWrite], task_id: int, write: PendingWrite) -> None:
+        existing = pending.get(task_id)
+        if existing is None:
+            pending[task_id] = write
+        else:
+            existing.merge(write)
+    
+    @staticmethod
+    def validate(task: Task) -> None:
+        """
+        Check an edited task against the NOT NULL and CHECK constraints of the tasks table.
+        
+        A buffered write is acknowledged before it is committed, so a row the
+        database would reject must be refused here, as a direct commit would be.
+        CHECK constraints are evaluated by SQLite itself, on a scratch in-memory connection.
+        
+        Raises:
+            ValueError: If the database would reject the row
+        """
+        table = Task.__table__
+        values = {}
+        for column in table.columns:
+            value = getattr(task, column.name, None)
+            if value is None and not column.nullable and not column.primary_key:
+                raise ValueError(f"NOT NULL constraint failed: tasks.{column.name}")
+            values[column.name] = value.isoformat() if isinstance(value, datetime) else value
+        checks = [constraint for constraint in table.constraints if isinstance(constraint, CheckConstraint)]
+        if not checks:
+            return
+        names = list(values)
+        row = ", ".join(f"? AS {name}" for name in names)
+        with sqlite3.connect(":memory:") as scratch:
+            for constraint in checks:
+                # Like SQLite, a check that evaluates to NULL passes
+                query = f"SELECT ({constraint.sqltext}) IS NOT 0 FROM (SELECT {row})"
+                if not scratch.execute(query, [values[name] for name in names]).fetchone()[0]:
+                    raise ValueError(f"CHECK constraint failed: {constraint.name}")
+    
+    def update(self, task_id: int, changes: dict, completed_at: Optional[datetime] = None) -> None:
+        """
+        Buffer column changes to a task.
+        
+        Args:
+            task_id: Task ID
+            changes: Column values to set
+            completed_at: When the task became completed, if this change completes it
+        """
+        write = PendingWrite()
+        write.changes = dict(changes)
+        if completed_at is not None:
+            write.completions.append(completed_at)
+        self._record(task_id, write)
+    
+    def delete(self, task_id: int) -> None:
+        """Buffer the deletion of a task."""
+        write = PendingWrite()
+        write.deleted = True
+        self._record(task_id, write)
+    
+    def _record(self, task_id: int, write: PendingWrite) -> None:
+        line = self._encode(task_id, write)
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._merge(self._pending, task_id, write)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+    
+    def pending_write(self, task_id: int) -> Optional[PendingWrite]:
+        """The uncommitted writes for a task merged oldest first, or None."""
+        with self._lock:
+            writes = [pending[task_id] for pending in (self._flushing, self._pending) if task_id in pending]
+            if not writes:
+                return None
+            merged = PendingWrite()
+            for write in writes:
+                merged.merge(write)
+            return merged
+    
+    def pending_ids(self, *columns: str) -> Set[int]:
+        """
+        IDs of the tasks with uncommitted writes.
+        
+        Args:
+            columns: Only tasks being deleted or whose pending writes set one of these columns
+        """
+        with self._lock:
+            return {
+                task_id for pending in (self._flushing, self._pending) for task_id, write in pending.items()
+                if not columns or write.deleted or any(column in write.changes for column in columns)
+            }
+    
+    def overlay(self, db: Session, tasks: Iterable[Task]) -> List[Task]:
+        """
+        Apply uncommitted writes to tasks read from the database.
+        
+        Tasks with pending changes are detached from the session first, so the
+        overlay can never be flushed by it; pending deletes are left out.
+        """
+        with self._lock:
+            if not self._pending and not self._flushing:
+                return list(tasks)
+        result = []
+        for task in tasks:
+            write = self.pending_write(task.id)
+            if write is None:
+                result.append(task)
+            elif not write.deleted:
+                db.expunge(task)
+                write.apply(task)
+                result.append(task)
+        return result
+    
+    def _flush_loop(self) -> None:
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed; retrying on the next interval")
+    
+    def flush(self) -> int:
+        """
+        Commit every pending write in one transaction.
+        
+        Returns:
+            Number of tasks written (not counting writes moved to the dead-letter file)
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                self._journal.close()
+                self._generation += 1
+                self._journal = open(self._journal_path(self._generation), "a", encoding="utf-8")
+                generation = self._generation
+                written = len(self._flushing)
+            
+            try:
+                try:
+                    self._commit(self._flushing)
+                except IntegrityError:
+                    # One rejected row rolls back the whole group; commit the rest without it
+                    written -= self._commit_each(self._flushing)
+            except Exception:
+                with self._lock:
+                    # Newer writes go on top of the ones that failed to commit
+                    for task_id, write in self._pending.items():
+                        self._merge(self._flushing, task_id, write)
+                    self._pending, self._flushing = self._flushing, {}
+                raise
+            
+            with self._lock:
+                self._flushing = {}
+            for old in self._generations():
+                if old < generation:
+                    os.remove(self._journal_path(old))
+            return written
+    
+    def _commit(self, writes: Dict[int, PendingWrite]) -> None:
+        """Apply merged writes: grouped row updates, completion records, then deletes."""
+        now = datetime.utcnow()
+        table = Task.__table__
+        groups: Dict[tuple, List[dict]] = {}
+        for task_id, write in writes.items():
+            if write.changes and not write.deleted:
+                row = dict(write.changes, updated_at=now)
+                groups.setdefault(tuple(sorted(row)), []).append(dict(row, task_id=task_id))
+        # Rows with different column sets cannot share one UPDATE statement
+        completed = {task_id: write.completions for task_id, write in writes.items() if write.completions}
+        deleted = [task_id for task_id, write in writes.items() if write.deleted]
+        
+        db = self.session_factory()
+        try:
+            for columns, rows in groups.items():
+                # executemany; the SET clause comes from the column keys of the rows
+                db.execute(update(table).where(table.c.id == bindparam("task_id")), rows)
+            if completed:
+                tasks = db.query(Task.id, Task.created_at).filter(Task.id.in_(completed)).all()
+                for task in tasks:
+                    for completed_at in completed[task.id]:
+                        record_completion(db, task, completed_at)
+            if deleted:
+                db.execute(delete(TaskHistory).where(TaskHistory.task_id.in_(deleted)))
+                db.execute(delete(Task).where(Task.id.in_(deleted)))
+                db.add_all([TaskTombstone(task_id=task_id, deleted_at=now) for task_id in deleted])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _commit_each(self, writes: Dict[int, PendingWrite]) -> int:
+        """
+        Commit writes one task at a time, moving those the database rejects to the
+        dead-letter file. Other errors stop here, leaving the rest in writes.
+        
+        Returns:
+            Number of writes moved to the dead-letter file
+        """
+        rejected = 0
+        for task_id in list(writes):
+            write = writes[task_id]
+            try:
+                self._commit({task_id: write})
+            except IntegrityError as e:
+                logger.error("Write-behind dropped a write to task %d that the database rejected (%s); "
+                             "it is kept in %s", task_id, e.orig, DEAD_LETTER_FILE)
+                with open(os.path.join(self.directory, DEAD_LETTER_FILE), "a", encoding="utf-8") as dead_letters:
+                    dead_letters.write(self._encode(task_id, write))
+                    dead_letters.flush()
+                    os.fsync(dead_letters.fileno())
+                rejected += 1
+            with self._lock:
+                del writes[task_id]
+        return rejected
+    
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._flushing)
+    
+    def close(self) -> None:
+        """Stop the flusher and commit what is left."""
+        self._running = False
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._journal.close()
+        self._lock_file.close()
+
+def _lock_directory(directory: str):
+    """Hold an exclusive lock on the journal directory, so two processes never share journals."""
+    lock_file = open(os.path.join(directory, "lock"), "w")
+    try:
+        import fcntl
+    except ImportError:
+        return lock_file  # No advisory locks on this platform
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(f"Write-behind directory {directory} is in use by another process")
+    return lock_file
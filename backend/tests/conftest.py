@@ -0,0 +1,47 @@
+"""
+Shared test fixtures.
+Throwaway SQLite databases and an API client bound to them.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.connection import Base
+from api.dependencies import get_cache, get_database_session
+from main import app, rate_limiter
+import models  # Register all models with Base
+
+rate_limiter.enabled = False  # Tests send requests far faster than any client may
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Engine for a fresh SQLite database with all tables created."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db_session(db_engine):
+    """Session bound to the test database."""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def api_client(db_engine):
+    """API client whose requests use the test database."""
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    
+    def override_session():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    app.dependency_overrides[get_database_session] = override_session
+    get_cache().clear()  # Cached tasks belong to the previous test's database
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_database_session, None)
@@ -0,0 +1,103 @@
+"""
+Analytics tests.
+Tests for completion history collection and rollup reads.
+"""
+
+from datetime import datetime, timedelta
+from analytics.collectors import add_to_rollups, bucket_start, record_completion
+from analytics.evaluation import evaluate, format_table, history_stream, synthetic_stream
+from analytics.processors import get_completion_rollups
+from models.task import Task
+from models.task_history import TaskHistory
+
+def test_bucket_start():
+    """Test hour, day and week bucketing."""
+    moment = datetime(2025, 3, 13, 15, 42, 7)  # A Thursday
+    assert bucket_start(moment, "hour") == datetime(2025, 3, 13, 15)
+    assert bucket_start(moment, "day") == datetime(2025, 3, 13)
+    assert bucket_start(moment, "week") == datetime(2025, 3, 10)
+
+def test_record_completion_updates_rollups(db_session):
+    """Test that completions append history and increment every rollup."""
+    task = Task(title="Ship release", created_at=datetime(2025, 3, 13, 9))
+    db_session.add(task)
+    db_session.commit()
+    
+    record_completion(db_session, task, datetime(2025, 3, 13, 15, 30))
+    record_completion(db_session, task, datetime(2025, 3, 14, 9))
+    db_session.commit()
+    
+    assert db_session.query(TaskHistory).count() == 2
+    daily = get_completion_rollups(db_session, "day")
+    assert [bucket["completed_count"] for bucket in daily] == [1, 1]
+    assert daily[0]["mean_completion_hours"] == 6.5
+    weekly = get_completion_rollups(db_session, "week")
+    assert weekly[0]["completed_count"] == 2
+    assert get_completion_rollups(db_session, "hour", start=datetime(2025, 3, 14))[0]["completed_count"] == 1
+
+def test_bulk_rollups_match_recorded_completions(db_session):
+    """Test that bulk-added completions land in the same buckets with the same lag."""
+    created = datetime(2025, 3, 13, 9)
+    add_to_rollups(db_session, [(created, datetime(2025, 3, 13, 15, 30)), (created, datetime(2025, 3, 13, 16)),
+                                (None, datetime(2025, 3, 14, 9))])
+    db_session.commit()
+    
+    daily = get_completion_rollups(db_session, "day")
+    assert [bucket["completed_count"] for bucket in daily] == [2, 1]
+    assert daily[0]["mean_completion_hours"] == 6.75
+    assert get_completion_rollups(db_session, "week")[0]["completed_count"] == 3
+    assert db_session.query(TaskHistory).count() == 0
+
+def test_completion_endpoint(api_client):
+    """Test that toggling a task complete shows up in the analytics endpoint."""
+    task_id = api_client.post("/api/tasks", json={"title": "Write tests"}).json()["id"]
+    assert api_client.patch(f"/api/tasks/{task_id}/complete").json()["completed"] is True
+    
+    response = api_client.get("/api/analytics/completions", params={"granularity": "week"})
+    assert response.status_code == 200
+    assert response.json()[0]["completed_count"] == 1
+    assert api_client.get("/api/analytics/completions", params={"granularity": "year"}).status_code == 422
+
+def test_evaluate_algorithms_on_synthetic_stream():
+    """Test that the replay harness reports metrics per algorithm and isolates failures."""
+    events = synthetic_stream(300, capacity=0.8, seed=1)
+    results = {result["algorithm"]: result for result in evaluate(events, ["default", "eisenhower"])}
+    
+    default = results["default"]
+    assert default["completed"] + default["open"] == 300
+    assert 200 < default["completed"] <= 240  # slots that find an empty queue go unused
+    assert default["mean_lag_hours"] > 0
+    assert default["ops_per_sec"] > 0 and default["peak_memory_kb"] > 0
+    eisenhower = results["eisenhower"]
+    assert "error" not in eisenhower
+    assert eisenhower["completed"] + eisenhower["open"] == 300
+    assert eisenhower["completed"] == default["completed"]  # Same capacity, same stream
+    assert eisenhower["overdue"] < default["overdue"]  # Ranks tasks near their due date first
+    
+    results["broken"] = {"algorithm": "broken", "error": "ValueError: no scores"}
+    assert "failed: ValueError: no scores" in format_table(list(results.values()))
+
+def test_replay_does_not_depend_on_the_wall_clock():
+    """Test that replaying a stream moved in time ranks and serves the tasks the same way."""
+    def outcomes(start):
+        events = synthetic_stream(400, start=start, capacity=0.8, seed=2)
+        results = evaluate(events, ["default", "eisenhower", "time_decay"], measure_memory=False)
+        return [(r["algorithm"], r["completed"], r["overdue"], r["mean_lag_hours"]) for r in results]
+    
+    past = outcomes(datetime(2020, 1, 6))
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    assert past == outcomes(today + timedelta(days=400))
+    assert past[1][2] < past[0][2]  # Eisenhower still serves fewer tasks late than the default
+
+def test_history_stream(db_session):
+    """Test that task history replays as creates followed by completion slots."""
+    task = Task(title="Ship release", urgency=4, created_at=datetime(2025, 3, 13, 9))
+    db_session.add(task)
+    db_session.commit()
+    record_completion(db_session, task, datetime(2025, 3, 13, 15))
+    db_session.commit()
+    
+    events = history_stream(db_session)
+    assert [event.kind for event in events] == ["create", "complete"]
+    result = evaluate(events, ["default"], measure_memory=False)[0]
+    assert result["completed"] == 1 and result["mean_lag_hours"] == 6.0
@@ -3,9 +3,20 @@ API endpoint tests.
 Tests for FastAPI route handlers and endpoints.
 """
 
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
 import pytest
 from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from api.dependencies import get_deadline_index, get_priority_queue
+from api.routes import _change_stream
 from main import app
+from priority_queue.deadlines import DeadlineIndex
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
 
 client = TestClient(app)
 
@@ -21,5 +32,152 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
+def test_startup_does_not_import_ai_sdk():
+    """Test that importing the app leaves the Gemini SDK unloaded until first use."""
+    probe = "import sys, main; print('google.generativeai' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False"
+
+def test_task_writes_feed_queue_changes(api_client):
+    """Test that task writes show up as queue change events."""
+    queue = PriorityQueue()
+    app.dependency_overrides[get_priority_queue] = lambda: queue
+    try:
+        version = api_client.get("/api/queue/changes").json()["version"]
+        task_id = api_client.post("/api/tasks", json={"title": "Feed", "urgency": 5, "difficulty": 5}).json()["id"]
+        api_client.put(f"/api/tasks/{task_id}", json={"urgency": 1})
+        api_client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"})
+        api_client.patch(f"/api/tasks/{task_id}/complete")
+        api_client.patch(f"/api/tasks/{task_id}/complete")
+        api_client.delete(f"/api/tasks/{task_id}")
+        
+        changes = api_client.get(f"/api/queue/changes?since={version}").json()
+        assert [event["kind"] for event in changes["events"]] == [
+            "added", "priority_changed", "updated", "completed", "added", "removed",
+        ]
+        assert changes["events"][0]["priority"] == -100.0  # negated score: the top score queues first
+        assert changes["version"] == version + 6
+    finally:
+        app.dependency_overrides.pop(get_priority_queue, None)
+
+def test_change_stream_resumes_from_version():
+    """Test that the event stream replays changes after a version, wakes on new ones, then announces resets."""
+    class Request:
+        """Connected for the given number of reads."""
+        def __init__(self, reads):
+            self.reads = reads
+        
+        async def is_disconnected(self):
+            self.reads -= 1
+            return self.reads < 0
+    
+    queue = PriorityQueue(change_log_size=2)
+    version = queue.version
+    queue.push(QueueEntry(1.0, 1))
+    queue.push(QueueEntry(2.0, 2))
+    
+    async def drain(stream):
+        return [chunk async for chunk in stream]
+    
+    async def collect(since, reads, push=None):
+        if push is not None:
+            asyncio.get_running_loop().call_later(0.05, queue.push, push)
+        # Idle streams wait for the change log; give up long before the keepalive timeout
+        return await asyncio.wait_for(drain(_change_stream(Request(reads), queue, since)), 5)
+    
+    chunks = asyncio.run(collect(version + 1, 3, push=QueueEntry(3.0, 3)))
+    assert chunks == [
+        f"id: {version + n}\nevent: added\ndata: "
+        + json.dumps({"version": version + n, "kind": "added", "task_id": n, "priority": float(n)})
+        + "\n\n"
+        for n in (2, 3)
+    ]
+    assert not queue.changes.listeners
+    assert asyncio.run(collect(version - 5, 1))[0].startswith(f"id: {version + 3}\nevent: reset\n")
+
+def test_task_changes_since_watermark(api_client):
+    """Test that incremental sync returns only changed tasks and tombstones for deleted ones."""
+    kept = api_client.post("/api/tasks", json={"title": "Kept"}).json()
+    edited = api_client.post("/api/tasks", json={"title": "Edited"}).json()
+    removed = api_client.post("/api/tasks", json={"title": "Removed"}).json()
+    
+    version = api_client.get("/api/tasks/changes?since=0").json()["version"]
+    time.sleep(0.01)
+    api_client.put(f"/api/tasks/{edited['id']}", json={"title": "Edited again"})
+    api_client.delete(f"/api/tasks/{removed['id']}")
+    
+    changes = api_client.get(f"/api/tasks/changes?since={version}").json()
+    assert [task["title"] for task in changes["tasks"]] == ["Edited again"]
+    assert changes["deleted"] == [removed["id"]]
+    assert changes["version"] > version
+    
+    by_timestamp = api_client.get("/api/tasks/changes", params={"since": kept["created_at"]}).json()
+    assert {task["id"] for task in by_timestamp["tasks"]} == {kept["id"], edited["id"]}
+    assert api_client.get("/api/tasks/changes?since=yesterday").status_code == 400
+
+def test_task_search_ranks_and_stays_in_sync(api_client):
+    """Test that search ranks title matches first, pages, blends in priority and follows edits."""
+    body = api_client.post("/api/tasks", json={"title": "Call plumber", "description": "Invoice overdue", "urgency": 1}).json()
+    title = api_client.post("/api/tasks", json={"title": "Pay invoice", "description": "Plumber visit", "urgency": 1}).json()
+    urgent = api_client.post("/api/tasks", json={"title": "Write report", "description": "Quarterly invoices",
+                                                 "urgency": 5, "difficulty": 5}).json()
+    
+    results = api_client.get("/api/tasks/search", params={"q": "invoice"}).json()
+    assert results["total"] == 3
+    assert results["tasks"][0]["id"] == title["id"]
+    assert results["tasks"][0]["relevance"] > results["tasks"][1]["relevance"]
+    page = api_client.get("/api/tasks/search", params={"q": "invoice", "limit": 1, "offset": 1}).json()
+    assert [task["id"] for task in page["tasks"]] == [results["tasks"][1]["id"]]
+    
+    blended = api_client.get("/api/tasks/search", params={"q": "invoice", "priority_weight": 0.9}).json()
+    assert blended["tasks"][0]["id"] == urgent["id"]
+    assert blended["tasks"][0]["priority_score"] > blended["tasks"][1]["priority_score"]
+    
+    # Prefix match on the last word; punctuation is not FTS5 syntax
+    assert [task["id"] for task in api_client.get("/api/tasks/search?q=plumb").json()["tasks"]] == [body["id"], title["id"]]
+    assert api_client.get("/api/tasks/search", params={"q": 'call ("plumber"-'}).json()["total"] == 1
+    
+    api_client.put(f"/api/tasks/{title['id']}", json={"title": "Pay electrician", "description": "Bill"})
+    api_client.delete(f"/api/tasks/{body['id']}")
+    api_client.patch(f"/api/tasks/{urgent['id']}/complete")
+    assert api_client.get("/api/tasks/search?q=plumber").json()["total"] == 0
+    assert api_client.get("/api/tasks/search?q=electrician").json()["tasks"][0]["id"] == title["id"]
+    assert api_client.get("/api/tasks/search?q=invoice&completed=false").json()["total"] == 0
+    assert api_client.get("/api/tasks/search?q=invoice&completed=true").json()["total"] == 1
+
+def test_due_and_overdue_tasks(api_client):
+    """Test deadline windows and overdue listings, and that the deadline index follows task writes."""
+    index = DeadlineIndex()
+    app.dependency_overrides[get_deadline_index] = lambda: index
+    try:
+        now = datetime.utcnow()
+        def create(title, **fields):
+            return api_client.post("/api/tasks", json={"title": title, **fields}).json()["id"]
+        
+        overdue = create("Overdue", due_date=(now - timedelta(days=2)).isoformat())
+        soon = create("Soon", due_date=(now + timedelta(hours=2)).isoformat())
+        later = create("Later", due_date=(now + timedelta(days=3)).isoformat())
+        create("Undated")
+        done = create("Done", due_date=(now - timedelta(days=1)).isoformat())
+        api_client.patch(f"/api/tasks/{done}/complete")
+        
+        def ids(path):
+            return [task["id"] for task in api_client.get(path).json()["tasks"]]
+        
+        assert ids("/api/tasks/overdue") == [overdue]
+        assert ids("/api/tasks/due") == [soon]
+        assert ids("/api/tasks/due?include_overdue=true") == [overdue, soon]
+        assert ids("/api/tasks/due?hours=100") == [soon, later]
+        assert [task_id for _, task_id in index.due_before(datetime.max)] == [overdue, soon, later]
+        
+        api_client.put(f"/api/tasks/{later}", json={"due_date": (now - timedelta(days=5)).isoformat()})
+        api_client.delete(f"/api/tasks/{soon}")
+        assert ids("/api/tasks/overdue") == [later, overdue]
+        assert [task_id for _, task_id in index.pop_due(now)] == [later, overdue]
+        assert len(index) == 0
+    finally:
+        app.dependency_overrides.pop(get_deadline_index, None)
+
 # Add more API tests as needed
 
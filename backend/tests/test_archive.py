@@ -0,0 +1,40 @@
+"""
+Archive tests.
+Tests for moving completed tasks into monthly archive tables.
+"""
+
+from datetime import datetime
+from models.task import Task
+from models.task_history import TaskHistory
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
+from services.archive_service import ArchiveService
+
+def test_archive_completed_tasks(db_session):
+    """Test that only old completed tasks move, with their history, into monthly partitions."""
+    old_done = Task(title="Old done", completed=True, updated_at=datetime(2025, 1, 15))
+    newer_done = Task(title="Newer done", completed=True, updated_at=datetime(2025, 2, 20))
+    recent_done = Task(title="Recent done", completed=True, updated_at=datetime(2025, 3, 30))
+    active = Task(title="Active", updated_at=datetime(2025, 1, 1))
+    db_session.add_all([old_done, newer_done, recent_done, active])
+    db_session.commit()
+    db_session.add(TaskHistory(task_id=old_done.id, completed_at=datetime(2025, 1, 15)))
+    db_session.commit()
+    old_id = old_done.id
+    
+    queue = PriorityQueue()
+    queue.push(QueueEntry(1.0, old_id))
+    service = ArchiveService(db_session, batch_size=1)
+    archived = service.archive_completed(older_than_days=30, queue=queue, now=datetime(2025, 4, 1))
+    db_session.expire_all()
+    
+    assert archived == 2
+    assert {t.title for t in db_session.query(Task).all()} == {"Recent done", "Active"}
+    assert db_session.query(TaskHistory).count() == 0
+    assert len(queue) == 0
+    assert service.list_partitions() == ["2025-02", "2025-01"]
+    assert [t["title"] for t in service.get_archived_tasks("2025-01")] == ["Old done"]
+    assert service.get_archived_tasks("bogus") == []
+    
+    archived_task = service.get_archived_task(old_id)
+    assert archived_task["title"] == "Old done"
+    assert len(archived_task["history"]) == 1
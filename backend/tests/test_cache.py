@@ -0,0 +1,150 @@
+"""
+Cache tests.
+Tests for the LRU and shared backends, the tiered cache and cached task reads.
+"""
+
+import threading
+import time
+import pytest
+from sqlalchemy import event
+from api.dependencies import get_cache
+from cache import LRUCache, RedisCache, TieredCache, cache_from_url
+from cache.backends import DELETE_SCRIPT, MISSING, SET_IF_VERSION_SCRIPT
+from main import app
+
+class FakeRedis:
+    """Dictionary standing in for a Redis client."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, px=None):
+        self.data[key] = value
+    
+    def delete(self, key):
+        self.data.pop(key, None)
+    
+    def eval(self, script, numkeys, key, version_key, *args):
+        if script == DELETE_SCRIPT:
+            self.data.pop(key, None)
+            self.data[version_key] = str(int(self.data.get(version_key, 0)) + 1)
+            return 1
+        if script == SET_IF_VERSION_SCRIPT:
+            value, version, ttl = args
+            if int(self.data.get(version_key, 0)) != version:
+                return 0
+            self.data[key] = value
+            return 1
+        raise ValueError("Unknown script")
+    
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if key.startswith(match.rstrip("*"))]
+
+class BrokenBackend(LRUCache):
+    """Shared backend that is down."""
+    
+    def get(self, key):
+        raise ConnectionError("down")
+    
+    def set(self, key, value):
+        raise ConnectionError("down")
+
+def test_lru_cache_evicts_and_expires():
+    """Test that the LRU drops the least recently used entry and expired entries."""
+    cache = LRUCache(max_entries=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is MISSING
+    assert len(cache) == 1
+
+def test_tiered_cache_reads_through_levels():
+    """Test that shared hits fill the local level and writes reach both levels."""
+    l1, l2 = LRUCache(), RedisCache("redis://unused", client=FakeRedis())
+    cache = TieredCache(l1, l2)
+    l2.set("task:1", {"title": "shared"})
+    assert cache.get("task:1") == {"title": "shared"}
+    assert l1.get("task:1") == {"title": "shared"}
+    
+    cache.set("task:2", {"title": "new"})
+    assert l2.get("task:2") == {"title": "new"}
+    cache.delete("task:2")
+    assert cache.get("task:2") is MISSING
+    
+    # A shared backend outage degrades to loading from the source
+    assert TieredCache(LRUCache(), BrokenBackend()).get_or_load("k", lambda: 7) == 7
+    assert isinstance(cache_from_url("memory://?ttl=5"), LRUCache)
+    with pytest.raises(ValueError):
+        cache_from_url("memcached://localhost")
+
+def test_tiered_cache_coalesces_concurrent_loads():
+    """Test that concurrent misses for one key run the loader once."""
+    cache = TieredCache()
+    calls = []
+    
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+def test_tiered_cache_drops_loads_overlapping_writes():
+    """Test that a value loaded before a concurrent write is not cached over it."""
+    cache = TieredCache()
+    
+    def loader():
+        cache.set("k", "new")  # a writer commits while the old row is being read
+        return "old"
+    
+    assert cache.get_or_load("k", loader) == "old"
+    assert cache.get("k") == "new"
+
+def test_shared_level_drops_loads_overlapping_other_workers_deletes():
+    """Test that a worker's load cannot store a row another worker has since changed."""
+    for shared in (LRUCache(), RedisCache("redis://unused", client=FakeRedis())):
+        reader, writer = TieredCache(LRUCache(max_entries=0), shared), TieredCache(LRUCache(max_entries=0), shared)
+        
+        def loader():
+            writer.delete("k")  # another worker commits a write while the old row is being read
+            return "old"
+        
+        assert reader.get_or_load("k", loader) == "old"
+        assert shared.get("k") is MISSING
+        assert reader.get_or_load("k", lambda: "new") == "new"
+        assert writer.get("k") == "new"
+
+def test_cached_task_reads_skip_database(api_client, db_engine):
+    """Test that repeated reads of a task issue no SQL and writes invalidate the cache."""
+    cache = TieredCache()  # A single worker's in-process LRU
+    app.dependency_overrides[get_cache] = lambda: cache
+    try:
+        task_id = api_client.post("/api/tasks", json={"title": "Hot"}).json()["id"]
+        assert api_client.get(f"/api/tasks/{task_id}").json()["title"] == "Hot"
+        statements = []
+        event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        
+        assert api_client.get(f"/api/tasks/{task_id}").json()["title"] == "Hot"
+        assert api_client.get(f"/api/tasks/{task_id}").json()["title"] == "Hot"
+        assert statements == []
+        
+        api_client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"})
+        assert api_client.get(f"/api/tasks/{task_id}").json()["title"] == "Renamed"
+        api_client.delete(f"/api/tasks/{task_id}")
+        assert api_client.get(f"/api/tasks/{task_id}").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_cache, None)
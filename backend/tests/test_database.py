@@ -0,0 +1,101 @@
+"""
+Database tests.
+Tests for database initialization and schema migrations.
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from database import connection
+from database.migrations import MigrationRunner
+
+@pytest.fixture
+def temp_engine(tmp_path, monkeypatch):
+    """Point the database layer at a throwaway SQLite file."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(connection, "engine", engine)
+    yield engine
+    engine.dispose()
+
+def test_init_db_records_schema_version(temp_engine):
+    """Test that init_db creates tables and stamps the schema version."""
+    assert connection.get_schema_version() is None
+    connection.init_db()
+    
+    assert connection.get_schema_version() == connection.SCHEMA_VERSION
+    assert "tasks" in inspect(temp_engine).get_table_names()
+
+def test_init_db_skips_current_schema(temp_engine, monkeypatch):
+    """Test that a current database skips create_all and migrations."""
+    connection.init_db()
+    
+    def fail():
+        raise AssertionError("migrate_schema should not run on a current database")
+    monkeypatch.setattr(connection, "migrate_schema", fail)
+    connection.init_db()
+    
+    # An outdated stamp runs the migrations again
+    with temp_engine.begin() as conn:
+        conn.execute(text("UPDATE schema_version SET version = 0"))
+    with pytest.raises(AssertionError):
+        connection.init_db()
+
+def _create_legacy_tasks(engine, count):
+    """Create a pre-due_date tasks table with an estimated_time column."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE tasks (
+                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                title VARCHAR(200) NOT NULL,
+                description TEXT,
+                urgency INTEGER NOT NULL DEFAULT 3,
+                difficulty INTEGER NOT NULL DEFAULT 3,
+                estimated_time INTEGER,
+                completed BOOLEAN NOT NULL DEFAULT 0,
+                created_at DATETIME NOT NULL,
+                updated_at DATETIME
+            )
+        """))
+        conn.execute(
+            text("INSERT INTO tasks (title, estimated_time, created_at) VALUES (:title, 30, '2025-01-01 00:00:00')"),
+            [{"title": f"Task {i}"} for i in range(count)],
+        )
+
+def test_batched_migration_resumes_after_crash(temp_engine):
+    """Test that an interrupted table rebuild resumes from its checkpoint."""
+    _create_legacy_tasks(temp_engine, 2500)
+    
+    class CrashingRunner(MigrationRunner):
+        """Runner that dies after committing its first batch."""
+        def _copy(self, rebuild, progress):
+            with temp_engine.begin() as conn:
+                conn.execute(text(rebuild.copy_sql("id <= 1000")))
+                conn.execute(text("UPDATE migration_progress SET last_id = 1000, rows_copied = 1000"))
+            raise RuntimeError("simulated crash")
+    
+    with pytest.raises(RuntimeError):
+        CrashingRunner(temp_engine).run(connection.TASKS_DUE_DATE_REBUILD)
+    assert MigrationRunner(temp_engine).get_progress(connection.TASKS_DUE_DATE_REBUILD.name)["last_id"] == 1000
+    
+    assert connection.migrate_schema()
+    
+    inspector = inspect(temp_engine)
+    columns = [col["name"] for col in inspector.get_columns("tasks")]
+    assert "due_date" in columns and "estimated_time" not in columns
+    assert {index["name"] for index in inspector.get_indexes("tasks")} >= {"ix_tasks_title", "ix_tasks_completed", "ix_tasks_updated_at"}
+    with temp_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks")).scalar() == 2500
+        # Existing tasks are indexed for search when the index is first built
+        assert conn.execute(text("SELECT COUNT(*) FROM tasks_fts WHERE tasks_fts MATCH 'task'")).scalar() == 2500
+    assert MigrationRunner(temp_engine).get_progress(connection.TASKS_DUE_DATE_REBUILD.name)["phase"] == "done"
+
+def test_deadline_windows_use_index(temp_engine):
+    """Test that deadline window queries range-scan the (completed, due_date) index instead of the table."""
+    connection.init_db()
+    with temp_engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE completed = 0 AND due_date >= :start AND due_date < :end "
+            "ORDER BY due_date, id"
+        ), {"start": "2024-01-01", "end": "2024-01-02"}).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_tasks_completed_due_date (completed=? AND due_date>? AND due_date<?)" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,126 @@
+"""
+Job runner tests.
+Tests for priority order, deduplication, retries and the rescoring job.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from api.dependencies import get_job_runner
+from jobs import JOB_HANDLERS, JobRunner
+from main import app
+from models.job import Job
+from models.task import Task
+from priority_queue.priority_queue import PriorityQueue
+
+def test_jobs_run_in_priority_order_and_dedup(db_engine):
+    """Test that ready jobs run lowest priority first and a dedup key blocks duplicates."""
+    ran = []
+    done = threading.Event()
+    
+    def record(runner, payload):
+        ran.append(payload["n"])
+        if len(ran) == 3:
+            done.set()
+        return payload["n"]
+    
+    runner = JobRunner(sessionmaker(bind=db_engine), workers=1, handlers={"record": record})
+    first = runner.enqueue("record", {"n": 1}, priority=50, dedup_key="same")
+    assert runner.enqueue("record", {"n": 99}, priority=50, dedup_key="same")["id"] == first["id"]
+    runner.enqueue("record", {"n": 2}, priority=10)
+    runner.enqueue("record", {"n": 3}, priority=90)
+    runner.start()
+    try:
+        assert done.wait(5)
+    finally:
+        runner.stop()
+    
+    assert ran == [2, 1, 3]
+    job = runner.get_job(first["id"])
+    assert job["status"] == "succeeded"
+    assert job["result"] == 1
+    # Finished jobs no longer block their dedup key
+    assert runner.enqueue("record", {"n": 4}, dedup_key="same")["id"] != first["id"]
+
+def test_failed_jobs_retry_with_backoff_then_fail(db_engine):
+    """Test that a failing job is requeued with a delay until it runs out of attempts."""
+    def flaky(runner, payload):
+        raise RuntimeError("service unavailable")
+    
+    runner = JobRunner(sessionmaker(bind=db_engine), handlers={"flaky": flaky}, backoff=60)
+    job_id = runner.enqueue("flaky", max_attempts=2)["id"]
+    
+    assert runner.run_job(job_id)
+    job = runner.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["attempts"] == 1
+    assert job["last_error"] == "RuntimeError: service unavailable"
+    assert datetime.fromisoformat(job["run_at"]) > datetime.utcnow() + timedelta(seconds=20)
+    assert not runner.run_job(job_id)  # Not due until the backoff has passed
+    
+    runner.backoff = 0
+    with sessionmaker(bind=db_engine)() as db:
+        db.query(Job).update({Job.run_at: datetime.utcnow()})
+        db.commit()
+    assert runner.run_job(job_id)
+    job = runner.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+
+def test_rescore_job_reorders_queue(db_engine, db_session):
+    """Test that the rescoring job moves tasks to their positions under another algorithm."""
+    now = datetime.utcnow()
+    db_session.add_all([
+        Task(title="Urgent", urgency=5, difficulty=5, due_date=now + timedelta(days=30)),
+        Task(title="Overdue", urgency=1, difficulty=1, due_date=now - timedelta(days=2)),
+    ])
+    db_session.commit()
+    queue = PriorityQueue()
+    runner = JobRunner(sessionmaker(bind=db_engine), queue=queue)
+    
+    job_id = runner.enqueue("rescore_tasks", {"algorithm": "default"})["id"]
+    assert runner.run_job(job_id)
+    assert runner.get_job(job_id)["result"] == {"rescored": 2}
+    assert queue.peek().task_id == 1
+    
+    assert runner.run_job(runner.enqueue("rescore_tasks", {"algorithm": "time_decay"})["id"])
+    assert queue.peek().task_id == 2
+    assert len(queue) == 2
+    
+    # Re-scoring with unchanged scores leaves the change feed alone
+    version = queue.version
+    assert runner.run_job(runner.enqueue("rescore_tasks", {"algorithm": "default"})["id"])
+    assert runner.run_job(runner.enqueue("rescore_tasks", {"algorithm": "default"})["id"])
+    assert [e["kind"] for e in queue.get_changes(version)["events"]] == ["priority_changed", "priority_changed"]
+
+def test_rescore_ranks_scores_above_the_ceiling(db_engine, db_session):
+    """Test that overdue tasks scoring above 100 still queue in score order."""
+    now = datetime.utcnow()
+    db_session.add_all([
+        Task(title="Late", urgency=5, due_date=now - timedelta(days=2)),
+        Task(title="Later", urgency=5, due_date=now - timedelta(days=5)),
+    ])
+    db_session.commit()
+    queue = PriorityQueue()
+    runner = JobRunner(sessionmaker(bind=db_engine), queue=queue)
+    
+    assert runner.run_job(runner.enqueue("rescore_tasks", {"algorithm": "time_decay"})["id"])
+    assert queue.peek().task_id == 2
+
+def test_prioritize_endpoint_queues_one_job(api_client, db_engine):
+    """Test that /tasks/prioritize queues a deduplicated rescoring job."""
+    runner = JobRunner(sessionmaker(bind=db_engine), handlers=JOB_HANDLERS)
+    app.dependency_overrides[get_job_runner] = lambda: runner
+    try:
+        response = api_client.post("/api/tasks/prioritize?algorithm=time_decay")
+        assert response.status_code == 202
+        job = response.json()
+        assert job["name"] == "rescore_tasks"
+        assert job["status"] == "queued"
+        assert api_client.post("/api/tasks/prioritize?algorithm=time_decay").json()["id"] == job["id"]
+        assert api_client.post("/api/tasks/prioritize?algorithm=nope").status_code == 400
+        
+        assert api_client.get(f"/api/jobs/{job['id']}").json()["status"] == "queued"
+        assert api_client.get("/api/jobs/999").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_job_runner, None)
@@ -0,0 +1,60 @@
+"""
+ML tests.
+Tests for offline training and learned priority scoring.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from ml.models import LogisticPriorityModel, load_latest_model, model_versions, task_features
+from ml.training import train_model
+from models.task import Task
+from models.task_history import TaskHistory
+from priority_queue.algorithms import LearnedPriorityAlgorithm
+
+NOW = datetime(2025, 6, 1)
+
+@pytest.fixture
+def history(db_session):
+    """Urgent tasks get done within a day; low-urgency ones pile up."""
+    for i in range(40):
+        created = NOW - timedelta(days=60 - i)
+        urgent = Task(title=f"Urgent {i}", urgency=5, difficulty=2, completed=True, created_at=created)
+        idle = Task(title=f"Idle {i}", urgency=1, difficulty=4, created_at=created)
+        db_session.add_all([urgent, idle])
+        db_session.flush()
+        db_session.add(TaskHistory(task_id=urgent.id, completed_at=created + timedelta(hours=6)))
+    db_session.commit()
+    return db_session
+
+def test_train_model_writes_versions(history, tmp_path):
+    """Test that each training run writes a new, loadable weights version."""
+    model, path = train_model(history, str(tmp_path), now=NOW, epochs=50)
+    train_model(history, str(tmp_path), now=NOW, epochs=50)
+    
+    assert model.version == 1
+    assert model_versions(str(tmp_path)) == [1, 2]
+    latest = load_latest_model(str(tmp_path))
+    assert latest.version == 2
+    features = task_features(history.query(Task).all(), NOW)
+    assert latest.score(features) == pytest.approx(LogisticPriorityModel.load(path).score(features))
+
+def test_learned_algorithm_scores(history, tmp_path, monkeypatch):
+    """Test that the learned algorithm ranks tasks like the history and matches scalar scoring."""
+    fresh = [
+        Task(title="Urgent", urgency=5, difficulty=2, created_at=NOW),
+        Task(title="Idle", urgency=1, difficulty=4, created_at=NOW),
+    ]
+    monkeypatch.setattr(LearnedPriorityAlgorithm, "model", None)
+    monkeypatch.setattr(LearnedPriorityAlgorithm, "_model_checked", False)
+    monkeypatch.setenv("ML_MODEL_DIR", str(tmp_path))
+    
+    # Untrained: falls back to the default algorithm
+    assert LearnedPriorityAlgorithm.calculate_priority(fresh[0]) == 76.0
+    
+    train_model(history, str(tmp_path), now=NOW, epochs=50)
+    LearnedPriorityAlgorithm.load_model()
+    scores = LearnedPriorityAlgorithm.score_tasks(fresh, NOW)
+    assert scores[0] > scores[1]
+    assert all(0 <= score <= 100 for score in scores)
+    LearnedPriorityAlgorithm.apply_to_tasks(fresh)
+    assert fresh[0].priority_score > fresh[1].priority_score
@@ -0,0 +1,96 @@
+"""
+Monitoring tests.
+Tests for metric rendering, the /metrics endpoint and the slow request profiler.
+"""
+
+import time
+from monitoring.metrics import QUEUE_OPERATION_SECONDS, Counter, Histogram, MetricsRegistry
+from monitoring.middleware import RequestMetrics
+from monitoring.profiler import RequestProfiler
+
+def test_histogram_rendering():
+    """Test Prometheus text output for counters and cumulative histogram buckets."""
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requests.", ("route",), registry=registry)
+    latency = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0), registry=registry)
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, route='/"b"')
+    
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="/a"} 3' in lines
+    assert 'latency_seconds_bucket{route="/\\"b\\"",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/\\"b\\"",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/\\"b\\"",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/\\"b\\""} 4' in lines
+    assert latency.count(route='/"b"') == 4
+
+def test_metrics_endpoint(api_client):
+    """Test that requests are recorded by route template with their SQL statement counts."""
+    task_id = api_client.post("/api/tasks", json={"title": "Measure me"}).json()["id"]
+    api_client.get(f"/api/tasks/{task_id}")
+    api_client.get("/api/tasks")
+    before = QUEUE_OPERATION_SECONDS.count(operation="update_priority", queue="local")
+    api_client.put(f"/api/tasks/{task_id}", json={"urgency": 5})
+    
+    response = api_client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert ('priorityforge_http_request_duration_seconds_count'
+            '{method="GET",route="/api/tasks/{task_id}",status="200"}') in body
+    assert f'route="/api/tasks/{task_id}"' not in body
+    assert 'priorityforge_sql_statement_duration_seconds_count{operation="SELECT"}' in body
+    assert 'priorityforge_http_serialization_duration_seconds_count{method="GET",route="/api/tasks"}' in body
+    sql_bucket = 'priorityforge_http_request_sql_statements_bucket{method="GET",route="/api/tasks",le="0"} 0'
+    assert sql_bucket in body
+    assert QUEUE_OPERATION_SECONDS.count(operation="update_priority", queue="local") == before + 1
+    assert 'priorityforge_queue_operation_duration_seconds_count{operation="push",queue="local"}' in body
+
+def busy_wait(seconds):
+    """Spin so the sampler sees this frame."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_profiler_samples_attached_threads():
+    """Test that the sampler counts stacks only for attached threads and keeps slow requests."""
+    profiler = RequestProfiler(interval=0.001, threshold=0.01, capacity=2)
+    metrics = RequestMetrics(profiled=True)
+    profiler.start()
+    try:
+        profiler.attach(metrics)
+        busy_wait(0.1)
+        profiler.detach()
+    finally:
+        profiler.stop()
+    
+    assert any("busy_wait" in stack for stack in metrics.samples)
+    metrics.statements.append(("SELECT 1", 0.002))
+    for path in ("/a", "/b", "/c"):
+        profiler.record("GET", path, path, 200, 0.2, metrics)
+    profiler.record("GET", "/fast", "/fast", 200, 0.001, metrics)
+    captures = profiler.captures()
+    assert [capture["path"] for capture in captures] == ["/b", "/c"]
+    assert captures[0]["sql"] == [{"statement": "SELECT 1", "duration_ms": 2.0}]
+
+def test_profiler_admin_endpoints(api_client, monkeypatch):
+    """Test that admin endpoints require the token and capture slow requests with their SQL."""
+    assert api_client.get("/api/admin/profiler").status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert api_client.get("/api/admin/profiler", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    
+    headers = {"X-Admin-Token": "secret"}
+    assert api_client.post("/api/admin/profiler/start?threshold_ms=0", headers=headers).json()["enabled"]
+    try:
+        api_client.get("/api/tasks")
+    finally:
+        api_client.post("/api/admin/profiler/stop", headers=headers)
+    
+    response = api_client.get("/api/admin/profiler/captures", headers=headers)
+    assert "attachment" in response.headers["content-disposition"]
+    capture = [c for c in response.json() if c["route"] == "/api/tasks"][-1]
+    assert isinstance(capture["queue_size"], int)
+    assert capture["sql"][0]["statement"].startswith("SELECT")
+    api_client.delete("/api/admin/profiler/captures", headers=headers)
+    assert api_client.get("/api/admin/profiler", headers=headers).json()["captures"] == 0
@@ -0,0 +1,91 @@
+"""
+Reminder tests.
+Tests for the reminder timer heap, its sinks and the scheduler loop.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from notifications import ChangeFeedSink, ReminderScheduler, ReminderSink
+from priority_queue.deadlines import DeadlineIndex
+from priority_queue.priority_queue import PriorityQueue
+
+class RecordingSink(ReminderSink):
+    """Keeps every batch it is sent."""
+    
+    name = "recording"
+    
+    def __init__(self):
+        self.batches = []
+    
+    async def send(self, reminders):
+        self.batches.append(list(reminders))
+
+class FailingSink(ReminderSink):
+    name = "failing"
+    
+    async def send(self, reminders):
+        raise RuntimeError("receiver down")
+
+def test_reminders_follow_due_date_edits():
+    """Test that reminders fire in order at each offset and move with due date edits."""
+    now = datetime(2024, 1, 1, 12, 0)
+    clock = [now]
+    deadlines = DeadlineIndex()
+    deadlines.set(1, now + timedelta(minutes=30))
+    deadlines.set(2, now + timedelta(hours=3))
+    deadlines.set(3, now - timedelta(hours=1))  # Every reminder already passed
+    sink = RecordingSink()
+    queue = PriorityQueue()
+    start = queue.get_changes()["version"]
+    scheduler = ReminderScheduler(deadlines, [FailingSink(), sink, ChangeFeedSink(queue)],
+                                  offsets=(3600, 0, -600), clock=lambda: clock[0])
+    
+    assert scheduler.reload() == 2
+    # Task 1 is inside its hour-ahead reminder already, so its next one is when due
+    assert scheduler.peek() == now + timedelta(minutes=30)
+    deadlines.listeners.append(scheduler.on_deadline)
+    deadlines.set(4, now + timedelta(minutes=20))
+    deadlines.set(2, now + timedelta(minutes=70))  # Moved earlier: due soon in 10 minutes
+    deadlines.remove(4)  # Completed or deleted
+    assert len(scheduler) == 2
+    
+    assert asyncio.run(scheduler.fire_due()) == []
+    clock[0] = now + timedelta(minutes=35)
+    fired = asyncio.run(scheduler.fire_due())
+    assert [(r.task_id, r.kind) for r in fired] == [(2, "due_soon"), (1, "due")]
+    assert fired[0].remind_at == now + timedelta(minutes=10)
+    clock[0] = now + timedelta(hours=2)
+    fired = asyncio.run(scheduler.fire_due())
+    assert [(r.task_id, r.kind) for r in fired] == [(1, "overdue"), (2, "due"), (2, "overdue")]
+    assert len(scheduler) == 0
+    
+    # The failing sink does not stop the others
+    assert sum(len(batch) for batch in sink.batches) == 5
+    events = queue.get_changes(start)["events"]
+    assert [(e["kind"], e["task_id"]) for e in events] == [
+        ("due_soon", 2), ("due", 1), ("overdue", 1), ("due", 2), ("overdue", 2),
+    ]
+    assert len(queue) == 0
+
+def test_scheduler_wakes_for_earlier_reminder():
+    """Test that a new earliest reminder wakes the sleeping scheduler."""
+    async def run():
+        deadlines = DeadlineIndex()
+        deadlines.set(1, datetime.utcnow() + timedelta(hours=1))
+        sink = RecordingSink()
+        scheduler = ReminderScheduler(deadlines, [sink], offsets=(0,), max_sleep=30)
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.05)  # Asleep until task 1 is due
+            deadlines.set(2, datetime.utcnow() + timedelta(milliseconds=100))
+            for _ in range(100):
+                if sink.batches:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await scheduler.stop()
+        assert not deadlines.listeners
+        return sink.batches
+    
+    batches = asyncio.run(run())
+    assert [[(r.task_id, r.kind) for r in batch] for batch in batches] == [[(2, "due")]]
@@ -4,8 +4,19 @@ Tests for priority queue algorithms and engine functionality.
 """
 
 import pytest
+import os
+import random
+import threading
+import time
 from datetime import datetime, timedelta
+from priority_queue.deadlines import DeadlineIndex
 from priority_queue.engine import PriorityQueueEngine
+from priority_queue.heaps import HEAP_BACKENDS
+from priority_queue.priority_queue import PriorityQueue, QueueEntry
+from priority_queue.service import QueueClient, QueueServer, QueueServiceError, parse_address, start_queue_service
+from priority_queue.shared_snapshot import SharedQueueSnapshot
+from priority_queue.parallel import score_tasks
+from priority_queue.persistence import QueueStore
 from priority_queue.algorithms import (
     DefaultPriorityAlgorithm,
     EisenhowerMatrixAlgorithm,
@@ -25,10 +36,13 @@ def test_default_algorithm():
 
 def test_eisenhower_algorithm():
     """Test Eisenhower Matrix algorithm."""
-    # Urgent + Important
-    task = Task(title="Task 1", is_urgent=True, is_important=True)
-    score = EisenhowerMatrixAlgorithm.calculate_priority(task)
-    assert score == 100.0
+    soon = datetime.utcnow() + timedelta(hours=6)
+    later = datetime.utcnow() + timedelta(days=10)
+    # Urgent (due soon) + Important (high urgency)
+    assert EisenhowerMatrixAlgorithm.calculate_priority(Task(title="Task 1", urgency=5, due_date=soon)) == 100.0
+    assert EisenhowerMatrixAlgorithm.calculate_priority(Task(title="Task 2", urgency=4, due_date=later)) == 75.0
+    assert EisenhowerMatrixAlgorithm.calculate_priority(Task(title="Task 3", urgency=2, due_date=soon)) == 50.0
+    assert EisenhowerMatrixAlgorithm.calculate_priority(Task(title="Task 4", urgency=2)) == 25.0
 
 def test_priority_engine():
     """Test priority queue engine operations."""
@@ -38,3 +52,383 @@ def test_priority_engine():
     # Test add_task, get_next_task, etc.
     # Add test implementations as needed
 
+def test_priority_queue_ordering():
+    """Test heap push/pop order and priority updates."""
+    queue = PriorityQueue()
+    for task_id, score in [(1, 30.0), (2, 10.0), (3, 20.0), (4, 40.0)]:
+        queue.push(QueueEntry(score, task_id))
+    
+    assert len(queue) == 4
+    assert queue.peek().id == 2
+    
+    assert queue.update_priority(4, 5.0)
+    assert queue.delete(3)
+    assert not queue.delete(3)
+    assert [queue.pop().id for _ in range(3)] == [4, 2, 1]
+    assert queue.pop() is None
+    assert queue.is_empty()
+
+def test_priority_queue_loads_tasks_lazily():
+    """Test that the queue stores compact entries and loads tasks on demand."""
+    tasks = {1: Task(id=1, title="Write report"), 2: Task(id=2, title="Review PR")}
+    tasks[1].priority_score = 2.0
+    tasks[2].priority_score = 1.0
+    queue = PriorityQueue(task_loader=tasks.get)
+    for task in tasks.values():
+        queue.push(task)
+    
+    assert all(not hasattr(entry, "__dict__") for entry in queue.entries())
+    assert len({QueueEntry(2.0, 1), QueueEntry(2.0, 1), QueueEntry(1.0, 1)}) == 2
+    assert queue.pop() is tasks[2]
+    assert queue.peek() is tasks[1]
+
+def test_priority_engine_entries():
+    """Test that the engine orders compact entries and resolves them through the loader."""
+    tasks = {task_id: Task(id=task_id, title=f"Task {task_id}") for task_id in (1, 2, 3)}
+    for task_id, score in [(1, 10.0), (2, 30.0), (3, 20.0)]:
+        tasks[task_id].priority_score = score
+    engine = PriorityQueueEngine(task_loader=tasks.get)
+    
+    ranked = engine.reprioritize_all(list(tasks.values()))
+    assert [t.id for t in ranked] == [2, 3, 1]
+    assert all(isinstance(entry, QueueEntry) for entry in engine.queue)
+    assert engine.pop_next_task() is tasks[2]
+    assert engine.remove_task(1) is tasks[1]
+    assert engine.get_queue_state()["tasks"] == [{"id": 3, "priority": 20.0}]
+
+def test_priority_queue_rejects_duplicates():
+    """Test that a task can only be queued once."""
+    queue = PriorityQueue()
+    queue.push(QueueEntry(1.0, 1))
+    with pytest.raises(ValueError):
+        queue.push(QueueEntry(2.0, 1))
+    with pytest.raises(ValueError):
+        queue.update_priority(1, float("nan"))
+
+def test_priority_queue_change_log():
+    """Test that mutations are versioned and clients too far behind are told to reset."""
+    queue = PriorityQueue(change_log_size=4)
+    start = queue.get_changes()["version"]
+    queue.push(QueueEntry(5.0, 1))
+    queue.push(QueueEntry(3.0, 2))
+    queue.update_priority(1, 1.0)
+    queue.update_priority(1, 1.0)
+    queue.delete(2, completed=True)
+    
+    changes = queue.get_changes(start + 1)
+    assert changes["version"] == queue.version == start + 5
+    assert [(e["kind"], e["task_id"]) for e in changes["events"]] == [
+        ("added", 2), ("priority_changed", 1), ("updated", 1), ("completed", 2),
+    ]
+    assert queue.get_changes(queue.version) == {"version": queue.version, "events": [], "reset": False}
+    assert queue.get_changes(start)["reset"]  # evicted from the ring buffer
+    assert queue.get_changes(queue.version + 1)["reset"]  # from before a restart
+    
+    queue.bulk_load([QueueEntry(1.0, 3)])
+    assert queue.get_changes(start + 5)["reset"]
+
+class ExclusiveHeap:
+    """Heap wrapper that yields inside every call and counts calls that overlapped another."""
+    
+    def __init__(self, heap):
+        self.heap = heap
+        self.active = 0
+        self.overlaps = 0
+    
+    def __getattr__(self, name):
+        method = getattr(self.heap, name)
+        
+        def call(*args):
+            self.active += 1
+            self.overlaps += self.active > 1
+            time.sleep(0)  # Let another thread run mid-operation
+            try:
+                return method(*args)
+            finally:
+                self.active -= 1
+        return call
+    
+    def __contains__(self, task_id):
+        return self.__getattr__("__contains__")(task_id)
+    
+    def __len__(self):
+        return self.__getattr__("__len__")()
+
+def test_priority_queue_concurrent_writers():
+    """Test that threads sharing a queue take turns on the heap and get distinct change log versions."""
+    queue = PriorityQueue(change_log_size=100_000)
+    queue._heap = heap = ExclusiveHeap(queue._heap)
+    start = queue.version
+    
+    def writer(first_id):
+        rng = random.Random(first_id)
+        for task_id in range(first_id, first_id + 200):
+            queue.push(QueueEntry(float(rng.randint(0, 100)), task_id))
+            queue.update_priority(task_id, float(rng.randint(0, 100)))
+            if task_id % 5 == 0:
+                queue.delete(task_id, completed=True)
+            queue.notify("due", task_id)
+    
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert heap.overlaps == 0
+    events = queue.get_changes(start)["events"]
+    assert [event["version"] for event in events] == list(range(start + 1, start + 1 + 8 * 640))
+    assert len(queue) == 8 * 160
+    drained = []
+    while queue:
+        entry = queue.pop()
+        drained.append((entry.priority_score, entry.task_id))
+    assert drained == sorted(drained)
+
+def test_queue_service_pipeline(tmp_path):
+    """Test batched and pipelined operations against a queue service process."""
+    address = str(tmp_path / "queue.sock")
+    process = start_queue_service(address)
+    try:
+        client = QueueClient(address)
+        pipeline = client.pipeline(max_batch=2)
+        for task_id in range(1, 6):
+            pipeline.push(QueueEntry(float(10 - task_id), task_id))
+        pipeline.update_priority(1, 0.5).delete(2).pop()
+        results = pipeline.execute()
+        
+        assert results[-1].id == 1
+        assert len(client) == 3
+        assert client.peek().id == 5
+        version = client.version
+        assert client.update_priority(3, 7.0, record_unchanged=False)
+        assert client.get_changes(version)["events"] == []
+        
+        # A second client sees the same queue and its changes
+        other = QueueClient(address)
+        changes = other.get_changes(client.version - 1)
+        assert [(e["kind"], e["task_id"]) for e in changes["events"]] == [("removed", 1)]
+        assert other.pop().id == 5
+        with pytest.raises(QueueServiceError):
+            other.push(QueueEntry(1.0, 3))
+        client.close()
+        other.close()
+    finally:
+        process.terminate()
+        process.join()
+
+def test_queue_service_large_pipeline(tmp_path):
+    """Test that a pipeline far larger than the socket buffers completes instead of deadlocking."""
+    address = str(tmp_path / "queue.sock")
+    process = start_queue_service(address)
+    try:
+        client = QueueClient(address)
+        pipeline = client.pipeline()
+        for task_id in range(100_000):
+            pipeline.push(QueueEntry(float(task_id % 97), task_id))
+        results = []
+        # On a deadlock the thread never finishes; the assertion below fails instead of hanging
+        thread = threading.Thread(target=lambda: results.append(pipeline.execute()), daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        assert results and len(results[0]) == 100_000
+        assert len(client) == 100_000
+        client.close()
+    finally:
+        process.terminate()
+        process.join()
+
+def test_queue_service_requires_authkey_over_tcp(tmp_path):
+    """Test that TCP addresses are refused without an authkey and Unix sockets are private."""
+    address = parse_address("127.0.0.1:0")
+    with pytest.raises(ValueError):
+        QueueServer(address)
+    with pytest.raises(ValueError):
+        QueueClient(address)
+    
+    socket_path = str(tmp_path / "queue.sock")
+    process = start_queue_service(socket_path)
+    try:
+        QueueClient(socket_path).close()
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+    finally:
+        process.terminate()
+        process.join()
+
+def test_shared_snapshot_double_buffering():
+    """Test that readers always see the latest complete ranking."""
+    writer = SharedQueueSnapshot.create(f"pf_test_{os.getpid()}", capacity=3)
+    reader = SharedQueueSnapshot.attach(writer.name)
+    try:
+        assert reader.read()["entries"] == []
+        writer.publish([(1, 1.0), (2, 2.0)])
+        writer.publish([(3, 0.5), (1, 1.0), (2, 2.0), (4, 9.0)])
+        
+        ranking = reader.read(k=2)
+        assert ranking["version"] == 2
+        assert ranking["queue_size"] == 4
+        assert ranking["entries"] == [(3, 0.5), (1, 1.0)]
+        assert len(reader.read()["entries"]) == 3
+        
+        queue = PriorityQueue()
+        queue.bulk_load([QueueEntry(float(score), task_id) for task_id, score in [(1, 5), (2, 1), (3, 4), (4, 2)]])
+        writer.publish_queue(queue)
+        assert reader.read() == {"version": 3, "queue_size": 4, "entries": [(2, 1.0), (4, 2.0), (3, 4.0)]}
+    finally:
+        reader.close()
+        writer.close()
+
+def test_queue_service_publishes_snapshot(tmp_path):
+    """Test that the queue service keeps the shared snapshot current."""
+    address = str(tmp_path / "queue.sock")
+    name = f"pf_service_{os.getpid()}"
+    process = start_queue_service(address, snapshot_name=name, snapshot_capacity=16)
+    try:
+        client = QueueClient(address)
+        client.push(QueueEntry(3.0, 7))
+        client.push(QueueEntry(1.0, 8))
+        reader = SharedQueueSnapshot.attach(name)
+        deadline = time.monotonic() + 5
+        while reader.read()["queue_size"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert reader.read()["entries"] == [(8, 1.0), (7, 3.0)]
+        reader.close()
+        client.close()
+    finally:
+        process.terminate()
+        process.join()
+
+def test_queue_store_restores_snapshot_and_log(tmp_path):
+    """Test that a checkpoint plus the log tail reproduce the queue."""
+    store = QueueStore(str(tmp_path))
+    queue = store.load()
+    queue.bulk_load([QueueEntry(float(task_id), task_id) for task_id in range(10, 0, -1)])
+    store.checkpoint(queue)
+    
+    store.log_update(10, 0.5)
+    store.log_delete(1)
+    store.log_push(11, 3.5)
+    store.close()
+    with open(tmp_path / "queue.log", "ab") as log:
+        log.write(b"\x01\x02")  # torn record from a crash mid-write
+    
+    restored = QueueStore(str(tmp_path)).load()
+    assert len(restored) == 10
+    assert [restored.pop().id for _ in range(4)] == [10, 2, 3, 11]
+
+def test_queue_server_rejects_batches_after_shutdown(tmp_path):
+    """Test that batches arriving after the final checkpoint fail instead of being lost."""
+    server = QueueServer(str(tmp_path / "queue.sock"), store=QueueStore(str(tmp_path / "data")))
+    assert server.handle_batch([("push", (1, 1.0))]) == [("ok", None)]
+    server.shutdown()
+    
+    results = server.handle_batch([("push", (2, 2.0)), ("size", ())])
+    assert [status for status, _ in results] == ["error", "error"]
+    assert "shutting down" in results[0][1]
+    restored = QueueStore(str(tmp_path / "data")).load()
+    assert [entry.task_id for entry in restored.entries()] == [1]
+
+def test_queue_service_survives_restart(tmp_path):
+    """Test that a persistent queue service comes back with its queue."""
+    address = str(tmp_path / "queue.sock")
+    data_dir = str(tmp_path / "data")
+    process = start_queue_service(address, data_dir=data_dir)
+    client = QueueClient(address)
+    pipeline = client.pipeline()
+    for task_id in range(1, 4):
+        pipeline.push(QueueEntry(float(task_id), task_id))
+    pipeline.pop().execute()
+    client.close()
+    process.terminate()
+    process.join()
+    
+    process = start_queue_service(address, data_dir=data_dir)
+    try:
+        client = QueueClient(address)
+        assert len(client) == 2
+        assert client.peek().id == 2
+        client.close()
+    finally:
+        process.terminate()
+        process.join()
+
+def test_parallel_scoring_matches_serial():
+    """Test that scoring in chunks across worker processes gives the in-process scores in order."""
+    created = datetime(2025, 1, 1)
+    tasks = [
+        Task(id=i, title=f"Task {i}", urgency=i % 5 + 1, difficulty=(i * 3) % 5 + 1, created_at=created,
+             due_date=created + timedelta(days=i % 9 - 2) if i % 4 else None)
+        for i in range(1, 301)
+    ]
+    serial = DefaultPriorityAlgorithm.score_tasks(tasks)
+    assert score_tasks(DefaultPriorityAlgorithm, tasks, workers=2, chunk_size=64) == serial
+    assert score_tasks(DefaultPriorityAlgorithm, tasks, workers=1) == serial
+
+def test_deadline_index_sweeps_and_windows():
+    """Test that the deadline index tracks moves and removals and answers windows in due date order."""
+    start = datetime(2024, 1, 1)
+    rng = random.Random(7)
+    index = DeadlineIndex()
+    index.bulk_load(sorted((start + timedelta(hours=rng.randint(0, 500)), task_id) for task_id in range(1, 301)))
+    expected = {task_id: due_date for due_date, task_id in index.due_before(datetime.max)}
+    for task_id in rng.sample(range(1, 301), 100):
+        due_date = start + timedelta(hours=rng.randint(0, 500))
+        index.set(task_id, due_date)
+        expected[task_id] = due_date
+    for task_id in rng.sample(range(1, 301), 50):
+        assert index.remove(task_id)
+        del expected[task_id]
+    index.set(1000, None)
+    assert not index.remove(1000)
+    
+    reference = sorted((due_date, task_id) for task_id, due_date in expected.items())
+    cutoff = start + timedelta(hours=100)
+    assert index.peek() == reference[0]
+    assert index.due_before(cutoff) == [entry for entry in reference if entry[0] < cutoff]
+    assert index.due_before(datetime.max, limit=5) == reference[:5]
+    assert index.due_date(reference[0][1]) == reference[0][0]
+    
+    assert index.pop_due(cutoff, limit=3) == reference[:3]
+    assert index.pop_due(cutoff) == [entry for entry in reference[3:] if entry[0] <= cutoff]
+    assert len(index) == len([entry for entry in reference if entry[0] > cutoff])
+    assert index.peek()[0] > cutoff
+
+@pytest.mark.parametrize("heap", sorted(HEAP_BACKENDS))
+def test_heap_backends_match_reference(heap):
+    """Test that every heap backend keeps the same order as a sorted reference through mixed operations."""
+    rng = random.Random(11)
+    queue = PriorityQueue(heap=heap)
+    queue.bulk_load([QueueEntry(float(rng.randint(0, 50)), task_id) for task_id in range(1, 201)])
+    reference = {entry.task_id: entry.priority_score for entry in queue.entries()}
+    next_id = 201
+    for _ in range(2000):
+        operation = rng.random()
+        if operation < 0.6 and reference:
+            task_id = rng.choice(list(reference))
+            reference[task_id] = float(rng.randint(0, 50))
+            assert queue.update_priority(task_id, reference[task_id])
+        elif operation < 0.75:
+            reference[next_id] = float(rng.randint(0, 50))
+            queue.push(QueueEntry(reference[next_id], next_id))
+            next_id += 1
+        elif operation < 0.9 and reference:
+            task_id = rng.choice(list(reference))
+            del reference[task_id]
+            assert queue.delete(task_id)
+        elif reference:
+            expected = min(reference.items(), key=lambda item: (item[1], item[0]))
+            entry = queue.pop()
+            assert (entry.task_id, entry.priority_score) == expected
+            del reference[entry.task_id]
+        assert len(queue) == len(reference)
+    
+    assert not queue.update_priority(next_id, 1.0)
+    assert not queue.delete(next_id)
+    snapshot = queue.get_snapshot()
+    assert snapshot["heap"] == heap
+    assert sorted(task_id for level in snapshot["heap_structure"] for task_id in level) == sorted(reference)
+    drained = []
+    while queue:
+        entry = queue.pop()
+        drained.append((entry.priority_score, entry.task_id))
+    assert drained == sorted((priority, task_id) for task_id, priority in reference.items())
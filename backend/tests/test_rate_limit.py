@@ -0,0 +1,98 @@
+"""
+Rate limiting tests.
+Tests for token buckets per client and route class, load shedding and the 429 responses.
+"""
+
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.rate_limit import (
+    ASSISTANT, BULK, CRUD, AdmissionController, RateLimit, RateLimiter, RateLimitMiddleware, route_class,
+)
+
+def test_route_classes():
+    """Test that requests are classed by path and method, and non-API paths are not limited."""
+    assert route_class("GET", "/api/tasks/1") == CRUD
+    assert route_class("POST", "/api/tasks") == CRUD
+    assert route_class("GET", "/api/tasks") == BULK
+    assert route_class("POST", "/api/tasks/prioritize") == BULK
+    assert route_class("GET", "/api/archive/2024-01") == BULK
+    assert route_class("POST", "/api/assistant/chat") == ASSISTANT
+    assert route_class("GET", "/health") is None
+    assert route_class("GET", "/metrics") is None
+
+def test_token_buckets_per_client_and_class():
+    """Test that each client and route class has its own bucket, refilled at the configured rate."""
+    limiter = RateLimiter({CRUD: RateLimit(1, 2), BULK: RateLimit(1, 1), ASSISTANT: RateLimit(1, 1)})
+    assert limiter.check("a", CRUD, now=0) == (None, 0.0)
+    assert limiter.check("a", CRUD, now=0) == (None, 0.0)
+    assert limiter.check("a", CRUD, now=0) == ("rate", 1.0)
+    assert limiter.check("a", BULK, now=0) == (None, 0.0)
+    assert limiter.check("b", CRUD, now=0) == (None, 0.0)
+    assert limiter.check("a", CRUD, now=0.5) == ("rate", 0.5)
+    assert limiter.check("a", CRUD, now=1.0) == (None, 0.0)
+
+def test_overload_sheds_heavy_clients_and_bulk_work():
+    """Test that under overload light CRUD clients are still served while everything else is shed."""
+    admission = AdmissionController(target=0.1, alpha=1.0, half_life=1.0)
+    limiter = RateLimiter({CRUD: RateLimit(1, 4), BULK: RateLimit(1, 4), ASSISTANT: RateLimit(1, 4)}, admission)
+    for _ in range(3):
+        limiter.check("heavy", CRUD, now=0)
+    admission.observe(0.4, now=0)
+    
+    assert limiter.check("light", CRUD, now=0) == (None, 0.0)
+    reason, retry_after = limiter.check("heavy", CRUD, now=0)
+    assert reason == "overload"
+    assert retry_after == 4.0
+    assert limiter.check("light", BULK, now=0)[0] == "overload"
+    assert limiter.check("light", ASSISTANT, now=0)[0] == "overload"
+    # With no slow requests arriving, the average decays and shedding stops
+    assert limiter.check("light", BULK, now=3.0) == (None, 0.0)
+
+def test_middleware_answers_429_with_retry_after():
+    """Test that over-limit requests get 429 and Retry-After without reaching the endpoint."""
+    calls = []
+    app = FastAPI()
+    
+    @app.get("/api/tasks/{task_id}")
+    def read(task_id: int):
+        calls.append(task_id)
+        return {"id": task_id}
+    
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+    
+    limiter = RateLimiter({CRUD: RateLimit(0.5, 2), BULK: RateLimit(1, 1), ASSISTANT: RateLimit(1, 1)})
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    client = TestClient(app)
+    
+    assert [client.get("/api/tasks/1").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/api/tasks/1")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert calls == [1, 1]
+    assert client.get("/health").status_code == 200
+
+def test_only_crud_requests_feed_admission():
+    """Test that slow assistant replies do not make the server look overloaded."""
+    app = FastAPI()
+    
+    @app.post("/api/assistant/chat")
+    def chat():
+        time.sleep(0.2)  # Waiting on the model
+        return {"reply": "ok"}
+    
+    @app.get("/api/tasks/{task_id}")
+    def read(task_id: int):
+        return {"id": task_id}
+    
+    admission = AdmissionController(target=0.1, alpha=1.0)
+    limiter = RateLimiter({CRUD: RateLimit(10, 10), BULK: RateLimit(10, 10), ASSISTANT: RateLimit(10, 10)}, admission)
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    client = TestClient(app)
+    
+    assert client.post("/api/assistant/chat").status_code == 200
+    assert not admission.overloaded()
+    assert client.get("/api/tasks/1").status_code == 200
+    assert 0 < admission.latency() < 0.1
@@ -0,0 +1,143 @@
+"""
+Write-behind tests.
+Tests for coalescing, group commit and crash recovery of buffered task writes.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from api.dependencies import get_write_buffer
+from main import app
+from models.task import Task
+from models.task_history import TaskHistory
+from models.task_tombstone import TaskTombstone
+from services.task_service import TaskService
+from services.write_behind import WriteBehindBuffer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_tasks(db_session, count):
+    db_session.add_all([Task(title=f"Task {i}") for i in range(count)])
+    db_session.commit()
+
+def test_write_behind_coalesces_into_one_commit(db_engine, db_session, tmp_path):
+    """Test that a burst of edits becomes one commit with one update per task."""
+    add_tasks(db_session, 2)
+    buffer = WriteBehindBuffer(str(tmp_path / "wal"), sessionmaker(bind=db_engine), interval=60)
+    commits = []
+    event.listen(db_engine, "commit", lambda conn: commits.append(1))
+    try:
+        for urgency in (1, 2, 5):
+            buffer.update(1, {"urgency": urgency})
+        buffer.update(1, {"completed": True}, completed_at=datetime(2024, 1, 1))
+        buffer.update(1, {"title": "Renamed"})
+        buffer.delete(2)
+        assert commits == []
+        assert buffer.flush() == 2
+    finally:
+        buffer.close()
+    
+    assert commits == [1]
+    db_session.expire_all()
+    task = db_session.get(Task, 1)
+    assert (task.title, task.urgency, task.completed) == ("Renamed", 5, True)
+    assert db_session.query(TaskHistory.task_id).scalar() == 1
+    assert db_session.get(Task, 2) is None
+    assert db_session.query(TaskTombstone.task_id).scalar() == 2
+
+def test_write_behind_recovers_after_crash(db_engine, db_session, tmp_path):
+    """Test that journaled writes from a killed process are committed on the next start."""
+    add_tasks(db_session, 1)
+    journal_dir = str(tmp_path / "wal")
+    script = (
+        "import os, datetime\n"
+        "from sqlalchemy import create_engine\n"
+        "from sqlalchemy.orm import sessionmaker\n"
+        "from services.write_behind import WriteBehindBuffer\n"
+        f"engine = create_engine({str(db_engine.url)!r})\n"
+        f"buffer = WriteBehindBuffer({journal_dir!r}, sessionmaker(bind=engine), interval=60)\n"
+        "buffer.update(1, {'title': 'Recovered', 'completed': True}, datetime.datetime(2024, 1, 1))\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, check=True)
+    journal = os.path.join(journal_dir, sorted(name for name in os.listdir(journal_dir) if name.endswith(".log"))[-1])
+    with open(journal, "a") as f:
+        f.write('{"id": 1, "set": {"title": "Torn"')  # crash mid-write
+    
+    buffer = WriteBehindBuffer(journal_dir, sessionmaker(bind=db_engine), interval=60)
+    try:
+        assert len(buffer) == 1
+        assert buffer.flush() == 1
+    finally:
+        buffer.close()
+    db_session.expire_all()
+    assert db_session.get(Task, 1).title == "Recovered"
+    assert db_session.query(TaskHistory).count() == 1
+    assert len([name for name in os.listdir(journal_dir) if name.endswith(".log")]) == 1
+
+def test_reads_see_buffered_writes(api_client, db_engine, db_session, tmp_path):
+    """Test that API reads reflect buffered edits and deletes before they are committed."""
+    add_tasks(db_session, 2)
+    buffer = WriteBehindBuffer(str(tmp_path / "wal"), sessionmaker(bind=db_engine), interval=60)
+    app.dependency_overrides[get_write_buffer] = lambda: buffer
+    try:
+        assert api_client.put("/api/tasks/1", json={"title": "Buffered"}).json()["title"] == "Buffered"
+        assert api_client.patch("/api/tasks/1/complete").json()["completed"] is True
+        assert api_client.delete("/api/tasks/2").status_code == 200
+        
+        assert [task["title"] for task in api_client.get("/api/tasks").json()["tasks"]] == ["Buffered"]
+        assert api_client.get("/api/tasks/2").status_code == 404
+        db_session.expire_all()
+        assert db_session.get(Task, 1).title == "Task 0"
+        
+        buffer.flush()
+        db_session.expire_all()
+        assert db_session.get(Task, 1).title == "Buffered"
+    finally:
+        app.dependency_overrides.pop(get_write_buffer, None)
+        buffer.close()
+
+def test_due_windows_see_buffered_due_dates(db_engine, db_session, tmp_path):
+    """Test that buffered due date edits move tasks into and out of due windows before the limit applies."""
+    now = datetime(2024, 1, 1, 12, 0)
+    db_session.add_all([Task(title=f"Due {i}", due_date=now - timedelta(hours=5 - i)) for i in range(3)])
+    db_session.add(Task(title="Later", due_date=now + timedelta(days=30)))
+    db_session.commit()
+    buffer = WriteBehindBuffer(str(tmp_path / "wal"), sessionmaker(bind=db_engine), interval=60)
+    try:
+        service = TaskService(db_session, writer=buffer)
+        service.update_task(4, {"due_date": now - timedelta(hours=10)})  # Moved into the window
+        service.update_task(1, {"due_date": now + timedelta(days=1)})  # Moved out of it
+        service.toggle_task_complete(2)
+        
+        assert [task.title for task in service.get_overdue_tasks(now, limit=2)] == ["Later", "Due 2"]
+        assert [task.title for task in service.get_tasks_due(now + timedelta(days=2), now)] == ["Due 0"]
+    finally:
+        buffer.close()
+
+def test_rejected_rows_do_not_block_other_writes(api_client, db_engine, db_session, tmp_path):
+    """Test that invalid edits are refused up front and a row the database rejects is set aside."""
+    add_tasks(db_session, 2)
+    journal_dir = str(tmp_path / "wal")
+    buffer = WriteBehindBuffer(journal_dir, sessionmaker(bind=db_engine), interval=60)
+    app.dependency_overrides[get_write_buffer] = lambda: buffer
+    try:
+        assert api_client.put("/api/tasks/1", json={"title": None}).status_code == 500
+        assert len(buffer) == 0
+        
+        buffer.update(1, {"title": None})  # Slipped past validation
+        buffer.update(2, {"urgency": 5})
+        assert buffer.flush() == 1
+        assert len(buffer) == 0
+        db_session.expire_all()
+        assert db_session.get(Task, 1).title == "Task 0"
+        assert db_session.get(Task, 2).urgency == 5
+        with open(os.path.join(journal_dir, "dead_letter.log")) as dead_letters:
+            assert [json.loads(line)["id"] for line in dead_letters] == [1]
+    finally:
+        app.dependency_overrides.pop(get_write_buffer, None)
+        buffer.close()
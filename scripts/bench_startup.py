@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark script.
+Measures cold import time of the API and init_db() on fresh and current databases.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(elapsed, int('google.generativeai' in sys.modules))
+"""
+
+INIT_DB_PROBE = """
+import time
+from database.connection import init_db
+start = time.perf_counter()
+init_db()
+print(time.perf_counter() - start)
+"""
+
+def run_probe(code: str, env: dict) -> list:
+    """Run a probe in a fresh interpreter and return its printed fields."""
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return output.split()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PriorityForge cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        
+        import_times = []
+        loaded_ai_sdk = False
+        for _ in range(args.runs):
+            elapsed, loaded = run_probe(IMPORT_PROBE, env)
+            import_times.append(float(elapsed))
+            loaded_ai_sdk = loaded_ai_sdk or loaded == "1"
+        
+        fresh = float(run_probe(INIT_DB_PROBE, env)[0])
+        warm = [float(run_probe(INIT_DB_PROBE, env)[0]) for _ in range(args.runs)]
+    
+    print(f"import main:          {statistics.median(import_times) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"init_db (fresh db):   {fresh * 1000:8.1f} ms")
+    print(f"init_db (current db): {statistics.median(warm) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"Gemini SDK imported at startup: {'yes' if loaded_ai_sdk else 'no'}")
+
+if __name__ == "__main__":
+    main()
@@ -36,22 +36,22 @@ def seed_sample_data():
             Task(
                 title="Setup PriorityForge project",
                 description="Initialize the project structure",
-                is_urgent=True,
-                is_important=True,
+                urgency=5,
+                difficulty=2,
                 due_date=datetime.utcnow() + timedelta(days=1)
             ),
             Task(
                 title="Implement priority algorithms",
                 description="Add custom priority queue algorithms",
-                is_urgent=False,
-                is_important=True,
+                urgency=3,
+                difficulty=4,
                 due_date=datetime.utcnow() + timedelta(days=7)
             ),
             Task(
                 title="Write documentation",
                 description="Create comprehensive documentation",
-                is_urgent=False,
-                is_important=False,
+                urgency=2,
+                difficulty=3,
                 due_date=datetime.utcnow() + timedelta(days=14)
             ),
         ]
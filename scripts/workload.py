@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Workload generator.
+Seeds the database with realistic tasks and drives a mixed request stream against a running API.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+DEFAULT_MIX = "list=5,get=50,create=15,update=15,complete=10,delete=5"
+
+def seed(n_tasks: int, completed_ratio: float, batch_size: int, seed_value: int):
+    """Bulk insert synthetic tasks, with history rows and completion rollups for the completed ones."""
+    from sqlalchemy import insert, select, func
+    from analytics.collectors import add_to_rollups
+    from analytics.evaluation import sample_task_fields
+    from database.connection import init_db
+    from database.session import SessionLocal
+    from models.task import Task
+    from models.task_history import TaskHistory
+    
+    init_db()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        first_id = (db.execute(select(func.max(Task.id))).scalar() or 0) + 1
+        started = time.perf_counter()
+        for start in range(0, n_tasks, batch_size):
+            tasks, history, completions = [], [], []
+            for task_id in range(first_id + start, first_id + min(start + batch_size, n_tasks)):
+                created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                fields = sample_task_fields(rng, created)
+                completed = rng.random() < completed_ratio
+                updated = created
+                if completed:
+                    updated = min(created + timedelta(hours=rng.expovariate(1 / 48)), now)
+                    history.append({"task_id": task_id, "completed_at": updated, "created_at": updated,
+                                     "updated_at": updated})
+                    completions.append((created, updated))
+                tasks.append(dict(fields, id=task_id, title=f"Task {task_id}", completed=completed,
+                                  created_at=created, updated_at=updated))
+            db.execute(insert(Task), tasks)
+            if history:
+                db.execute(insert(TaskHistory), history)
+                add_to_rollups(db, completions)
+            db.commit()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"Seeded {n_tasks} tasks in {elapsed:.2f}s ({n_tasks / elapsed:,.0f} rows/s)")
+
+def parse_mix(mix: str) -> dict:
+    """Parse "name=weight,..." into a weight per operation."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}' (choose from {', '.join(OPERATIONS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+class Worker(threading.Thread):
+    """Issues requests over one keep-alive connection and records latencies per endpoint."""
+    
+    def __init__(self, url, requests, weights, ids, lock, rng):
+        super().__init__(daemon=True)
+        parsed = urlparse(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        self.requests = requests
+        self.operations = list(weights)
+        self.weights = list(weights.values())
+        self.ids = ids
+        self.lock = lock
+        self.rng = rng
+        self.latencies = {}
+        self.errors = {}
+    
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, data
+    
+    def pick_id(self):
+        with self.lock:
+            return self.rng.choice(self.ids) if self.ids else None
+    
+    def run(self):
+        for _ in range(self.requests):
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            endpoint, method, path, body = OPERATIONS[operation](self)
+            if path is None:
+                continue
+            started = time.perf_counter()
+            try:
+                status, data = self.request(method, path, body)
+            except (OSError, http.client.HTTPException):
+                self.connection.close()
+                status, data = None, b""
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+            if status is None or status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            elif operation == "create":
+                with self.lock:
+                    self.ids.append(json.loads(data)["id"])
+            elif operation == "delete":
+                with self.lock:
+                    task_id = int(path.rsplit("/", 1)[1])
+                    if task_id in self.ids:
+                        self.ids.remove(task_id)
+
+def _task_path(worker, suffix=""):
+    task_id = worker.pick_id()
+    return f"/api/tasks/{task_id}{suffix}" if task_id is not None else None
+
+OPERATIONS = {
+    "list": lambda w: ("GET /api/tasks", "GET", "/api/tasks", None),
+    "get": lambda w: ("GET /api/tasks/{id}", "GET", _task_path(w), None),
+    "create": lambda w: ("POST /api/tasks", "POST", "/api/tasks", {
+        "title": "Workload task", "urgency": w.rng.randint(1, 5), "difficulty": w.rng.randint(1, 5),
+    }),
+    "update": lambda w: ("PUT /api/tasks/{id}", "PUT", _task_path(w), {"urgency": w.rng.randint(1, 5)}),
+    "complete": lambda w: ("PATCH /api/tasks/{id}/complete", "PATCH", _task_path(w, "/complete"), None),
+    "delete": lambda w: ("DELETE /api/tasks/{id}", "DELETE", _task_path(w), None),
+}
+
+def percentile(samples, q):
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))]
+
+def run(url: str, total: int, concurrency: int, mix: str, seed_value: int):
+    """Drive the request mix and print latency percentiles per endpoint."""
+    weights = parse_mix(mix)
+    parsed = urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+    connection.request("GET", "/api/tasks")
+    ids = [task["id"] for task in json.loads(connection.getresponse().read())["tasks"]]
+    connection.close()
+    
+    lock = threading.Lock()
+    rng = random.Random(seed_value)
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    workers = [Worker(url, count, weights, ids, lock, random.Random(rng.random())) for count in per_worker]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies, errors = {}, {}
+    for worker in workers:
+        for endpoint, samples in worker.latencies.items():
+            latencies.setdefault(endpoint, []).extend(samples)
+        for endpoint, count in worker.errors.items():
+            errors[endpoint] = errors.get(endpoint, 0) + count
+    
+    done = sum(len(samples) for samples in latencies.values())
+    print(f"{done} requests in {elapsed:.2f}s ({done / elapsed:,.0f} req/s, {concurrency} connections)")
+    print(f"{'endpoint':32} {'count':>7} {'errors':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for endpoint in sorted(latencies):
+        samples = sorted(latencies[endpoint])
+        row = [statistics.mean(samples)] + [percentile(samples, q) for q in (50, 95, 99)]
+        print(f"{endpoint:32} {len(samples):7} {errors.get(endpoint, 0):6} "
+              + " ".join(f"{value * 1000:8.2f}" for value in row))
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed PriorityForge and drive a request workload")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    seed_parser = subparsers.add_parser("seed", help="Bulk insert synthetic tasks into DATABASE_URL")
+    seed_parser.add_argument("--tasks", type=int, default=10000, help="Tasks to insert")
+    seed_parser.add_argument("--completed-ratio", type=float, default=0.3,
+                             help="Share of tasks inserted as completed, with a history row")
+    seed_parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert transaction")
+    seed_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    
+    run_parser = subparsers.add_parser("run", help="Drive a mixed request stream against a running server")
+    run_parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+    run_parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent connections")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX,
+                            help=f"Operation weights, from {', '.join(OPERATIONS)} (default: {DEFAULT_MIX})")
+    run_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args.tasks, args.completed_ratio, args.batch_size, args.seed)
+    else:
+        run(args.url, args.requests, args.concurrency, args.mix, args.seed)
+
+if __name__ == "__main__":
+    main()